@@ -0,0 +1,84 @@
+"""Import time of the package entry points, checked against a time budget and a list of modules they must not load.
+
+Each statement runs under ``python -X importtime`` in a fresh interpreter; the best of ``--repeat`` runs is reported.
+Exits with status 1 when a statement exceeds its budget or loads a module it should not.
+Run with ``uv run python benchmarks/import_time.py [--repeat N] [--scale FACTOR]``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from dataclasses import dataclass
+
+HEAVY = ("scipy", "numba", "taqsim", "pydrology")
+MARKER = "--- import-time statement ---"
+
+
+@dataclass(frozen=True)
+class Target:
+    name: str
+    statement: str
+    budget_ms: float
+    forbidden: tuple[str, ...]
+
+
+# Budgets are loose multiples of a laptop measurement; NumPy alone is roughly 100 ms of the routing figures.
+TARGETS = (
+    Target("package", "import taqsim_hydrology", 40.0, ("numpy", *HEAVY)),
+    Target("lag", "from taqsim_hydrology.routing import Lag", 300.0, HEAVY),
+    Target(
+        "routing", "from taqsim_hydrology.routing import Lag, LinearReservoir, Muskingum, NashCascade", 350.0, HEAVY
+    ),
+    Target("losses", "from taqsim_hydrology.losses import ConstantFraction, Evaporation, Seepage", 350.0, HEAVY[:2]),
+    Target("sources", "from taqsim_hydrology.sources import PrecomputeCache, precompute_to_file", 400.0, HEAVY),
+)
+
+
+def measure(target: Target) -> tuple[float, list[str]]:
+    code = (
+        f"import sys; sys.stderr.write({MARKER!r} + '\\n'); {target.statement}; "
+        f"print(','.join(m for m in {target.forbidden!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], check=True, capture_output=True, text=True
+    )
+    lines = result.stderr.split(MARKER, 1)[1].splitlines()
+    total_us = 0
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        # Only top-level imports: nested ones are already included in their parent's cumulative time.
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative)
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return total_us / 1000, loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget, e.g. on slow CI machines")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'target':<10} {'import ms':>10} {'budget ms':>10}  status")
+    for target in TARGETS:
+        runs = [measure(target) for _ in range(args.repeat)]
+        best = min(ms for ms, _ in runs)
+        loaded = sorted({name for _, names in runs for name in names})
+        budget = target.budget_ms * args.scale
+        status = "ok"
+        if loaded:
+            status = f"loads {', '.join(loaded)}"
+        elif best > budget:
+            status = "over budget"
+        failed |= status != "ok"
+        print(f"{target.name:<10} {best:>10.1f} {budget:>10.1f}  {status}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Peak RSS of handing precomputed streamflow to taqsim as a list versus a zero-copy array view.
+
+Each mode runs in a fresh interpreter so that ru_maxrss reflects that mode alone.
+Run with ``uv run python benchmarks/precompute_handoff.py [n_sources] [n_steps]``.
+"""
+
+from __future__ import annotations
+
+import resource
+import subprocess
+import sys
+
+MODES = ("list", "array", "memmap")
+
+
+def _peak_rss_mib() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+
+def _run(mode: str, n_sources: int, n_steps: int) -> None:
+    import tempfile
+    from pathlib import Path
+
+    import numpy as np
+    from taqsim.node.timeseries import TimeSeries
+
+    from taqsim_hydrology.sources.handoff import to_timeseries
+
+    baseline = _peak_rss_mib()
+    rng = np.random.default_rng(0)
+    series = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(n_sources):
+            # Stand-in for one pydrology run: a fresh float64 streamflow array per source.
+            streamflow = rng.gamma(0.5, 20.0, size=n_steps)
+            if mode == "list":
+                series.append(TimeSeries(values=streamflow.tolist()))
+            elif mode == "array":
+                series.append(to_timeseries(streamflow))
+            else:
+                path = Path(tmp) / f"{i}.npy"
+                np.save(path, streamflow)
+                del streamflow
+                series.append(to_timeseries(np.load(path, mmap_mode="r")))
+        # Touch every value once, as a simulation would.
+        total = sum(sum(s.values) for s in series)
+        print(f"{mode},{_peak_rss_mib() - baseline:.1f},{total:.3e}")
+
+
+def main() -> None:
+    n_sources = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    n_steps = int(sys.argv[2]) if len(sys.argv) > 2 else 15_000
+    print(f"{n_sources} sources x {n_steps} steps")
+    print(f"{'mode':<8} {'peak RSS increase (MiB)':>24}")
+    for mode in MODES:
+        out = subprocess.run(
+            [sys.executable, __file__, "--run", mode, str(n_sources), str(n_steps)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        name, rss, _ = out.strip().split(",")
+        print(f"{name:<8} {float(rss):>24.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--run":
+        _run(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+    else:
+        main()
@@ -0,0 +1,82 @@
+"""Peak RSS of a full in-memory precompute run versus a chunked run over memory-mapped forcing.
+
+The forcing is written to .npy files first. Each mode then runs in a fresh interpreter so that ru_maxrss
+reflects that mode alone.
+Run with ``uv run python benchmarks/precompute_streaming.py [n_steps ...] [--chunk-steps N]``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import resource
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+MODES = ("full", "stream")
+
+
+def _peak_rss_mib() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+
+def _write_forcing(directory: Path, n_steps: int) -> None:
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    np.save(directory / "time.npy", np.datetime64("1950-01-01T00") + np.arange(n_steps).astype("timedelta64[h]"))
+    np.save(directory / "precip.npy", rng.gamma(0.1, 2.0, size=n_steps))
+    np.save(directory / "pet.npy", 0.1 + 0.08 * np.sin(np.arange(n_steps) * 2 * np.pi / 8766.0))
+
+
+def _run(mode: str, directory: Path, chunk_steps: int) -> None:
+    import numpy as np
+    from pydrology import ForcingData, get_model
+
+    from taqsim_hydrology.sources import precompute_to_file, run_model
+
+    params = get_model("gr6j").Parameters(x1=350.0, x2=0.0, x3=90.0, x4=1.7, x5=0.0, x6=5.0)
+    baseline = _peak_rss_mib()
+    mmap_mode = "r" if mode == "stream" else None
+    forcing = ForcingData(
+        **{name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode) for name in ("time", "precip", "pet")}
+    )
+    if mode == "full":
+        total = float(run_model(forcing, "gr6j", params).sum())
+    else:
+        series = precompute_to_file(forcing, "gr6j", params, directory / "streamflow.npy", chunk_steps=chunk_steps)
+        # The result is not read back: mapping it in would count the whole record as resident page cache.
+        total = float(len(series.values))
+    print(f"{mode},{_peak_rss_mib() - baseline:.1f},{total:.3e}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("n_steps", nargs="*", type=int, default=[87_660, 438_300, 876_600])
+    parser.add_argument("--chunk-steps", type=int, default=2**16)
+    args = parser.parse_args()
+
+    print(f"chunk_steps={args.chunk_steps}")
+    print(f"{'n_steps':>10} {'mode':<8} {'peak RSS increase (MiB)':>24}")
+    for n_steps in args.n_steps:
+        with tempfile.TemporaryDirectory() as tmp:
+            _write_forcing(Path(tmp), n_steps)
+            for mode in MODES:
+                out = subprocess.run(
+                    [sys.executable, __file__, "--run", mode, tmp, str(args.chunk_steps)],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                ).stdout
+                name, rss, _ = out.strip().split(",")
+                print(f"{n_steps:>10} {name:<8} {float(rss):>24.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--run":
+        _run(sys.argv[2], Path(sys.argv[3]), int(sys.argv[4]))
+    else:
+        main()
@@ -0,0 +1,57 @@
+"""Cost of a reach with a constant-fraction loss: step-by-step route() + calculate() versus fused route_with_loss().
+
+Run with ``uv run python benchmarks/reach_with_loss.py``.
+"""
+
+from __future__ import annotations
+
+import timeit
+
+import numpy as np
+from taqsim.node.reach import Reach
+from taqsim.time import Frequency, Timestep
+
+from taqsim_hydrology.losses import ConstantFraction
+from taqsim_hydrology.routing import Lag, LinearReservoir, Muskingum, available_backends, use_backend
+
+STEPS = 100_000
+REPEATS = 5
+
+
+def _step_by_step(model, loss: ConstantFraction, inflows: list[float]) -> list[float]:
+    reach = Reach(id="bench", routing_model=model, loss_rule=loss)
+    state = model.initial_state(reach)
+    delivered = []
+    for i, inflow in enumerate(inflows):
+        t = Timestep(index=i, frequency=Frequency.DAILY)
+        outflow, state = model.route(reach, inflow, state, t)
+        lost = sum(loss.calculate(reach, outflow, t).values())
+        delivered.append(outflow - lost)
+    return delivered
+
+
+def _ns_per_step(run) -> float:
+    return min(timeit.repeat(run, number=1, repeat=REPEATS)) / STEPS * 1e9
+
+
+def main() -> None:
+    inflows = np.random.default_rng(0).gamma(0.5, 40.0, size=STEPS)
+    as_list = inflows.tolist()
+    loss = ConstantFraction(0.05)
+    models = (("Muskingum", Muskingum(k=2.0, x=0.2)), ("LinearReservoir", LinearReservoir(k=3.0)), ("Lag", Lag(lag=5)))
+
+    print(f"{'model':<16} {'backend':<8} {'per-step ns/step':>17} {'fused ns/step':>14} {'speed-up':>9}")
+    for name, model in models:
+        before = _ns_per_step(lambda model=model: _step_by_step(model, loss, as_list))
+        for backend in available_backends():
+            with use_backend(backend):
+                # The first call compiles the numba kernel, so it is kept out of the timing.
+                model.route_with_loss(inflows[:10], model.initial_state(Reach(id="warm-up")), loss)
+                after = _ns_per_step(
+                    lambda model=model: model.route_with_loss(inflows, model.initial_state(Reach(id="bench")), loss)
+                )
+            print(f"{name:<16} {backend:<8} {before:>17.1f} {after:>14.1f} {before / after:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Per-step cost of route() with coefficients recomputed on every call versus cached at construction.
+
+Run with ``uv run python benchmarks/route_step.py``.
+"""
+
+from __future__ import annotations
+
+import math
+import timeit
+
+from taqsim.node.reach import Reach
+from taqsim.node.strategies import NoReachLoss
+from taqsim.time import Frequency, Timestep
+
+from taqsim_hydrology.routing import LinearReservoir, Muskingum, MuskingumState
+
+STEPS = 200_000
+REPEATS = 5
+
+
+def _muskingum_recomputed(model: Muskingum, inflow: float, state: MuskingumState) -> tuple[float, MuskingumState]:
+    denom = 2 * model.k * (1 - model.x) + 1
+    c0 = (1 - 2 * model.k * model.x) / denom
+    c1 = (1 + 2 * model.k * model.x) / denom
+    c2 = (2 * model.k * (1 - model.x) - 1) / denom
+    outflow = max(c0 * inflow + c1 * state.prev_inflow + c2 * state.prev_outflow, 0.0)
+    return outflow, MuskingumState(prev_inflow=inflow, prev_outflow=outflow)
+
+
+def _linear_reservoir_recomputed(model: LinearReservoir, inflow: float, state: float) -> tuple[float, float]:
+    c = math.exp(-1.0 / model.k)
+    new_storage = state * c + inflow * (model.k * (1 - c))
+    return state + inflow - new_storage, new_storage
+
+
+def _ns_per_step(step) -> float:
+    return min(timeit.repeat(step, number=STEPS, repeat=REPEATS)) / STEPS * 1e9
+
+
+def main() -> None:
+    t = Timestep(index=0, frequency=Frequency.DAILY)
+
+    muskingum = Muskingum(k=2.0, x=0.2)
+    reach = Reach(id="bench", routing_model=muskingum, loss_rule=NoReachLoss())
+    m_state = MuskingumState(10.0, 8.0)
+    m_before = _ns_per_step(lambda: _muskingum_recomputed(muskingum, 12.0, m_state))
+    m_after = _ns_per_step(lambda: muskingum.route(reach, 12.0, m_state, t))
+
+    reservoir = LinearReservoir(k=3.0)
+    reach = Reach(id="bench", routing_model=reservoir, loss_rule=NoReachLoss())
+    r_before = _ns_per_step(lambda: _linear_reservoir_recomputed(reservoir, 12.0, 30.0))
+    r_after = _ns_per_step(lambda: reservoir.route(reach, 12.0, 30.0, t))
+
+    print(f"{'model':<16} {'recomputed ns/step':>20} {'cached ns/step':>16} {'speed-up':>9}")
+    for name, before, after in (("Muskingum", m_before, m_after), ("LinearReservoir", r_before, r_after)):
+        print(f"{name:<16} {before:>20.1f} {after:>16.1f} {before / after:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
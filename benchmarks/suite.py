@@ -0,0 +1,474 @@
+"""Benchmark suite for routing, losses and precompute, with JSON results and baseline comparison.
+
+Run with ``uv run python benchmarks/suite.py [--size quick|full] [--filter TEXT] [--output PATH]``.
+Compare against a stored run with ``--compare BASELINE.json [--threshold 0.25]``; the exit status is 1 if any case
+regressed by more than the threshold.
+
+Results and baselines are machine-specific. Record a baseline on the machine that will run the comparison, with the
+same ``--size`` and backend. The comparison uses the best repeat of each run. A case that looks slower is timed again
+in a fresh process, up to ``--retries`` times, and only fails if its fastest best is still over the threshold. On a
+loaded single-core machine, unchanged code can still differ by up to 1.5x between processes on the 10^3-step cases;
+raise ``--threshold`` there.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from taqsim.node.reach import Reach
+from taqsim.node.strategies import NoReachLoss
+from taqsim.time import Frequency, Timestep
+
+from taqsim_hydrology.losses import ConstantFraction, Evaporation, Seepage
+from taqsim_hydrology.routing import Lag, LinearReservoir, Muskingum, NashCascade, get_backend, use_backend
+from taqsim_hydrology.routing.network import NetworkReach, RoutingNetwork
+
+SCHEMA = 1
+DEFAULT_OUTPUT = Path(__file__).parent / "results" / "latest.json"
+LAGS = (1, 24, 365)
+
+SIZES: dict[str, dict[str, Any]] = {
+    "quick": {
+        "per_step": 10_000,
+        "series": (10**3, 10**5),
+        "network": ((1, 10**3), (10, 10**4), (100, 10**3)),
+        "precompute": (4, 730),
+    },
+    "full": {
+        "per_step": 100_000,
+        "series": (10**3, 10**5, 10**7),
+        "network": ((1, 10**7), (10, 10**6), (100, 10**5), (1000, 10**4)),
+        "precompute": (32, 3650),
+    },
+}
+
+
+@dataclass(frozen=True)
+class Case:
+    group: str
+    target: str
+    params: dict[str, int]
+    units: int
+    unit: str
+    setup: Callable[[], Callable[[], object]]
+
+    @property
+    def key(self) -> str:
+        params = ",".join(f"{name}={value}" for name, value in self.params.items())
+        return f"{self.group}/{self.target}[{params}]" if params else f"{self.group}/{self.target}"
+
+
+def _inflows(n_steps: int, seed: int = 0) -> np.ndarray:
+    # Sparse gamma pulses, so high-x Muskingum reaches exercise the zero clamp.
+    rng = np.random.default_rng(seed)
+    return np.where(rng.random(n_steps) < 0.3, rng.gamma(0.5, 40.0, size=n_steps), 0.0)
+
+
+def _models() -> dict[str, Any]:
+    models: dict[str, Any] = {
+        "muskingum": Muskingum(k=2.0, x=0.2),
+        "linear_reservoir": LinearReservoir(k=3.0),
+        "nash_cascade_3": NashCascade(k=3.0, n=3),
+    }
+    for n in LAGS:
+        models[f"lag_{n}"] = Lag(lag=n)
+        models[f"lag_{n}_ring"] = Lag(lag=n, ring_buffer=True)
+    return models
+
+
+def _reach(model: Any) -> Reach:
+    return Reach(id="bench", routing_model=model, loss_rule=NoReachLoss())
+
+
+def _route_step(model: Any, n_steps: int) -> Callable[[], Callable[[], object]]:
+    def setup() -> Callable[[], object]:
+        reach = _reach(model)
+        inflows = _inflows(n_steps).tolist()
+        t = Timestep(index=0, frequency=Frequency.DAILY)
+
+        def run() -> object:
+            state = model.initial_state(reach)
+            route = model.route
+            for inflow in inflows:
+                _, state = route(reach, inflow, state, t)
+            return state
+
+        return run
+
+    return setup
+
+
+def _storage(model: Any, n_calls: int) -> Callable[[], Callable[[], object]]:
+    def setup() -> Callable[[], object]:
+        _, state = model.route_series(_inflows(1_000), model.initial_state(_reach(model)))
+        storage = model.storage
+
+        def run() -> object:
+            for _ in range(n_calls):
+                storage(state)
+            return state
+
+        return run
+
+    return setup
+
+
+def _route_series(model: Any, n_steps: int) -> Callable[[], Callable[[], object]]:
+    def setup() -> Callable[[], object]:
+        reach = _reach(model)
+        inflows = _inflows(n_steps)
+        return lambda: model.route_series(inflows, model.initial_state(reach))
+
+    return setup
+
+
+def _route_convolved(model: Any, n_steps: int) -> Callable[[], Callable[[], object]]:
+    def setup() -> Callable[[], object]:
+        reach = _reach(model)
+        inflows = _inflows(n_steps)
+        return lambda: model.route_convolved(inflows, model.initial_state(reach))
+
+    return setup
+
+
+def _route_with_loss(model: Any, n_steps: int) -> Callable[[], Callable[[], object]]:
+    def setup() -> Callable[[], object]:
+        reach = _reach(model)
+        inflows = _inflows(n_steps)
+        loss = ConstantFraction(0.05)
+        return lambda: model.route_with_loss(inflows, model.initial_state(reach), loss)
+
+    return setup
+
+
+def _network(n_reaches: int, n_steps: int) -> Callable[[], Callable[[], object]]:
+    def setup() -> Callable[[], object]:
+        # A binary tree of mixed model types: reach i drains into reach (i - 1) // 2, so reach 0 is the outlet.
+        kinds = (
+            lambda i: Muskingum(k=1.0 + i % 5, x=0.2),
+            lambda i: LinearReservoir(k=2.0 + i % 7),
+            lambda i: Lag(i % 4),
+        )
+        upstream: dict[int, list[str]] = {i: [] for i in range(n_reaches)}
+        for i in range(1, n_reaches):
+            upstream[(i - 1) // 2].append(f"r{i}")
+        network = RoutingNetwork([NetworkReach(f"r{i}", kinds[i % 3](i), tuple(upstream[i])) for i in range(n_reaches)])
+        lateral = {f"r{i}": _inflows(n_steps, seed=i) for i in range(n_reaches)}
+        return lambda: network.route(lateral)
+
+    return setup
+
+
+def _loss_step(rule: Any, n_steps: int, reach_rule: bool) -> Callable[[], Callable[[], object]]:
+    def setup() -> Callable[[], object]:
+        values = _inflows(n_steps).tolist()
+        steps = [Timestep(index=i, frequency=Frequency.DAILY) for i in range(n_steps)]
+        reach = _reach(None)
+        calculate = rule.calculate
+
+        if reach_rule:
+
+            def run() -> object:
+                return [calculate(reach, flow, t) for flow, t in zip(values, steps, strict=True)]
+
+        else:
+            node = _StorageStandIn(0.0)
+
+            def run() -> object:
+                losses = []
+                for storage, t in zip(values, steps, strict=True):
+                    node.current_storage = storage
+                    losses.append(calculate(node, t))
+                return losses
+
+        return run
+
+    return setup
+
+
+class _StorageStandIn:
+    # calculate() only reads current_storage, so a full taqsim Storage node would time its constructor, not the rule.
+    __slots__ = ("current_storage",)
+
+    def __init__(self, current_storage: float) -> None:
+        self.current_storage = current_storage
+
+
+def _loss_series(method: Callable[..., object], *args: Any) -> Callable[[], Callable[[], object]]:
+    return lambda: lambda: method(*args)
+
+
+def _precompute(n_jobs: int, n_days: int, max_workers: int | None) -> Callable[[], Callable[[], object]]:
+    def setup() -> Callable[[], object]:
+        from taqsim_hydrology.sources import precompute_many
+
+        jobs = _precompute_jobs(n_jobs, n_days)
+        return lambda: precompute_many(jobs, max_workers=max_workers)
+
+    return setup
+
+
+def _precompute_cached(n_jobs: int, n_days: int) -> Callable[[], Callable[[], object]]:
+    def setup() -> Callable[[], object]:
+        from taqsim_hydrology.sources import PrecomputeCache, precompute_many
+
+        jobs = _precompute_jobs(n_jobs, n_days)
+        cache = PrecomputeCache(Path(tempfile.mkdtemp(prefix="taqsim-hydrology-bench-")))
+        precompute_many(jobs, max_workers=1, cache=cache)
+        return lambda: precompute_many(jobs, max_workers=1, cache=cache)
+
+    return setup
+
+
+def _precompute_jobs(n_jobs: int, n_days: int) -> list[Any]:
+    from pydrology import ForcingData, get_model
+
+    from taqsim_hydrology.sources import PrecomputeJob
+
+    params = get_model("gr6j").Parameters
+    jobs = []
+    for i in range(n_jobs):
+        rng = np.random.default_rng(i)
+        forcing = ForcingData(
+            time=np.datetime64("2000-01-01") + np.arange(n_days).astype("timedelta64[D]"),
+            precip=rng.gamma(0.6, 6.0, size=n_days),
+            pet=2.0 + 1.5 * np.sin(np.arange(n_days) * 2 * np.pi / 365.25),
+        )
+        jobs.append(
+            PrecomputeJob(forcing, "gr6j", params(x1=200.0 + 10.0 * i, x2=0.0, x3=90.0, x4=1.7, x5=0.0, x6=5.0))
+        )
+    return jobs
+
+
+def cases(size: str) -> Iterator[Case]:
+    config = SIZES[size]
+    per_step = config["per_step"]
+    models = _models()
+
+    for name, model in models.items():
+        yield Case("route_step", name, {}, per_step, "step", _route_step(model, per_step))
+        yield Case("storage", name, {}, per_step, "call", _storage(model, per_step))
+    for n_steps in config["series"]:
+        for name, model in models.items():
+            yield Case("route_series", name, {"n_steps": n_steps}, n_steps, "step", _route_series(model, n_steps))
+        for name in ("muskingum", "linear_reservoir", "lag_24"):
+            setup = _route_with_loss(models[name], n_steps)
+            yield Case("route_with_loss", name, {"n_steps": n_steps}, n_steps, "step", setup)
+        for name in ("muskingum", "linear_reservoir", "nash_cascade_3"):
+            setup = _route_convolved(models[name], n_steps)
+            yield Case("route_convolved", name, {"n_steps": n_steps}, n_steps, "step", setup)
+    for n_reaches, n_steps in config["network"]:
+        params = {"n_reaches": n_reaches, "n_steps": n_steps}
+        yield Case("network", "binary_tree", params, n_reaches * n_steps, "reach-step", _network(n_reaches, n_steps))
+
+    temperature = 12.0 + 10.0 * np.sin(np.arange(max(config["series"])) * 2 * np.pi / 365.25)
+    evaporation = Evaporation(temperature, coefficient=0.002)
+    seepage = Seepage(0.01)
+    constant_fraction = ConstantFraction(0.05)
+    yield Case("loss_step", "constant_fraction", {}, per_step, "step", _loss_step(constant_fraction, per_step, True))
+    yield Case("loss_step", "evaporation", {}, per_step, "step", _loss_step(evaporation, per_step, False))
+    yield Case("loss_step", "seepage", {}, per_step, "step", _loss_step(seepage, per_step, False))
+    for n_steps in config["series"]:
+        values = _inflows(n_steps)
+        params = {"n_steps": n_steps}
+        series = (
+            ("constant_fraction", _loss_series(constant_fraction.calculate_series, values)),
+            ("evaporation", _loss_series(evaporation.calculate_series, values)),
+            ("seepage", _loss_series(seepage.calculate_series, values)),
+            ("seepage_decay", _loss_series(seepage.decay, 1e6, n_steps)),
+            ("seepage_trajectory", _loss_series(seepage.trajectory, 1e6, values)),
+        )
+        for name, setup in series:
+            yield Case("loss_series", name, params, n_steps, "step", setup)
+
+    n_jobs, n_days = config["precompute"]
+    params = {"n_jobs": n_jobs, "n_days": n_days}
+    yield Case("precompute", "inline", params, n_jobs, "job", _precompute(n_jobs, n_days, 1))
+    yield Case("precompute", "process_pool", params, n_jobs, "job", _precompute(n_jobs, n_days, None))
+    yield Case("precompute", "cache_hit", params, n_jobs, "job", _precompute_cached(n_jobs, n_days))
+
+
+def measure(run: Callable[[], object], repeats: int, min_time: float) -> list[float]:
+    # The first call is a warm-up: it triggers numba compilation and fills CPU and OS caches.
+    run()
+    number = 1
+    while (elapsed := _timed(run, number)) < min_time:
+        number = max(number * 2, math.ceil(number * min_time / max(elapsed, 1e-9)))
+    return [elapsed / number] + [_timed(run, number) / number for _ in range(repeats - 1)]
+
+
+def _timed(run: Callable[[], object], number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        run()
+    return time.perf_counter() - start
+
+
+def run_suite(
+    size: str, name_filter: str | None, repeats: int, min_time: float, keys: set[str] | None = None
+) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    for case in cases(size):
+        if name_filter and name_filter not in case.key:
+            continue
+        if keys is not None and case.key not in keys:
+            continue
+        timings = measure(case.setup(), repeats, min_time)
+        best = min(timings)
+        results[case.key] = {
+            "group": case.group,
+            "target": case.target,
+            "params": case.params,
+            "unit": case.unit,
+            "units": case.units,
+            "best_s": best,
+            "median_s": statistics.median(timings),
+            "ns_per_unit": best / case.units * 1e9,
+            "repeats": repeats,
+        }
+        print(f"{case.key:<60} {best / case.units * 1e9:>14.2f} ns/{case.unit}", flush=True)
+    return {"schema": SCHEMA, "meta": _meta(size), "results": results}
+
+
+def _run_isolated(
+    backend: str, size: str, name_filter: str | None, repeats: int, min_time: float, keys: set[str]
+) -> dict[str, Any]:
+    with use_backend(backend):
+        return run_suite(size, name_filter, repeats, min_time, keys)
+
+
+def _meta(size: str) -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created": datetime.now(UTC).isoformat(timespec="seconds"),
+        "commit": commit,
+        "size": size,
+        "backend": get_backend(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor() or None,
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def _slower(current: dict[str, Any], baseline: dict[str, Any], threshold: float) -> set[str]:
+    return {
+        key
+        for key, result in current["results"].items()
+        if key in baseline["results"] and result["best_s"] > (1 + threshold) * baseline["results"][key]["best_s"]
+    }
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    for field in ("backend", "size", "machine"):
+        if current["meta"].get(field) != baseline["meta"].get(field):
+            print(
+                f"warning: baseline {field} is {baseline['meta'].get(field)!r}, "
+                f"this run is {current['meta'].get(field)!r}; timings may not be comparable"
+            )
+
+    regressions = []
+    print(f"\n{'case':<60} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for key, result in current["results"].items():
+        reference = baseline["results"].get(key)
+        if reference is None:
+            print(f"{key:<60} {'—':>12} {result['ns_per_unit']:>12.2f} {'new':>7}")
+            continue
+        ratio = result["best_s"] / reference["best_s"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        elif ratio < 1 / (1 + threshold):
+            flag = "  faster"
+        print(f"{key:<60} {reference['ns_per_unit']:>12.2f} {result['ns_per_unit']:>12.2f} {ratio:>6.2f}x{flag}")
+    if missing := len(baseline["results"].keys() - current["results"].keys()):
+        print(f"{missing} baseline case(s) not run")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=sorted(SIZES), default="quick")
+    parser.add_argument("--filter", help="only run cases whose key contains this text")
+    parser.add_argument("--backend", choices=("numpy", "numba"), help="routing kernel backend (default: active one)")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per timed repeat")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--compare", type=Path, metavar="BASELINE", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="slow-down ratio above 1 flagged as regression")
+    parser.add_argument("--retries", type=int, default=3, help="times a case flagged by --compare is timed again")
+    args = parser.parse_args(argv)
+    if args.repeats < 1:
+        parser.error("--repeats must be at least 1")
+    if args.retries < 0:
+        parser.error("--retries must be non-negative")
+
+    baseline = None
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text())
+        if baseline.get("schema") != SCHEMA:
+            print(f"error: {args.compare} has schema {baseline.get('schema')}, expected {SCHEMA}", file=sys.stderr)
+            return 2
+
+    backend = args.backend or get_backend()
+    with use_backend(backend):
+        current = run_suite(args.size, args.filter, args.repeats, args.min_time)
+    for _ in range(args.retries if baseline is not None else 0):
+        if not (flagged := _slower(current, baseline, args.threshold)):
+            break
+        # Memory layout and load differ from one process to the next and shift a case's best by up to ~1.5x, which
+        # repeats within one process cannot average out. Flagged cases are timed again in a fresh process and keep
+        # their fastest best.
+        print(f"\nre-timing {len(flagged)} case(s) slower than the baseline in a new process")
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            retimed = pool.submit(
+                _run_isolated, backend, args.size, args.filter, args.repeats, args.min_time, flagged
+            ).result()
+        for key, result in retimed["results"].items():
+            if result["best_s"] < current["results"][key]["best_s"]:
+                current["results"][key] = result
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(current, indent=2) + "\n")
+    print(f"\nwrote {len(current['results'])} results to {args.output}")
+
+    if baseline is None:
+        return 0
+    regressions = compare(current, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    print("\nno regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
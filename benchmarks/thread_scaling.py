@@ -0,0 +1,102 @@
+"""Throughput of concurrent scenario evaluation on one routing network, by number of worker threads.
+
+``shared`` builds the network once and runs ``RoutingNetwork.evaluate``: its group tables are read-only and every
+worker reuses one workspace. ``rebuild`` gives every scenario its own network and buffers, as independent
+evaluations would. Near-linear scaling needs a free-threaded interpreter (``python3.13t``) or the numba backend, whose
+kernels release the GIL; the interpreter's GIL status is printed with the results.
+Run with ``uv run python benchmarks/thread_scaling.py [--reaches N] [--steps N] [--scenarios N] [--workers 1 2 4 ...]``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from taqsim_hydrology.routing import Lag, LinearReservoir, Muskingum, get_backend
+from taqsim_hydrology.routing.network import NetworkReach, RoutingNetwork
+
+Runner = Callable[[list[NetworkReach], list[dict[str, np.ndarray]], int], list[float]]
+
+
+def _reaches(n_reaches: int) -> list[NetworkReach]:
+    # The suite's binary tree of mixed model types: reach i drains into reach (i - 1) // 2, reach 0 is the outlet.
+    kinds = (
+        lambda i: Muskingum(k=1.0 + i % 5, x=0.2),
+        lambda i: LinearReservoir(k=2.0 + i % 7),
+        lambda i: Lag(i % 4),
+    )
+    upstream: dict[int, list[str]] = {i: [] for i in range(n_reaches)}
+    for i in range(1, n_reaches):
+        upstream[(i - 1) // 2].append(f"r{i}")
+    return [NetworkReach(f"r{i}", kinds[i % 3](i), tuple(upstream[i])) for i in range(n_reaches)]
+
+
+def _scenarios(n_reaches: int, n_steps: int, n_scenarios: int) -> list[dict[str, np.ndarray]]:
+    # Candidate policies scale the same read-only source runoff by a per-reach release factor.
+    rng = np.random.default_rng(0)
+    runoff = rng.gamma(0.5, 40.0, size=(n_reaches, n_steps))
+    runoff.flags.writeable = False
+    factors = rng.uniform(0.5, 1.5, size=(n_scenarios, n_reaches))
+    return [{f"r{i}": runoff[i] * factors[s, i] for i in range(n_reaches)} for s in range(n_scenarios)]
+
+
+def _peak_outlet(outflows: dict[str, np.ndarray]) -> float:
+    return float(outflows["r0"].max())
+
+
+def _shared(reaches: list[NetworkReach], scenarios: list[dict[str, np.ndarray]], workers: int) -> list[float]:
+    return RoutingNetwork(reaches).evaluate(scenarios, _peak_outlet, max_workers=workers)
+
+
+def _rebuild(reaches: list[NetworkReach], scenarios: list[dict[str, np.ndarray]], workers: int) -> list[float]:
+    def run(lateral: dict[str, np.ndarray]) -> float:
+        return _peak_outlet(RoutingNetwork(reaches).route(lateral))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run, scenarios))
+
+
+def _timed(run: Runner, reaches: list[NetworkReach], scenarios: list[dict[str, np.ndarray]], n_workers: int) -> float:
+    start = time.perf_counter()
+    run(reaches, scenarios, n_workers)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reaches", type=int, default=255)
+    parser.add_argument("--steps", type=int, default=8_760)
+    parser.add_argument("--scenarios", type=int, default=64)
+    parser.add_argument("--workers", type=int, nargs="*", default=None)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    cpus = os.process_cpu_count() or 1
+    workers = args.workers or sorted({1, *(2**p for p in range(cpus.bit_length()) if 2**p <= cpus), cpus})
+    gil = sys._is_gil_enabled() if hasattr(sys, "_is_gil_enabled") else True
+    print(f"python={sys.version.split()[0]} gil={'enabled' if gil else 'disabled'} backend={get_backend()} cpus={cpus}")
+    print(f"reaches={args.reaches} steps={args.steps} scenarios={args.scenarios}")
+
+    reaches = _reaches(args.reaches)
+    scenarios = _scenarios(args.reaches, args.steps, args.scenarios)
+    expected = _shared(reaches, scenarios[:2], 1)
+    print(f"{'mode':<8} {'workers':>7} {'scenarios/s':>12} {'speed-up':>9} {'efficiency':>11}")
+    for mode, run in (("shared", _shared), ("rebuild", _rebuild)):
+        baseline = None
+        for n_workers in workers:
+            assert run(reaches, scenarios[:2], n_workers) == expected
+            best = min(_timed(run, reaches, scenarios, n_workers) for _ in range(args.repeats))
+            throughput = len(scenarios) / best
+            baseline = baseline or throughput
+            speedup = throughput / baseline
+            print(f"{mode:<8} {n_workers:>7} {throughput:>12.1f} {speedup:>8.2f}x {speedup / n_workers:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
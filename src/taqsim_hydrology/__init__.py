@@ -1,3 +1,21 @@
-from taqsim_hydrology.docs import get_docs_path
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from taqsim_hydrology._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from taqsim_hydrology.docs import get_docs_path
 
 __all__ = ["get_docs_path"]
+
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "get_docs_path": "taqsim_hydrology.docs",
+        "losses": "taqsim_hydrology.losses",
+        "profiling": "taqsim_hydrology.profiling",
+        "routing": "taqsim_hydrology.routing",
+        "sources": "taqsim_hydrology.sources",
+    },
+)
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from taqsim_hydrology._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from taqsim_hydrology.losses.constant_fraction import ConstantFraction
+    from taqsim_hydrology.losses.evaporation import Evaporation
+    from taqsim_hydrology.losses.seepage import Seepage
+
+__all__ = ["ConstantFraction", "Evaporation", "Seepage"]
+
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "ConstantFraction": "taqsim_hydrology.losses.constant_fraction",
+        "Evaporation": "taqsim_hydrology.losses.evaporation",
+        "Seepage": "taqsim_hydrology.losses.seepage",
+    },
+)
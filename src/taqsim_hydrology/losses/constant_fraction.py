@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+from taqsim.common import INEFFICIENCY
+
+if TYPE_CHECKING:
+    from numpy.typing import ArrayLike, NDArray
+    from taqsim.common import LossReason
+    from taqsim.node.reach import Reach
+    from taqsim.time import Timestep
+
+
+@dataclass(frozen=True)
+class ConstantFraction:
+    fraction: float
+    reason: LossReason = INEFFICIENCY
+
+    def __post_init__(self) -> None:
+        if not 0 <= self.fraction <= 1:
+            raise ValueError(f"fraction must be in [0, 1], got {self.fraction}")
+
+    def calculate(self, reach: Reach, flow: float, t: Timestep) -> dict[LossReason, float]:
+        return {self.reason: flow * self.fraction}
+
+    def calculate_series(self, flows: ArrayLike) -> NDArray[np.float64]:
+        return np.asarray(flows, dtype=np.float64) * self.fraction
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import numpy as np
+from taqsim.common import EVAPORATION
+
+if TYPE_CHECKING:
+    from numpy.typing import ArrayLike, NDArray
+    from taqsim.common import LossReason
+    from taqsim.node.storage import Storage
+    from taqsim.time import Timestep
+
+
+@dataclass(frozen=True)
+class Evaporation:
+    temperature: ArrayLike = field(compare=False)
+    coefficient: float
+    base_temperature: float = 0.0
+    _rates: NDArray[np.float64] = field(init=False, repr=False, compare=False)
+    _digest: bytes = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.coefficient < 0:
+            raise ValueError(f"coefficient must be non-negative, got {self.coefficient}")
+        # A private copy (adding 0.0 also folds -0.0 into 0.0, so equal series hash equally).
+        temperature = np.asarray(self.temperature, dtype=np.float64) + 0.0
+        if temperature.ndim != 1:
+            raise ValueError(f"temperature must be a 1-D series, got shape {temperature.shape}")
+        if not np.isfinite(temperature).all():
+            raise ValueError("temperature must be finite")
+        # The series can be long, so equality and hashing use a digest of it instead of the values themselves.
+        temperature.flags.writeable = False
+        object.__setattr__(self, "temperature", temperature)
+        object.__setattr__(self, "_digest", hashlib.sha256(temperature.tobytes()).digest())
+        rates = np.clip(self.coefficient * (temperature - self.base_temperature), 0.0, 1.0)
+        rates.flags.writeable = False
+        object.__setattr__(self, "_rates", rates)
+
+    def __reduce__(self) -> tuple[type[Evaporation], tuple[ArrayLike, float, float]]:
+        # Rebuilt through __init__ so the unpickled arrays are read-only again.
+        return Evaporation, (self.temperature, self.coefficient, self.base_temperature)
+
+    @classmethod
+    def from_node(cls, node: Storage, coefficient: float, base_temperature: float = 0.0) -> Evaporation:
+        return cls(node.auxiliary_data["temperature"], coefficient=coefficient, base_temperature=base_temperature)
+
+    @property
+    def rates(self) -> NDArray[np.float64]:
+        return self._rates
+
+    def calculate(self, node: Storage, t: Timestep) -> dict[LossReason, float]:
+        return {EVAPORATION: self._rates.item(t.index) * node.current_storage}
+
+    def calculate_series(self, storage: ArrayLike, start: int = 0) -> NDArray[np.float64]:
+        storage = np.asarray(storage, dtype=np.float64)
+        rates = self._rates[start : start + storage.shape[-1]]
+        if rates.shape[0] != storage.shape[-1]:
+            raise ValueError(
+                f"storage trajectory of {storage.shape[-1]} steps from index {start} "
+                f"exceeds the {self._rates.shape[0]}-step temperature series"
+            )
+        return rates * storage
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+from taqsim.common import SEEPAGE
+
+if TYPE_CHECKING:
+    from numpy.typing import ArrayLike, NDArray
+    from taqsim.common import LossReason
+    from taqsim.node.storage import Storage
+    from taqsim.time import Timestep
+
+_LOG_TINY = math.log(np.finfo(np.float64).tiny)
+
+
+@dataclass(frozen=True)
+class Seepage:
+    rate: float
+
+    def __post_init__(self) -> None:
+        if not 0 <= self.rate <= 1:
+            raise ValueError(f"rate must be in [0, 1], got {self.rate}")
+
+    def calculate(self, node: Storage, t: Timestep) -> dict[LossReason, float]:
+        return {SEEPAGE: self.rate * node.current_storage}
+
+    def calculate_series(self, storage: ArrayLike) -> NDArray[np.float64]:
+        return np.asarray(storage, dtype=np.float64) * self.rate
+
+    def decay(self, initial_storage: ArrayLike, n_steps: int) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        # Without inflow, S[t] = S[0] * (1 - rate) ** t, so no recursion is needed.
+        initial_storage = np.asarray(initial_storage, dtype=np.float64)
+        retained = np.zeros(n_steps)
+        # Powers below the smallest normal float are flushed to zero: pow on subnormals is several times slower and
+        # they are far below any meaningful storage.
+        if self.rate == 0:
+            live = n_steps
+        elif self.rate == 1:
+            live = min(n_steps, 1)
+        else:
+            live = min(n_steps, math.ceil(_LOG_TINY / math.log1p(-self.rate)))
+        np.power(1.0 - self.rate, np.arange(live), out=retained[:live])
+        storage = initial_storage[..., None] * retained
+        return storage, storage * self.rate
+
+    def trajectory(
+        self, initial_storage: ArrayLike, net_inflows: ArrayLike
+    ) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        from scipy.signal import lfilter
+
+        # S[t+1] = (1 - rate) * S[t] + q[t] is a first-order linear recursion, so one lfilter pass covers the series.
+        # Storage has one entry more than the inflows: the last one is the storage after the final step.
+        initial_storage = np.asarray(initial_storage, dtype=np.float64)
+        net_inflows = np.asarray(net_inflows, dtype=np.float64)
+        shape = np.broadcast_shapes((*initial_storage.shape, 1), net_inflows.shape)
+        storage = np.empty((*shape[:-1], shape[-1] + 1))
+        storage[..., 0] = initial_storage
+        if shape[-1] > 0:
+            retained = 1.0 - self.rate
+            zi = np.broadcast_to(retained * initial_storage[..., None], (*shape[:-1], 1))
+            driven = np.broadcast_to(net_inflows, shape)
+            storage[..., 1:], _ = lfilter([1.0], [1.0, -retained], driven, axis=-1, zi=zi)
+        return storage, storage[..., :-1] * self.rate
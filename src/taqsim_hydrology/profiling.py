@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import functools
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Literal
+
+GroupBy = Literal["reach", "model", "type", "method"]
+
+_GROUP_FIELDS: dict[GroupBy, tuple[str, ...]] = {
+    "reach": ("reach",),
+    "model": ("type", "model"),
+    "type": ("type",),
+    "method": ("type", "method"),
+}
+
+_active: Profile | None = None
+_originals: list[tuple[type, str, Callable[..., Any]]] = []
+
+
+@dataclass
+class CallStats:
+    calls: int = 0
+    seconds: float = 0.0
+    clamps: int = 0
+
+
+@dataclass
+class Profile:
+    # Keyed by (reach id, id(model), method); models holds a reference so ids stay unique while profiling.
+    stats: dict[tuple[str | None, int, str], CallStats] = field(default_factory=dict)
+    models: dict[int, Any] = field(default_factory=dict)
+
+    def record(self, model: Any, reach_id: str | None, method: str) -> CallStats:
+        key = (reach_id, id(model), method)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = CallStats()
+            self.models.setdefault(id(model), model)
+        return stats
+
+    def rows(self) -> list[dict[str, Any]]:
+        rows = []
+        for (reach_id, model_id, method), stats in self.stats.items():
+            model = self.models[model_id]
+            rows.append(
+                {
+                    "reach": reach_id,
+                    "type": type(model).__name__,
+                    "model": repr(model),
+                    "method": method,
+                    "calls": stats.calls,
+                    "seconds": stats.seconds,
+                    "clamps": stats.clamps,
+                }
+            )
+        return sorted(rows, key=lambda row: row["seconds"], reverse=True)
+
+    def summary(self, by: GroupBy = "reach") -> list[dict[str, Any]]:
+        if by not in _GROUP_FIELDS:
+            raise ValueError(f"by must be one of {tuple(_GROUP_FIELDS)}, got {by!r}")
+        fields = _GROUP_FIELDS[by]
+        grouped: dict[tuple[Any, ...], dict[str, Any]] = {}
+        for row in self.rows():
+            key = tuple(row[name] for name in fields)
+            group = grouped.setdefault(
+                key, {**dict(zip(fields, key, strict=True)), "calls": 0, "seconds": 0.0, "clamps": 0}
+            )
+            group["calls"] += row["calls"]
+            group["seconds"] += row["seconds"]
+            group["clamps"] += row["clamps"]
+        total = sum(group["seconds"] for group in grouped.values()) or 1.0
+        for group in grouped.values():
+            group["mean_us"] = group["seconds"] / group["calls"] * 1e6
+            group["share"] = group["seconds"] / total
+        return sorted(grouped.values(), key=lambda group: group["seconds"], reverse=True)
+
+    def table(self, by: GroupBy = "reach", limit: int | None = None) -> str:
+        summary = self.summary(by)[:limit]
+        fields = _GROUP_FIELDS[by]
+        header = [*fields, "calls", "seconds", "mean µs", "share", "clamps"]
+        body = [
+            [
+                *("-" if group[name] is None else str(group[name]) for name in fields),
+                f"{group['calls']:,}",
+                f"{group['seconds']:.4f}",
+                f"{group['mean_us']:.2f}",
+                f"{group['share']:.1%}",
+                f"{group['clamps']:,}",
+            ]
+            for group in summary
+        ]
+        widths = [max(len(row[i]) for row in [header, *body]) for i in range(len(header))]
+        lines = []
+        for row in [header, *body]:
+            cells = [
+                cell.ljust(width) if i < len(fields) else cell.rjust(width)
+                for i, (cell, width) in enumerate(zip(row, widths, strict=True))
+            ]
+            lines.append("  ".join(cells).rstrip())
+        lines.insert(1, "  ".join("-" * width for width in widths))
+        return "\n".join(lines)
+
+
+def is_enabled() -> bool:
+    return _active is not None
+
+
+def enable() -> Profile:
+    global _active
+    if _active is not None:
+        raise RuntimeError("profiling is already enabled")
+    active = Profile()
+    originals = []
+    try:
+        for owner, method, owner_of, clamp in _hooks():
+            original = owner.__dict__[method]
+            originals.append((owner, method, original))
+            setattr(owner, method, _instrument(original, method, owner_of, clamp))
+    except BaseException:
+        _restore(originals)
+        raise
+    _originals.extend(originals)
+    _active = active
+    return active
+
+
+def disable() -> Profile | None:
+    global _active
+    active, _active = _active, None
+    _restore(_originals)
+    _originals.clear()
+    return active
+
+
+@contextmanager
+def profile() -> Iterator[Profile]:
+    active = enable()
+    try:
+        yield active
+    finally:
+        disable()
+
+
+def _restore(originals: list[tuple[type, str, Callable[..., Any]]]) -> None:
+    for owner, method, original in reversed(originals):
+        setattr(owner, method, original)
+
+
+def _instrument(
+    original: Callable[..., Any],
+    method: str,
+    owner_of: Callable[[tuple[Any, ...], dict[str, Any]], Any],
+    clamp: Callable[..., bool] | None,
+) -> Callable[..., Any]:
+    @functools.wraps(original)
+    def instrumented(model: Any, *args: Any, **kwargs: Any) -> Any:
+        active = _active
+        start = time.perf_counter()
+        result = original(model, *args, **kwargs)
+        elapsed = time.perf_counter() - start
+        if active is not None:
+            stats = active.record(model, getattr(owner_of(args, kwargs), "id", None), method)
+            stats.calls += 1
+            stats.seconds += elapsed
+            if clamp is not None and clamp(model, *args, **kwargs):
+                stats.clamps += 1
+        return result
+
+    return instrumented
+
+
+def _first_argument(name: str) -> Callable[[tuple[Any, ...], dict[str, Any]], Any]:
+    # The owner is the first parameter after self, passed either by position or by name.
+    def owner_of(args: tuple[Any, ...], kwargs: dict[str, Any]) -> Any:
+        return args[0] if args else kwargs.get(name)
+
+    return owner_of
+
+
+def _no_owner(args: tuple[Any, ...], kwargs: dict[str, Any]) -> None:
+    return None
+
+
+def _hooks() -> list[tuple[type, str, Callable[[tuple[Any, ...], dict[str, Any]], Any], Callable[..., bool] | None]]:
+    from taqsim_hydrology.losses import ConstantFraction, Evaporation, Seepage
+    from taqsim_hydrology.routing import Lag, LinearReservoir, Muskingum, NashCascade
+
+    hooks: list[tuple[type, str, Callable[[tuple[Any, ...], dict[str, Any]], Any], Callable[..., bool] | None]] = []
+    for model_type in (Muskingum, LinearReservoir, Lag, NashCascade):
+        hooks.append((model_type, "route", _first_argument("reach"), getattr(model_type, "_clamps", None)))
+        hooks.append((model_type, "storage", _no_owner, None))
+    for rule_type, owner in ((ConstantFraction, "reach"), (Evaporation, "node"), (Seepage, "node")):
+        hooks.append((rule_type, "calculate", _first_argument(owner), None))
+    return hooks
@@ -1,5 +1,53 @@
-from taqsim_hydrology.routing.lag import Lag
-from taqsim_hydrology.routing.linear_reservoir import LinearReservoir
-from taqsim_hydrology.routing.muskingum import Muskingum, MuskingumState
+from __future__ import annotations
 
-__all__ = ["Lag", "LinearReservoir", "Muskingum", "MuskingumState"]
+from typing import TYPE_CHECKING
+
+from taqsim_hydrology._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from taqsim_hydrology.routing.backend import available_backends, get_backend, set_backend, use_backend
+    from taqsim_hydrology.routing.calibration import CalibrationResult, calibrate, mse_gradient
+    from taqsim_hydrology.routing.codec import StateCodec
+    from taqsim_hydrology.routing.lag import Lag, LagBuffer
+    from taqsim_hydrology.routing.linear_reservoir import LinearReservoir
+    from taqsim_hydrology.routing.muskingum import Muskingum, MuskingumEnsembleState, MuskingumState
+    from taqsim_hydrology.routing.nash_cascade import NashCascade
+
+__all__ = [
+    "CalibrationResult",
+    "Lag",
+    "LagBuffer",
+    "LinearReservoir",
+    "Muskingum",
+    "MuskingumEnsembleState",
+    "MuskingumState",
+    "NashCascade",
+    "StateCodec",
+    "available_backends",
+    "calibrate",
+    "get_backend",
+    "mse_gradient",
+    "set_backend",
+    "use_backend",
+]
+
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "CalibrationResult": "taqsim_hydrology.routing.calibration",
+        "Lag": "taqsim_hydrology.routing.lag",
+        "LagBuffer": "taqsim_hydrology.routing.lag",
+        "LinearReservoir": "taqsim_hydrology.routing.linear_reservoir",
+        "Muskingum": "taqsim_hydrology.routing.muskingum",
+        "MuskingumEnsembleState": "taqsim_hydrology.routing.muskingum",
+        "MuskingumState": "taqsim_hydrology.routing.muskingum",
+        "NashCascade": "taqsim_hydrology.routing.nash_cascade",
+        "StateCodec": "taqsim_hydrology.routing.codec",
+        "available_backends": "taqsim_hydrology.routing.backend",
+        "calibrate": "taqsim_hydrology.routing.calibration",
+        "get_backend": "taqsim_hydrology.routing.backend",
+        "mse_gradient": "taqsim_hydrology.routing.calibration",
+        "set_backend": "taqsim_hydrology.routing.backend",
+        "use_backend": "taqsim_hydrology.routing.backend",
+    },
+)
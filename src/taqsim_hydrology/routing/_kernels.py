@@ -0,0 +1,412 @@
+from __future__ import annotations
+
+import math
+from functools import cache
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from taqsim_hydrology.routing import backend
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from numpy.typing import NDArray
+
+
+def read_only(*arrays: NDArray[Any]) -> tuple[NDArray[Any], ...]:
+    # Group tables are shared by every thread that routes through a network, so nothing may write to them.
+    for array in arrays:
+        array.flags.writeable = False
+    return arrays
+
+
+def convolve(inflows: NDArray[np.float64], kernel: NDArray[np.float64]) -> NDArray[np.float64]:
+    from scipy.signal import oaconvolve
+
+    # Overlap-add FFT: O(n log L) for a kernel of length L, and kernel taps past the series end are never needed.
+    n_steps = inflows.shape[-1]
+    return oaconvolve(inflows, kernel[:n_steps])[:n_steps]
+
+
+def decay(ratio: float, n_steps: int) -> NDArray[np.float64]:
+    # ratio**j for j < n_steps, stopped once it falls below the rounding of the first term.
+    horizon = n_steps
+    if abs(ratio) < 1.0:
+        horizon = min(n_steps, 1 if ratio == 0 else math.ceil(math.log(2.0**-53) / math.log(abs(ratio))))
+    return ratio ** np.arange(horizon)
+
+
+def muskingum_series(
+    inflows: NDArray[np.float64], c0: float, c1: float, c2: float, prev_inflow: float, prev_outflow: float
+) -> tuple[NDArray[np.float64], float, float]:
+    if backend.get_backend() == "numba":
+        outflows, last_inflow, last_outflow = _compiled().muskingum_rows(
+            inflows[None, :],
+            np.array([c0]),
+            np.array([c1]),
+            np.array([c2]),
+            np.array([prev_inflow]),
+            np.array([prev_outflow]),
+        )
+        return outflows[0], float(last_inflow[0]), float(last_outflow[0])
+    outflows: list[float] = []
+    # Plain floats avoid per-element NumPy scalar boxing in the interpreted loop.
+    for inflow in inflows.tolist():
+        prev_outflow = max(c0 * inflow + c1 * prev_inflow + c2 * prev_outflow, 0.0)
+        prev_inflow = inflow
+        outflows.append(prev_outflow)
+    return np.array(outflows, dtype=np.float64), prev_inflow, prev_outflow
+
+
+def muskingum_loss_series(
+    inflows: NDArray[np.float64],
+    c0: float,
+    c1: float,
+    c2: float,
+    prev_inflow: float,
+    prev_outflow: float,
+    fraction: float,
+) -> tuple[NDArray[np.float64], NDArray[np.float64], float, float]:
+    if backend.get_backend() == "numba":
+        return _compiled().muskingum_loss_series(inflows, c0, c1, c2, prev_inflow, prev_outflow, fraction)
+    net: list[float] = []
+    losses: list[float] = []
+    for inflow in inflows.tolist():
+        prev_outflow = max(c0 * inflow + c1 * prev_inflow + c2 * prev_outflow, 0.0)
+        prev_inflow = inflow
+        loss = prev_outflow * fraction
+        net.append(prev_outflow - loss)
+        losses.append(loss)
+    return np.array(net, dtype=np.float64), np.array(losses, dtype=np.float64), prev_inflow, prev_outflow
+
+
+def muskingum_sensitivity(
+    inflows: NDArray[np.float64],
+    c0: float,
+    c1: float,
+    c2: float,
+    derivatives: NDArray[np.float64],
+    prev_inflow: float,
+    prev_outflow: float,
+) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+    # derivatives is (3, n_params): d(c0, c1, c2) per parameter. Returns the outflows and their (n_params, n_steps)
+    # derivatives, carried forward alongside the recursion from a state that does not depend on the parameters.
+    if backend.get_backend() == "numba":
+        return _compiled().muskingum_sensitivity(inflows, c0, c1, c2, derivatives, prev_inflow, prev_outflow)
+    d0, d1, d2 = derivatives.tolist()
+    n_params = len(d0)
+    sensitivity = [0.0] * n_params
+    outflows: list[float] = []
+    rows: list[list[float]] = []
+    for inflow in inflows.tolist():
+        q = c0 * inflow + c1 * prev_inflow + c2 * prev_outflow
+        if q < 0.0:
+            # A clamped outflow is pinned at zero, so small parameter changes do not move it.
+            q = 0.0
+            sensitivity = [0.0] * n_params
+        else:
+            sensitivity = [
+                d0[p] * inflow + d1[p] * prev_inflow + d2[p] * prev_outflow + c2 * sensitivity[p]
+                for p in range(n_params)
+            ]
+        outflows.append(q)
+        rows.append(sensitivity)
+        prev_inflow = inflow
+        prev_outflow = q
+    return np.array(outflows, dtype=np.float64), np.array(rows, dtype=np.float64).reshape(-1, n_params).T.copy()
+
+
+def reservoir_loss_series(
+    inflows: NDArray[np.float64], decay: float, gain: float, storage: float, fraction: float
+) -> tuple[NDArray[np.float64], NDArray[np.float64], float]:
+    if backend.get_backend() == "numba":
+        return _compiled().reservoir_loss_series(inflows, decay, gain, storage, fraction)
+    net: list[float] = []
+    losses: list[float] = []
+    for inflow in inflows.tolist():
+        new_storage = storage * decay + inflow * gain
+        outflow = storage + inflow - new_storage
+        storage = new_storage
+        loss = outflow * fraction
+        net.append(outflow - loss)
+        losses.append(loss)
+    return np.array(net, dtype=np.float64), np.array(losses, dtype=np.float64), storage
+
+
+def muskingum_rows(
+    inflows: NDArray[np.float64],
+    c0: float | NDArray[np.float64],
+    c1: float | NDArray[np.float64],
+    c2: float | NDArray[np.float64],
+    prev_inflow: NDArray[np.float64],
+    prev_outflow: NDArray[np.float64],
+) -> tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]]:
+    # Routes every row of an (n_rows, n_steps) inflow matrix; a 1-D inflow series is shared by all rows.
+    n_rows = prev_inflow.shape[0]
+    n_steps = inflows.shape[-1]
+    if backend.get_backend() == "numba":
+        return _compiled().muskingum_rows(
+            np.broadcast_to(inflows, (n_rows, n_steps)),
+            np.broadcast_to(c0, (n_rows,)),
+            np.broadcast_to(c1, (n_rows,)),
+            np.broadcast_to(c2, (n_rows,)),
+            prev_inflow,
+            prev_outflow,
+        )
+    # Step-major layout so every row's inflow at one timestep is contiguous.
+    by_step = inflows[:, None] if inflows.ndim == 1 else np.ascontiguousarray(inflows.T)
+    outflows = np.empty((n_steps, n_rows), dtype=np.float64)
+    for i in range(n_steps):
+        inflow = by_step[i]
+        out = outflows[i]
+        np.multiply(c0, inflow, out=out)
+        out += c1 * prev_inflow
+        out += c2 * prev_outflow
+        np.maximum(out, 0.0, out=out)
+        prev_inflow = inflow
+        prev_outflow = out
+    return (
+        np.ascontiguousarray(outflows.T),
+        np.broadcast_to(prev_inflow, (n_rows,)).copy(),
+        np.broadcast_to(prev_outflow, (n_rows,)).copy(),
+    )
+
+
+def reservoir_rows(
+    inflows: NDArray[np.float64], decay: NDArray[np.float64], gain: NDArray[np.float64], storage: NDArray[np.float64]
+) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+    # Routes every row of an (n_rows, n_steps) inflow matrix through its own linear reservoir; a 1-D inflow
+    # series is shared by all rows.
+    n_rows = storage.shape[0]
+    n_steps = inflows.shape[-1]
+    if backend.get_backend() == "numba":
+        return _compiled().reservoir_rows(np.broadcast_to(inflows, (n_rows, n_steps)), decay, gain, storage)
+    by_step = inflows[:, None] if inflows.ndim == 1 else np.ascontiguousarray(inflows.T)
+    outflows = np.empty((n_steps, n_rows), dtype=np.float64)
+    for i in range(n_steps):
+        inflow = by_step[i]
+        new_storage = storage * decay + inflow * gain
+        np.subtract(storage + inflow, new_storage, out=outflows[i])
+        storage = new_storage
+    return np.ascontiguousarray(outflows.T), storage
+
+
+def cascade_rows(
+    inflows: NDArray[np.float64], terms: NDArray[np.float64], gains: NDArray[np.float64], state: NDArray[np.float64]
+) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+    # Routes every row of an (n_rows, n_steps) inflow matrix through a reservoir cascade of n_stores stores;
+    # state, terms and gains have shape (n_rows, n_stores), a 1-D terms or gains vector is shared by all rows,
+    # and so is a 1-D inflow series.
+    n_rows, n_stores = state.shape
+    n_steps = inflows.shape[-1]
+    terms = np.broadcast_to(terms, (n_rows, n_stores))
+    gains = np.broadcast_to(gains, (n_rows, n_stores))
+    if backend.get_backend() == "numba":
+        return _compiled().cascade_rows(np.broadcast_to(inflows, (n_rows, n_steps)), terms, gains, state)
+    if n_rows == 1:
+        return _cascade_series(inflows.reshape(n_steps), terms[0].tolist(), gains[0].tolist(), state[0].tolist())
+    by_step = inflows[:, None] if inflows.ndim == 1 else np.ascontiguousarray(inflows.T)
+    outflows = np.empty((n_steps, n_rows), dtype=np.float64)
+    stores = [state[:, j].copy() for j in range(n_stores)]
+    terms = [terms[:, d].copy() for d in range(n_stores)]
+    gains = [gains[:, j].copy() for j in range(n_stores)]
+    # Same summation order as the compiled loop, so both backends agree bit for bit.
+    for i in range(n_steps):
+        inflow = by_step[i]
+        updated = []
+        for j in range(n_stores):
+            acc = terms[j] * stores[0]
+            for m in range(1, j + 1):
+                acc = acc + terms[j - m] * stores[m]
+            updated.append(acc + gains[j] * inflow)
+        before = stores[0]
+        after = updated[0]
+        for j in range(1, n_stores):
+            before = before + stores[j]
+            after = after + updated[j]
+        np.subtract(before + inflow, after, out=outflows[i])
+        stores = updated
+    final_state = np.empty((n_rows, n_stores))
+    for j in range(n_stores):
+        final_state[:, j] = stores[j]
+    return np.ascontiguousarray(outflows.T), final_state
+
+
+def cascade_step(
+    rows: Sequence[Sequence[float]], gains: Sequence[float], stores: Sequence[float], inflow: float
+) -> tuple[float, list[float]]:
+    # rows[j] holds the share of stores 0..j that ends up in store j, nearest store last. Sums run left to right
+    # exactly like the compiled loop (builtin sum() compensates rounding and would not match it).
+    updated = []
+    for row, gain in zip(rows, gains, strict=True):
+        acc = row[0] * stores[0]
+        for m in range(1, len(row)):
+            acc = acc + row[m] * stores[m]
+        updated.append(acc + gain * inflow)
+    before = stores[0]
+    after = updated[0]
+    for j in range(1, len(stores)):
+        before = before + stores[j]
+        after = after + updated[j]
+    return before + inflow - after, updated
+
+
+def _cascade_series(
+    inflows: NDArray[np.float64], terms: list[float], gains: list[float], stores: list[float]
+) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+    # Plain floats: for a single series, per-element NumPy operations cost far more than the arithmetic.
+    rows = [terms[j::-1] for j in range(len(terms))]
+    outflows: list[float] = []
+    for inflow in inflows.tolist():
+        outflow, stores = cascade_step(rows, gains, stores, inflow)
+        outflows.append(outflow)
+    return np.array(outflows, dtype=np.float64)[None, :], np.array(stores, dtype=np.float64)[None, :]
+
+
+def _muskingum_rows_loop(inflows, c0, c1, c2, prev_inflow, prev_outflow):
+    n_rows, n_steps = inflows.shape
+    outflows = np.empty((n_rows, n_steps))
+    last_inflow = np.empty(n_rows)
+    last_outflow = np.empty(n_rows)
+    for r in range(n_rows):
+        a = c0[r]
+        b = c1[r]
+        c = c2[r]
+        i_prev = prev_inflow[r]
+        q_prev = prev_outflow[r]
+        for i in range(n_steps):
+            inflow = inflows[r, i]
+            q = a * inflow + b * i_prev + c * q_prev
+            # Same semantics as max(q, 0.0): only strictly negative values are clamped.
+            if q < 0.0:
+                q = 0.0
+            outflows[r, i] = q
+            i_prev = inflow
+            q_prev = q
+        last_inflow[r] = i_prev
+        last_outflow[r] = q_prev
+    return outflows, last_inflow, last_outflow
+
+
+def _reservoir_rows_loop(inflows, decay, gain, storage):
+    n_rows, n_steps = inflows.shape
+    outflows = np.empty((n_rows, n_steps))
+    final_storage = np.empty(n_rows)
+    for r in range(n_rows):
+        c = decay[r]
+        g = gain[r]
+        s = storage[r]
+        for i in range(n_steps):
+            inflow = inflows[r, i]
+            new_s = s * c + inflow * g
+            outflows[r, i] = s + inflow - new_s
+            s = new_s
+        final_storage[r] = s
+    return outflows, final_storage
+
+
+def _muskingum_loss_loop(inflows, c0, c1, c2, prev_inflow, prev_outflow, fraction):
+    n_steps = inflows.shape[0]
+    net = np.empty(n_steps)
+    losses = np.empty(n_steps)
+    for i in range(n_steps):
+        inflow = inflows[i]
+        q = c0 * inflow + c1 * prev_inflow + c2 * prev_outflow
+        if q < 0.0:
+            q = 0.0
+        loss = q * fraction
+        net[i] = q - loss
+        losses[i] = loss
+        prev_inflow = inflow
+        prev_outflow = q
+    return net, losses, prev_inflow, prev_outflow
+
+
+def _muskingum_sensitivity_loop(inflows, c0, c1, c2, derivatives, prev_inflow, prev_outflow):
+    n_steps = inflows.shape[0]
+    n_params = derivatives.shape[1]
+    outflows = np.empty(n_steps)
+    sensitivities = np.empty((n_params, n_steps))
+    sensitivity = np.zeros(n_params)
+    for i in range(n_steps):
+        inflow = inflows[i]
+        q = c0 * inflow + c1 * prev_inflow + c2 * prev_outflow
+        if q < 0.0:
+            q = 0.0
+            for p in range(n_params):
+                sensitivity[p] = 0.0
+        else:
+            for p in range(n_params):
+                sensitivity[p] = (
+                    derivatives[0, p] * inflow
+                    + derivatives[1, p] * prev_inflow
+                    + derivatives[2, p] * prev_outflow
+                    + c2 * sensitivity[p]
+                )
+        outflows[i] = q
+        for p in range(n_params):
+            sensitivities[p, i] = sensitivity[p]
+        prev_inflow = inflow
+        prev_outflow = q
+    return outflows, sensitivities
+
+
+def _reservoir_loss_loop(inflows, decay, gain, storage, fraction):
+    n_steps = inflows.shape[0]
+    net = np.empty(n_steps)
+    losses = np.empty(n_steps)
+    for i in range(n_steps):
+        inflow = inflows[i]
+        new_storage = storage * decay + inflow * gain
+        q = storage + inflow - new_storage
+        storage = new_storage
+        loss = q * fraction
+        net[i] = q - loss
+        losses[i] = loss
+    return net, losses, storage
+
+
+def _cascade_rows_loop(inflows, terms, gains, state):
+    n_rows, n_steps = inflows.shape
+    n_stores = terms.shape[1]
+    outflows = np.empty((n_rows, n_steps))
+    final_state = np.empty((n_rows, n_stores))
+    stores = np.empty(n_stores)
+    updated = np.empty(n_stores)
+    for r in range(n_rows):
+        for j in range(n_stores):
+            stores[j] = state[r, j]
+        for i in range(n_steps):
+            inflow = inflows[r, i]
+            for j in range(n_stores):
+                acc = terms[r, j] * stores[0]
+                for m in range(1, j + 1):
+                    acc = acc + terms[r, j - m] * stores[m]
+                updated[j] = acc + gains[r, j] * inflow
+            before = stores[0]
+            after = updated[0]
+            for j in range(1, n_stores):
+                before = before + stores[j]
+                after = after + updated[j]
+            outflows[r, i] = before + inflow - after
+            for j in range(n_stores):
+                stores[j] = updated[j]
+        for j in range(n_stores):
+            final_state[r, j] = stores[j]
+    return outflows, final_state
+
+
+@cache
+def _compiled() -> SimpleNamespace:
+    import numba
+
+    return SimpleNamespace(
+        muskingum_rows=numba.njit(cache=True, nogil=True)(_muskingum_rows_loop),
+        reservoir_rows=numba.njit(cache=True, nogil=True)(_reservoir_rows_loop),
+        cascade_rows=numba.njit(cache=True, nogil=True)(_cascade_rows_loop),
+        muskingum_loss_series=numba.njit(cache=True, nogil=True)(_muskingum_loss_loop),
+        reservoir_loss_series=numba.njit(cache=True, nogil=True)(_reservoir_loss_loop),
+        muskingum_sensitivity=numba.njit(cache=True, nogil=True)(_muskingum_sensitivity_loop),
+    )
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import importlib.util
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Literal
+
+Backend = Literal["numpy", "numba"]
+
+_BACKENDS: tuple[Backend, ...] = ("numpy", "numba")
+_active: Backend = "numba" if importlib.util.find_spec("numba") is not None else "numpy"
+
+
+def available_backends() -> tuple[Backend, ...]:
+    return tuple(name for name in _BACKENDS if name == "numpy" or importlib.util.find_spec(name) is not None)
+
+
+def get_backend() -> Backend:
+    return _active
+
+
+def set_backend(name: Backend) -> None:
+    global _active
+    if name not in _BACKENDS:
+        raise ValueError(f"backend must be one of {_BACKENDS}, got {name!r}")
+    if name not in available_backends():
+        raise ImportError(f"backend {name!r} requires the optional dependency {name!r}")
+    _active = name
+
+
+@contextmanager
+def use_backend(name: Backend) -> Iterator[None]:
+    previous = _active
+    set_backend(name)
+    try:
+        yield
+    finally:
+        set_backend(previous)
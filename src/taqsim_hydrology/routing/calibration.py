@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import dataclasses
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from numpy.typing import ArrayLike, NDArray
+
+
+@dataclass(frozen=True)
+class CalibrationResult:
+    model: Any
+    loss: float
+    gradient: dict[str, float]
+    evaluations: int
+    converged: bool
+    message: str
+
+
+def mse_gradient(
+    model: Any, inflows: ArrayLike, observed: ArrayLike, state: Any = None
+) -> tuple[float, NDArray[np.float64]]:
+    if not hasattr(model, "route_sensitivity"):
+        raise TypeError(f"routing model does not support parameter sensitivities: {model!r}")
+    outflows, sensitivities = model.route_sensitivity(inflows, state)
+    observed = np.asarray(observed, dtype=np.float64)
+    if observed.shape != outflows.shape:
+        raise ValueError(f"observed must have shape {outflows.shape}, got {observed.shape}")
+    # Missing observations (NaN) are left out of both the error and its gradient.
+    observed_steps = ~np.isnan(observed)
+    n_observed = int(observed_steps.sum())
+    if n_observed == 0:
+        raise ValueError("observed holds no values")
+    residuals = np.where(observed_steps, outflows - observed, 0.0)
+    return float(residuals @ residuals) / n_observed, 2.0 * (sensitivities @ residuals) / n_observed
+
+
+def calibrate(
+    model: Any,
+    inflows: ArrayLike,
+    observed: ArrayLike,
+    state: Any = None,
+    parameters: Sequence[str] | None = None,
+    bounds: Mapping[str, tuple[float, float]] | None = None,
+    max_evaluations: int = 200,
+) -> CalibrationResult:
+    from scipy.optimize import minimize
+
+    if not hasattr(model, "parameter_bounds"):
+        raise TypeError(f"routing model does not support calibration: {model!r}")
+    names = list(model.parameter_bounds)
+    parameters = names if parameters is None else list(parameters)
+    if unknown := sorted(set(parameters) - set(names)):
+        raise ValueError(f"{type(model).__name__} has no calibratable parameters {unknown}, expected some of {names}")
+    box = _bounds(model, parameters, bounds or {})
+    columns = [names.index(name) for name in parameters]
+    inflows = np.asarray(inflows, dtype=np.float64)
+    observed = np.asarray(observed, dtype=np.float64)
+
+    def objective(values: NDArray[np.float64]) -> tuple[float, NDArray[np.float64]]:
+        candidate = dataclasses.replace(model, **dict(zip(parameters, values.tolist(), strict=True)))
+        loss, gradient = mse_gradient(candidate, inflows, observed, state)
+        return loss, gradient[columns]
+
+    start = [min(max(getattr(model, name), low), high) for name, (low, high) in zip(parameters, box, strict=True)]
+    result = minimize(objective, start, jac=True, method="L-BFGS-B", bounds=box, options={"maxfun": max_evaluations})
+    fitted = dataclasses.replace(model, **dict(zip(parameters, result.x.tolist(), strict=True)))
+    return CalibrationResult(
+        model=fitted,
+        loss=float(result.fun),
+        gradient=dict(zip(parameters, np.atleast_1d(result.jac).tolist(), strict=True)),
+        evaluations=int(result.nfev),
+        converged=bool(result.success),
+        message=str(result.message),
+    )
+
+
+def _bounds(
+    model: Any, parameters: Sequence[str], overrides: Mapping[str, tuple[float, float]]
+) -> list[tuple[float, float]]:
+    box = []
+    for name in parameters:
+        valid_low, valid_high = model.parameter_bounds[name]
+        low, high = overrides.get(name, (valid_low, valid_high))
+        # Tighter bounds are allowed, looser ones would let the optimizer build models __post_init__ rejects.
+        if not valid_low <= low < high <= valid_high:
+            raise ValueError(f"bounds for {name} must lie within [{valid_low}, {valid_high}], got ({low}, {high})")
+        box.append((low, high))
+    return box
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from numpy.typing import ArrayLike, NDArray
+    from taqsim.node.reach import Reach
+
+    from taqsim_hydrology.routing.network import RoutingNetwork
+
+LAYOUT_SCHEMA = 1
+
+
+@dataclass(frozen=True)
+class StateCodec:
+    models: Mapping[str, Any] = field(compare=False)
+    _index: dict[str, tuple[int, int]] = field(init=False, repr=False, compare=False)
+    _size: int = field(init=False, repr=False, compare=False)
+    # Equality and hashing key on the ordered (reach id, model) pairs, since the order fixes the layout.
+    _items: tuple[tuple[str, Any], ...] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        models = dict(self.models)
+        index: dict[str, tuple[int, int]] = {}
+        offset = 0
+        for reach_id, model in models.items():
+            if not hasattr(model, "state_size"):
+                raise TypeError(f"routing model of reach {reach_id!r} does not support state packing: {model!r}")
+            index[reach_id] = (offset, model.state_size)
+            offset += model.state_size
+        object.__setattr__(self, "models", MappingProxyType(models))
+        object.__setattr__(self, "_index", index)
+        object.__setattr__(self, "_size", offset)
+        object.__setattr__(self, "_items", tuple(models.items()))
+
+    def __reduce__(self) -> tuple[type[StateCodec], tuple[dict[str, Any]]]:
+        # Mapping proxies cannot be pickled, so the codec is rebuilt from a plain dict.
+        return StateCodec, (dict(self.models),)
+
+    @classmethod
+    def from_reaches(cls, reaches: Iterable[Reach]) -> StateCodec:
+        return cls({reach.id: reach.routing_model for reach in reaches})
+
+    @classmethod
+    def from_network(cls, network: RoutingNetwork) -> StateCodec:
+        return cls({reach.id: reach.model for reach in network.reaches})
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def index(self) -> dict[str, tuple[int, int]]:
+        return dict(self._index)
+
+    def layout(self) -> dict[str, Any]:
+        return {
+            "schema": LAYOUT_SCHEMA,
+            "size": self._size,
+            "reaches": [
+                {"id": reach_id, "type": type(self.models[reach_id]).__name__, "offset": offset, "size": size}
+                for reach_id, (offset, size) in self._index.items()
+            ],
+        }
+
+    def pack(self, states: Mapping[str, Any], out: NDArray[np.float64] | None = None) -> NDArray[np.float64]:
+        if missing := self._index.keys() - states.keys():
+            raise ValueError(f"no state given for reaches {sorted(missing)}")
+        if unknown := states.keys() - self._index.keys():
+            raise ValueError(f"states given for unknown reaches {sorted(unknown)}")
+        if out is not None and out.shape != (self._size,):
+            raise ValueError(f"out must have shape ({self._size},), got {out.shape}")
+        # Gathering plain floats into one list and converting once is several times faster than per-reach slice writes.
+        values: list[float] = []
+        for reach_id, (offset, size) in self._index.items():
+            values.extend(self.models[reach_id].pack_state(states[reach_id]))
+            if len(values) != offset + size:
+                raise ValueError(f"state of reach {reach_id!r} has {len(values) - offset} values, expected {size}")
+        if out is None:
+            return np.array(values, dtype=np.float64)
+        out[:] = values
+        return out
+
+    def unpack(self, buffer: ArrayLike) -> dict[str, Any]:
+        buffer = np.asarray(buffer, dtype=np.float64)
+        if buffer.shape != (self._size,):
+            raise ValueError(f"buffer must have shape ({self._size},), got {buffer.shape}")
+        values = buffer.tolist()
+        # List slices are fresh objects, so runs warm-started from one buffer never share mutable state.
+        return {
+            reach_id: self.models[reach_id].unpack_state(values[offset : offset + size])
+            for reach_id, (offset, size) in self._index.items()
+        }
+
+    def save(self, path: str | os.PathLike[str], states: Mapping[str, Any]) -> Path:
+        path = Path(path)
+        buffer = self.pack(states)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # The layout is removed first and written last, so a buffer with a layout file next to it is always complete.
+        _layout_path(path).unlink(missing_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, buffer)
+        os.replace(tmp, path)
+        _layout_path(path).write_text(json.dumps(self.layout(), indent=1) + "\n")
+        return path
+
+    def load(self, path: str | os.PathLike[str], memory_map: bool = True) -> dict[str, Any]:
+        return self.unpack(self.load_buffer(path, memory_map=memory_map))
+
+    def load_buffer(self, path: str | os.PathLike[str], memory_map: bool = True) -> NDArray[np.float64]:
+        path = Path(path)
+        layout = json.loads(_layout_path(path).read_text())
+        self._check_layout(layout, path)
+        buffer = np.load(path, mmap_mode="r" if memory_map else None)
+        if buffer.dtype != np.float64 or buffer.shape != (self._size,):
+            raise ValueError(f"checkpoint {path} holds a {buffer.dtype} buffer of shape {buffer.shape}")
+        return buffer
+
+    def _check_layout(self, layout: Mapping[str, Any], path: Path) -> None:
+        if layout.get("schema") != LAYOUT_SCHEMA:
+            raise ValueError(f"checkpoint {path} has layout schema {layout.get('schema')}, expected {LAYOUT_SCHEMA}")
+        # Model parameters may differ (that is the point of warm-starting many evaluations), the layout may not.
+        expected = {(r["id"], r["type"], r["offset"], r["size"]) for r in self.layout()["reaches"]}
+        found = {(r["id"], r["type"], r["offset"], r["size"]) for r in layout["reaches"]}
+        if expected != found:
+            mismatched = sorted({entry[0] for entry in expected ^ found})
+            raise ValueError(f"checkpoint {path} does not match this network's state layout at reaches {mismatched}")
+
+
+def _layout_path(path: Path) -> Path:
+    return path.with_name(path.name + ".layout.json")
@@ -1,33 +1,202 @@
 from __future__ import annotations
 
+import math
+from array import array
 from collections import deque
+from collections.abc import Iterable, Iterator, Sequence
 from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from taqsim_hydrology.routing import _kernels
 
 if TYPE_CHECKING:
+    from numpy.typing import ArrayLike, NDArray
     from taqsim.node.reach import Reach
     from taqsim.time import Timestep
 
+    from taqsim_hydrology.losses.constant_fraction import ConstantFraction
+
+
+@dataclass(slots=True)
+class LagBuffer:
+    values: array[float]
+    head: int = 0
+    total: float = 0.0
+
+    @classmethod
+    def zeros(cls, lag: int) -> LagBuffer:
+        return cls(values=array("d", bytes(8 * lag)))
+
+    @classmethod
+    def from_values(cls, values: Iterable[float]) -> LagBuffer:
+        buffer = cls(values=array("d", values))
+        buffer._resync()
+        return buffer
+
+    def push(self, inflow: float) -> float:
+        values = self.values
+        head = self.head
+        outflow = values[head]
+        values[head] = inflow
+        head += 1
+        if head == len(values):
+            head = 0
+            # Re-anchor the running total once per revolution so rounding error never outlives the buffer.
+            self._resync()
+        else:
+            self.total += inflow - outflow
+        self.head = head
+        return outflow
+
+    def load(self, values: NDArray[np.float64]) -> None:
+        np.frombuffer(self.values, dtype=np.float64)[:] = values
+        self.head = 0
+        self._resync()
+
+    def _resync(self) -> None:
+        # fsum is correctly rounded, so no residual is left to carry alongside the total.
+        self.total = math.fsum(self.values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __iter__(self) -> Iterator[float]:
+        yield from self.values[self.head :]
+        yield from self.values[: self.head]
+
 
 @dataclass(frozen=True)
 class Lag:
     lag: int
+    ring_buffer: bool = False
+    initial_flow: float = 0.0
 
     def __post_init__(self) -> None:
         if self.lag < 0:
             raise ValueError(f"lag must be non-negative, got {self.lag}")
+        if not 0 <= self.initial_flow < math.inf:
+            raise ValueError(f"initial_flow must be finite and non-negative, got {self.initial_flow}")
 
-    def initial_state(self, reach: Reach) -> deque[float]:
-        if self.lag == 0:
-            return deque(maxlen=0)
-        return deque([0.0] * self.lag, maxlen=self.lag)
+    @classmethod
+    def sweep(cls, lag: ArrayLike, inflows: ArrayLike) -> NDArray[np.float64]:
+        lag = np.asarray(lag)
+        if not np.issubdtype(lag.dtype, np.integer):
+            raise TypeError(f"lag must be an integer array, got dtype {lag.dtype}")
+        if (invalid := lag[lag < 0]).size:
+            raise ValueError(f"lag must be non-negative, got {invalid[0]}")
+        inflows = np.asarray(inflows, dtype=np.float64)
+        source = np.arange(inflows.size) - lag[..., None]
+        return np.where(source >= 0, inflows[np.maximum(source, 0)], 0.0)
+
+    @classmethod
+    def route_group(cls, models: Sequence[Lag], inflows: ArrayLike) -> NDArray[np.float64]:
+        return cls.route_table(cls.group_table(models), inflows)
 
-    def route(self, reach: Reach, inflow: float, state: deque[float], t: Timestep) -> tuple[float, deque[float]]:
+    @classmethod
+    def group_table(cls, models: Sequence[Lag]) -> tuple[NDArray[Any], ...]:
+        return _kernels.read_only(
+            np.array([model.lag for model in models], dtype=np.intp)[:, None],
+            np.array([model.initial_flow for model in models])[:, None],
+        )
+
+    @classmethod
+    def route_table(cls, table: tuple[NDArray[Any], ...], inflows: ArrayLike) -> NDArray[np.float64]:
+        lags, before_start = table
+        inflows = np.asarray(inflows, dtype=np.float64)
+        source = np.arange(inflows.shape[-1]) - lags
+        return np.where(source >= 0, np.take_along_axis(inflows, np.maximum(source, 0), axis=-1), before_start)
+
+    def initial_state(self, reach: Reach) -> deque[float] | LagBuffer:
+        return self.steady_state(self.initial_flow)
+
+    def steady_state(self, flow: float) -> deque[float] | LagBuffer:
+        if self.ring_buffer:
+            if flow == 0.0:
+                return LagBuffer.zeros(self.lag)
+            # lag equal values sum to the single rounding of flow * lag, so no fsum pass is needed.
+            return LagBuffer(values=array("d", [flow]) * self.lag, total=flow * self.lag)
+        return deque([flow] * self.lag, maxlen=self.lag)
+
+    def route(
+        self, reach: Reach, inflow: float, state: deque[float] | LagBuffer, t: Timestep
+    ) -> tuple[float, deque[float] | LagBuffer]:
         if self.lag == 0:
             return inflow, state
+        if type(state) is LagBuffer:
+            return state.push(inflow), state
         outflow = state[0]
         state.append(inflow)
         return outflow, state
 
-    def storage(self, state: deque[float]) -> float:
+    def route_series(
+        self, inflows: ArrayLike, state: deque[float] | LagBuffer
+    ) -> tuple[NDArray[np.float64], deque[float] | LagBuffer]:
+        inflows = np.asarray(inflows, dtype=np.float64)
+        if self.lag == 0:
+            return inflows.copy(), state
+        buffered = np.concatenate((np.fromiter(state, dtype=np.float64, count=len(state)), inflows))
+        if type(state) is LagBuffer:
+            state.load(buffered[-self.lag :])
+        else:
+            state.extend(buffered[-self.lag :].tolist())
+        return buffered[: inflows.size].copy(), state
+
+    def route_convolved(
+        self, inflows: ArrayLike, state: deque[float] | LagBuffer, tol: float = 1e-12
+    ) -> tuple[NDArray[np.float64], deque[float] | LagBuffer]:
+        if not 0 < tol < 1:
+            raise ValueError(f"tol must be in (0, 1), got {tol}")
+        # Convolving with a single unit tap is the shift route_series already performs exactly.
+        return self.route_series(inflows, state)
+
+    def impulse_response(self, tol: float = 1e-12, max_length: int | None = None) -> NDArray[np.float64]:
+        if not 0 < tol < 1:
+            raise ValueError(f"tol must be in (0, 1), got {tol}")
+        if max_length is not None and max_length < 1:
+            raise ValueError(f"max_length must be at least 1, got {max_length}")
+        kernel = np.zeros(self.lag + 1)
+        kernel[self.lag] = 1.0
+        return kernel[:max_length]
+
+    def route_with_loss(
+        self, inflows: ArrayLike, state: deque[float] | LagBuffer, loss: ConstantFraction
+    ) -> tuple[NDArray[np.float64], NDArray[np.float64], deque[float] | LagBuffer]:
+        # A lag has no recursion, so the loss is applied to the shifted series in place.
+        net, state = self.route_series(inflows, state)
+        losses = net * loss.fraction
+        net -= losses
+        return net, losses, state
+
+    def initial_ensemble_state(self, n_members: int) -> NDArray[np.float64]:
+        return np.full((n_members, self.lag), self.initial_flow)
+
+    def route_ensemble(
+        self, inflows: ArrayLike, state: NDArray[np.float64]
+    ) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        inflows = np.asarray(inflows, dtype=np.float64)
+        n_members, n_steps = inflows.shape
+        state = np.broadcast_to(np.asarray(state, dtype=np.float64), (n_members, self.lag))
+        buffered = np.concatenate((state, inflows), axis=1)
+        return buffered[:, :n_steps].copy(), buffered[:, n_steps:].copy()
+
+    @property
+    def state_size(self) -> int:
+        return self.lag
+
+    def pack_state(self, state: deque[float] | LagBuffer) -> Iterable[float]:
+        # Both containers iterate oldest value first.
+        return state
+
+    def unpack_state(self, values: Sequence[float]) -> deque[float] | LagBuffer:
+        if self.ring_buffer:
+            return LagBuffer.from_values(values)
+        return deque(values, maxlen=self.lag)
+
+    def storage(self, state: deque[float] | LagBuffer | NDArray[np.float64]) -> float | NDArray[np.float64]:
+        if type(state) is LagBuffer:
+            return state.total
+        if isinstance(state, np.ndarray):
+            return state.sum(axis=-1)
         return sum(state)
@@ -1,30 +1,191 @@
 from __future__ import annotations
 
 import math
-from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, ClassVar
+
+import numpy as np
+
+from taqsim_hydrology.routing import _kernels
 
 if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from numpy.typing import ArrayLike, NDArray
     from taqsim.node.reach import Reach
     from taqsim.time import Timestep
 
+    from taqsim_hydrology.losses.constant_fraction import ConstantFraction
+
 
 @dataclass(frozen=True)
 class LinearReservoir:
     k: float
+    initial_flow: float = 0.0
+    # Box constraint for calibration; k must stay positive, so its lower bound is a small step count rather than zero.
+    parameter_bounds: ClassVar[dict[str, tuple[float, float]]] = {"k": (1e-6, math.inf)}
+    _decay: float = field(init=False, repr=False, compare=False)
+    _gain: float = field(init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
         if self.k <= 0:
             raise ValueError(f"k must be positive, got {self.k}")
+        if not 0 <= self.initial_flow < math.inf:
+            raise ValueError(f"initial_flow must be finite and non-negative, got {self.initial_flow}")
+        decay = math.exp(-1.0 / self.k)
+        object.__setattr__(self, "_decay", decay)
+        object.__setattr__(self, "_gain", self.k * (1 - decay))
+
+    @classmethod
+    def sweep(cls, k: ArrayLike, inflows: ArrayLike) -> NDArray[np.float64]:
+        k = np.asarray(k, dtype=np.float64)
+        if (invalid := k[~(k > 0)]).size:
+            raise ValueError(f"k must be positive, got {invalid[0]}")
+        inflows = np.asarray(inflows, dtype=np.float64)
+        # math.exp per parameter keeps the coefficients bit-identical to those of a scalar instance.
+        decay = np.array([math.exp(-1.0 / value) for value in k.ravel().tolist()])
+        gain = k.ravel() * (1 - decay)
+        # lfilter cannot take a different pole per row, so every parameter set is stepped through time instead.
+        outflows, _ = _kernels.reservoir_rows(inflows, decay, gain, np.zeros(k.size))
+        return outflows.reshape(*k.shape, inflows.size)
+
+    @classmethod
+    def route_group(cls, models: Sequence[LinearReservoir], inflows: ArrayLike) -> NDArray[np.float64]:
+        return cls.route_table(cls.group_table(models), inflows)
+
+    @classmethod
+    def group_table(cls, models: Sequence[LinearReservoir]) -> tuple[NDArray[np.float64], ...]:
+        return _kernels.read_only(
+            np.array([model._decay for model in models]),
+            np.array([model._gain for model in models]),
+            np.array([model.steady_state(model.initial_flow) for model in models]),
+        )
+
+    @classmethod
+    def route_table(cls, table: tuple[NDArray[np.float64], ...], inflows: ArrayLike) -> NDArray[np.float64]:
+        decay, gain, storage = table
+        outflows, _ = _kernels.reservoir_rows(np.asarray(inflows, dtype=np.float64), decay, gain, storage)
+        return outflows
 
     def initial_state(self, reach: Reach) -> float:
-        return 0.0
+        return self.steady_state(self.initial_flow)
+
+    def steady_state(self, flow: float) -> float:
+        # S = c * S + k(1-c) * Q has the fixed point S = k * Q, where outflow equals inflow.
+        return self.k * flow
 
     def route(self, reach: Reach, inflow: float, state: float, t: Timestep) -> tuple[float, float]:
-        c = math.exp(-1.0 / self.k)
-        new_storage = state * c + inflow * self.k * (1 - c)
+        new_storage = state * self._decay + inflow * self._gain
         outflow = state + inflow - new_storage
         return outflow, new_storage
 
+    def route_series(self, inflows: ArrayLike, state: float) -> tuple[NDArray[np.float64], float]:
+        from scipy.signal import lfilter
+
+        inflows = np.asarray(inflows, dtype=np.float64)
+        if inflows.size == 0:
+            return np.empty(0, dtype=np.float64), state
+        # S[n] = c * S[n-1] + k(1-c) * I[n] is a first-order IIR filter seeded with the carried storage.
+        storages, _ = lfilter([self._gain], [1.0, -self._decay], inflows, zi=[self._decay * state])
+        previous = np.concatenate(([state], storages[:-1]))
+        outflows = previous + inflows - storages
+        return outflows, float(storages[-1])
+
+    def route_sensitivity(
+        self, inflows: ArrayLike, state: float | None = None
+    ) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        from scipy.signal import lfilter
+
+        # The steady start holds k * initial_flow, which moves with k; an explicit state is held fixed.
+        d_state = 0.0
+        if state is None:
+            state, d_state = self.steady_state(self.initial_flow), self.initial_flow
+        inflows = np.asarray(inflows, dtype=np.float64)
+        if inflows.size == 0:
+            return np.empty(0, dtype=np.float64), np.empty((1, 0), dtype=np.float64)
+        decay, gain = self._decay, self._gain
+        storages, _ = lfilter([gain], [1.0, -decay], inflows, zi=[decay * state])
+        previous = np.concatenate(([state], storages[:-1]))
+        # dS[n] = c * dS[n-1] + dc * S[n-1] + dg * I[n], the same filter driven by the storage and inflow series.
+        d_decay = decay / (self.k * self.k)
+        d_gain = 1 - decay - decay / self.k
+        d_storages, _ = lfilter([1.0], [1.0, -decay], d_decay * previous + d_gain * inflows, zi=[decay * d_state])
+        d_previous = np.concatenate(([d_state], d_storages[:-1]))
+        return previous + inflows - storages, (d_previous - d_storages)[None, :]
+
+    def route_convolved(
+        self, inflows: ArrayLike, state: float, tol: float = 1e-12
+    ) -> tuple[NDArray[np.float64], float]:
+        inflows = np.asarray(inflows, dtype=np.float64)
+        n_steps = inflows.size
+        if n_steps == 0:
+            return np.empty(0, dtype=np.float64), state
+        # Taps past the end of the series are never applied, so they are not computed.
+        kernel = self.impulse_response(tol, max_length=n_steps)
+        outflows = _kernels.convolve(inflows, kernel)
+        # The carried storage drains as S * c^j, releasing S * c^j * (1 - c) in step j.
+        drained = _kernels.decay(self._decay, n_steps)
+        outflows[: drained.size] += state * (1 - self._decay) * drained
+        window = min(n_steps, kernel.size)
+        retained = self._gain * self._decay ** np.arange(window)
+        final_storage = float(inflows[::-1][:window] @ retained) + state * self._decay**n_steps
+        return outflows, final_storage
+
+    def impulse_response(self, tol: float = 1e-12, max_length: int | None = None) -> NDArray[np.float64]:
+        if not 0 < tol < 1:
+            raise ValueError(f"tol must be in (0, 1), got {tol}")
+        if max_length is not None and max_length < 1:
+            raise ValueError(f"max_length must be at least 1, got {max_length}")
+        # A unit inflow leaves k(1-c) in storage, which then drains geometrically. The kernel is cut once the water
+        # left, summed over all later steps, is below tol, which also bounds what truncation drops from the final
+        # storage.
+        decay, gain = self._decay, self._gain
+        length = 1
+        if decay > 0 and gain > tol * (1 - decay):
+            length = 1 + math.ceil(math.log(tol * (1 - decay) / gain) / math.log(decay))
+        if max_length is not None:
+            length = min(length, max_length)
+        kernel = np.empty(length)
+        kernel[0] = 1 - gain
+        kernel[1:] = gain * (1 - decay) * decay ** np.arange(length - 1)
+        return kernel
+
+    def route_with_loss(
+        self, inflows: ArrayLike, state: float, loss: ConstantFraction
+    ) -> tuple[NDArray[np.float64], NDArray[np.float64], float]:
+        # Stepped like route() rather than filtered, so the series matches a step-by-step Reach bit for bit.
+        net, losses, storage = _kernels.reservoir_loss_series(
+            np.asarray(inflows, dtype=np.float64), self._decay, self._gain, state, loss.fraction
+        )
+        return net, losses, float(storage)
+
+    def initial_ensemble_state(self, n_members: int) -> NDArray[np.float64]:
+        return np.full(n_members, self.steady_state(self.initial_flow))
+
+    def route_ensemble(
+        self, inflows: ArrayLike, state: NDArray[np.float64]
+    ) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        from scipy.signal import lfilter
+
+        inflows = np.asarray(inflows, dtype=np.float64)
+        n_members, n_steps = inflows.shape
+        state = np.broadcast_to(np.asarray(state, dtype=np.float64), (n_members,)).copy()
+        if n_steps == 0:
+            return np.empty((n_members, 0), dtype=np.float64), state
+        storages, _ = lfilter([self._gain], [1.0, -self._decay], inflows, axis=-1, zi=(self._decay * state)[:, None])
+        previous = np.concatenate((state[:, None], storages[:, :-1]), axis=1)
+        outflows = previous + inflows - storages
+        return outflows, storages[:, -1].copy()
+
+    @property
+    def state_size(self) -> int:
+        return 1
+
+    def pack_state(self, state: float) -> Sequence[float]:
+        return (state,)
+
+    def unpack_state(self, values: Sequence[float]) -> float:
+        return values[0]
+
     def storage(self, state: float) -> float:
         return state
@@ -1,11 +1,21 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import TYPE_CHECKING, NamedTuple
+import math
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, ClassVar, NamedTuple
+
+import numpy as np
+
+from taqsim_hydrology.routing import _kernels
 
 if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from numpy.typing import ArrayLike, NDArray
     from taqsim.node.reach import Reach
-    from taqsim.time import Timestep
+    from taqsim.time import Frequency, Timestep
+
+    from taqsim_hydrology.losses.constant_fraction import ConstantFraction
 
 
 class MuskingumState(NamedTuple):
@@ -13,28 +23,251 @@ class MuskingumState(NamedTuple):
     prev_outflow: float
 
 
+class MuskingumEnsembleState(NamedTuple):
+    prev_inflow: NDArray[np.float64]
+    prev_outflow: NDArray[np.float64]
+
+
+_DAYS_PER_STEP = {"DAILY": 1.0, "WEEKLY": 7.0, "MONTHLY": 365.25 / 12, "YEARLY": 365.25}
+
+
 @dataclass(frozen=True)
 class Muskingum:
     k: float
     x: float = 0.0
+    initial_flow: float = 0.0
+    substeps: int = 1
+    # Box constraints for calibration, inside the validity range checked by __post_init__. k must stay positive, so
+    # its lower bound is a small step count rather than zero.
+    parameter_bounds: ClassVar[dict[str, tuple[float, float]]] = {"k": (1e-6, math.inf), "x": (0.0, 0.5)}
+    _c0: float = field(init=False, repr=False, compare=False)
+    _c1: float = field(init=False, repr=False, compare=False)
+    _c2: float = field(init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
         if self.k <= 0:
             raise ValueError(f"k must be positive, got {self.k}")
         if not 0 <= self.x <= 0.5:
             raise ValueError(f"x must be in [0, 0.5], got {self.x}")
+        if not 0 <= self.initial_flow < math.inf:
+            raise ValueError(f"initial_flow must be finite and non-negative, got {self.initial_flow}")
+        if not isinstance(self.substeps, int | np.integer):
+            raise ValueError(f"substeps must be an integer, got {self.substeps!r}")
+        if self.substeps < 1:
+            raise ValueError(f"substeps must be at least 1, got {self.substeps}")
+        c0, c1, c2 = _substep_coefficients(self.k, self.x, self.substeps)
+        object.__setattr__(self, "_c0", c0)
+        object.__setattr__(self, "_c1", c1)
+        object.__setattr__(self, "_c2", c2)
+
+    @classmethod
+    def for_frequency(cls, k_days: float, frequency: Frequency, x: float = 0.0, initial_flow: float = 0.0) -> Muskingum:
+        if frequency.name not in _DAYS_PER_STEP:
+            raise ValueError(f"frequency must be one of {tuple(_DAYS_PER_STEP)}, got {frequency!r}")
+        k = k_days / _DAYS_PER_STEP[frequency.name]
+        # Raises ValueError, via stable_substeps, when no substep count keeps c0 and c2 non-negative.
+        return cls(k=k, x=x, initial_flow=initial_flow, substeps=cls.stable_substeps(k, x))
+
+    @staticmethod
+    def stable_substeps(k: float, x: float = 0.0) -> int:
+        # With n sub-steps k is n*k sub-step units, and c2 >= 0 needs 2*n*k*(1-x) >= 1. c0 >= 0 is an upper bound on n
+        # (2*n*k*x <= 1), so the smallest n meeting the first condition meets both whenever any n does. A single step
+        # with c0 < 0 is plain Muskingum on a slow reach and left to the clamp; needing more sub-steps than c0 allows
+        # means no n works.
+        if k <= 0:
+            raise ValueError(f"k must be positive, got {k}")
+        n = max(1, math.ceil(1 / (2 * k * (1 - x))))
+        if n > 1 and 2 * n * k * x > 1:
+            raise ValueError(
+                f"no substep count keeps c0 and c2 non-negative for k={k}, x={x}: c2 needs n >= {n}, "
+                f"c0 needs n <= {1 / (2 * k * x):.3g}"
+            )
+        return n
+
+    @classmethod
+    def sweep(cls, k: ArrayLike, x: ArrayLike, inflows: ArrayLike) -> NDArray[np.float64]:
+        k, x = np.broadcast_arrays(np.asarray(k, dtype=np.float64), np.asarray(x, dtype=np.float64))
+        if (invalid := k[~(k > 0)]).size:
+            raise ValueError(f"k must be positive, got {invalid[0]}")
+        if (invalid := x[~((x >= 0) & (x <= 0.5))]).size:
+            raise ValueError(f"x must be in [0, 0.5], got {invalid[0]}")
+        inflows = np.asarray(inflows, dtype=np.float64)
+        c0, c1, c2 = _coefficients(k.ravel(), x.ravel())
+        outflows, _, _ = _kernels.muskingum_rows(inflows, c0, c1, c2, np.zeros(k.size), np.zeros(k.size))
+        return outflows.reshape(*k.shape, inflows.size)
+
+    @classmethod
+    def route_group(cls, models: Sequence[Muskingum], inflows: ArrayLike) -> NDArray[np.float64]:
+        return cls.route_table(cls.group_table(models), inflows)
+
+    @classmethod
+    def group_table(cls, models: Sequence[Muskingum]) -> tuple[NDArray[np.float64], ...]:
+        return _kernels.read_only(
+            np.array([model._c0 for model in models]),
+            np.array([model._c1 for model in models]),
+            np.array([model._c2 for model in models]),
+            np.array([model.initial_flow for model in models]),
+        )
+
+    @classmethod
+    def route_table(cls, table: tuple[NDArray[np.float64], ...], inflows: ArrayLike) -> NDArray[np.float64]:
+        c0, c1, c2, flow = table
+        # The steady start carries initial_flow both in and out; the kernels only read their state arguments.
+        outflows, _, _ = _kernels.muskingum_rows(np.asarray(inflows, dtype=np.float64), c0, c1, c2, flow, flow)
+        return outflows
 
     def initial_state(self, reach: Reach) -> MuskingumState:
-        return MuskingumState(prev_inflow=0.0, prev_outflow=0.0)
+        return self.steady_state(self.initial_flow)
 
-    def route(self, reach: Reach, inflow: float, state: MuskingumState, t: Timestep) -> tuple[float, MuskingumState]:
-        denom = 2 * self.k * (1 - self.x) + 1
-        c0 = (1 - 2 * self.k * self.x) / denom
-        c1 = (1 + 2 * self.k * self.x) / denom
-        c2 = (2 * self.k * (1 - self.x) - 1) / denom
+    def steady_state(self, flow: float) -> MuskingumState:
+        # c0 + c1 + c2 == 1, so a reach that has seen flow Q for long enough carries Q in and Q out.
+        return MuskingumState(prev_inflow=flow, prev_outflow=flow)
 
-        outflow = max(c0 * inflow + c1 * state.prev_inflow + c2 * state.prev_outflow, 0.0)
+    def route(self, reach: Reach, inflow: float, state: MuskingumState, t: Timestep) -> tuple[float, MuskingumState]:
+        outflow = max(self._c0 * inflow + self._c1 * state.prev_inflow + self._c2 * state.prev_outflow, 0.0)
         return outflow, MuskingumState(prev_inflow=inflow, prev_outflow=outflow)
 
+    def _clamps(self, reach: Reach, inflow: float, state: MuskingumState, t: Timestep) -> bool:
+        # Probe used by taqsim_hydrology.profiling to count steps where route() clips a negative outflow to zero.
+        return self._c0 * inflow + self._c1 * state.prev_inflow + self._c2 * state.prev_outflow < 0.0
+
+    def route_series(self, inflows: ArrayLike, state: MuskingumState) -> tuple[NDArray[np.float64], MuskingumState]:
+        # The clamp makes the recursion non-linear, so it cannot be delegated to a linear filter.
+        outflows, prev_inflow, prev_outflow = _kernels.muskingum_series(
+            np.asarray(inflows, dtype=np.float64), self._c0, self._c1, self._c2, *state
+        )
+        return outflows, MuskingumState(prev_inflow=prev_inflow, prev_outflow=prev_outflow)
+
+    def route_sensitivity(
+        self, inflows: ArrayLike, state: MuskingumState | None = None
+    ) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        # The steady start carries initial_flow in and out whatever k and x are, so it adds no sensitivity.
+        if state is None:
+            state = self.steady_state(self.initial_flow)
+        return _kernels.muskingum_sensitivity(
+            np.asarray(inflows, dtype=np.float64),
+            self._c0,
+            self._c1,
+            self._c2,
+            _substep_derivatives(self.k, self.x, self.substeps),
+            *state,
+        )
+
+    def route_convolved(
+        self, inflows: ArrayLike, state: MuskingumState, tol: float = 1e-12
+    ) -> tuple[NDArray[np.float64], MuskingumState]:
+        inflows = np.asarray(inflows, dtype=np.float64)
+        n_steps = inflows.size
+        if n_steps == 0:
+            return np.empty(0, dtype=np.float64), state
+        outflows = _kernels.convolve(inflows, self.impulse_response(tol, max_length=n_steps))
+        # The previous step's inflow and outflow feed step 0 and then decay through c2.
+        carried = _kernels.decay(self._c2, n_steps)
+        outflows[: carried.size] += (self._c1 * state.prev_inflow + self._c2 * state.prev_outflow) * carried
+        # Without the clamp the recursion is linear. It only clips where the linear outflow goes negative, so a
+        # negative beyond rounding means the clamp would have changed the series: route it recursively instead.
+        scale = max(float(np.abs(inflows).max()), abs(state.prev_inflow), abs(state.prev_outflow))
+        if outflows.min() < -tol * scale:
+            return self.route_series(inflows, state)
+        np.maximum(outflows, 0.0, out=outflows)
+        return outflows, MuskingumState(prev_inflow=float(inflows[-1]), prev_outflow=float(outflows[-1]))
+
+    def impulse_response(self, tol: float = 1e-12, max_length: int | None = None) -> NDArray[np.float64]:
+        if not 0 < tol < 1:
+            raise ValueError(f"tol must be in (0, 1), got {tol}")
+        if max_length is not None and max_length < 1:
+            raise ValueError(f"max_length must be at least 1, got {max_length}")
+        # A unit inflow gives c0, then c1 + c2 * c0, then decays geometrically through c2. The kernel is cut once
+        # the magnitude of its remaining tail is below tol.
+        c0, c1, c2 = self._c0, self._c1, self._c2
+        second = c1 + c2 * c0
+        length = 2
+        ratio = abs(c2)
+        if ratio > 0 and abs(second) > tol * (1 - ratio):
+            length += math.ceil(math.log(tol * (1 - ratio) / abs(second)) / math.log(ratio))
+        if max_length is not None:
+            length = min(length, max_length)
+        kernel = np.empty(length)
+        kernel[0] = c0
+        kernel[1:] = second * c2 ** np.arange(length - 1)
+        return kernel
+
+    def route_with_loss(
+        self, inflows: ArrayLike, state: MuskingumState, loss: ConstantFraction
+    ) -> tuple[NDArray[np.float64], NDArray[np.float64], MuskingumState]:
+        # The carried state holds the pre-loss outflow, exactly as a Reach routes before applying its loss rule.
+        net, losses, prev_inflow, prev_outflow = _kernels.muskingum_loss_series(
+            np.asarray(inflows, dtype=np.float64), self._c0, self._c1, self._c2, *state, loss.fraction
+        )
+        return net, losses, MuskingumState(prev_inflow=float(prev_inflow), prev_outflow=float(prev_outflow))
+
+    def initial_ensemble_state(self, n_members: int) -> MuskingumEnsembleState:
+        return MuskingumEnsembleState(
+            prev_inflow=np.full(n_members, self.initial_flow), prev_outflow=np.full(n_members, self.initial_flow)
+        )
+
+    def route_ensemble(
+        self, inflows: ArrayLike, state: MuskingumEnsembleState
+    ) -> tuple[NDArray[np.float64], MuskingumEnsembleState]:
+        inflows = np.asarray(inflows, dtype=np.float64)
+        n_members = inflows.shape[0]
+        prev_inflow = np.broadcast_to(np.asarray(state.prev_inflow, dtype=np.float64), (n_members,)).copy()
+        prev_outflow = np.broadcast_to(np.asarray(state.prev_outflow, dtype=np.float64), (n_members,)).copy()
+        outflows, prev_inflow, prev_outflow = _kernels.muskingum_rows(
+            inflows, self._c0, self._c1, self._c2, prev_inflow, prev_outflow
+        )
+        return outflows, MuskingumEnsembleState(prev_inflow, prev_outflow)
+
+    @property
+    def state_size(self) -> int:
+        return 2
+
+    def pack_state(self, state: MuskingumState) -> Sequence[float]:
+        return state
+
+    def unpack_state(self, values: Sequence[float]) -> MuskingumState:
+        return MuskingumState(prev_inflow=values[0], prev_outflow=values[1])
+
     def storage(self, state: MuskingumState) -> float:
         return self.k * (self.x * state.prev_inflow + (1 - self.x) * state.prev_outflow)
+
+
+def _coefficients(
+    k: float | NDArray[np.float64], x: float | NDArray[np.float64]
+) -> tuple[float | NDArray[np.float64], float | NDArray[np.float64], float | NDArray[np.float64]]:
+    denom = 2 * k * (1 - x) + 1
+    return (1 - 2 * k * x) / denom, (1 + 2 * k * x) / denom, (2 * k * (1 - x) - 1) / denom
+
+
+def _coefficient_derivatives(k: float, x: float) -> NDArray[np.float64]:
+    # Rows c0, c1, c2; columns d/dk, d/dx. The rows sum to zero because c0 + c1 + c2 == 1.
+    denom = 2 * k * (1 - x) + 1
+    return np.array([[-2.0, -4 * k * k], [4 * x - 2, 4 * k * (k + 1)], [4 - 4 * x, -4 * k]]) / (denom * denom)
+
+
+def _substep_derivatives(k: float, x: float, substeps: int) -> NDArray[np.float64]:
+    if substeps == 1:
+        return _coefficient_derivatives(k, x)
+    # Differentiates _substep_coefficients: the top-right block of [[M, dM], [0, M]]**n is d(M**n).
+    c0, c1, c2 = _coefficients(k * substeps, x)
+    step = np.array([[c2, c0 + c1, c0], [0.0, 1.0, 1.0], [0.0, 0.0, 1.0]])
+    derivatives = _coefficient_derivatives(k * substeps, x) * np.array([substeps, 1.0])
+    columns = []
+    for d0, d1, d2 in derivatives.T.tolist():
+        block = np.zeros((6, 6))
+        block[:3, :3] = block[3:, 3:] = step
+        block[0, 3:] = [d2, d0 + d1, d0]
+        d_outflow, d_inflow, d_slope = np.linalg.matrix_power(block, substeps)[0, 3:].tolist()
+        columns.append([d_slope / substeps, d_inflow - d_slope / substeps, d_outflow])
+    return np.array(columns).T
+
+
+def _substep_coefficients(k: float, x: float, substeps: int) -> tuple[float, float, float]:
+    if substeps == 1:
+        return _coefficients(k, x)
+    # Inflow is interpolated linearly across the step, so n sub-steps compose into one linear map of
+    # (O_prev, I_prev, (I - I_prev) / n) with v[j+1] = M @ v[j]; M**n is formed by repeated squaring.
+    c0, c1, c2 = _coefficients(k * substeps, x)
+    step = np.array([[c2, c0 + c1, c0], [0.0, 1.0, 1.0], [0.0, 0.0, 1.0]])
+    p_outflow, p_inflow, p_slope = np.linalg.matrix_power(step, substeps)[0].tolist()
+    return p_slope / substeps, p_inflow - p_slope / substeps, p_outflow
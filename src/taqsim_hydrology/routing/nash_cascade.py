@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from taqsim_hydrology.routing import _kernels
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from numpy.typing import ArrayLike, NDArray
+    from taqsim.node.reach import Reach
+    from taqsim.time import Timestep
+
+    from taqsim_hydrology.losses.constant_fraction import ConstantFraction
+
+
+@dataclass(frozen=True)
+class NashCascade:
+    k: float
+    n: int
+    initial_flow: float = 0.0
+    _terms: tuple[float, ...] = field(init=False, repr=False, compare=False)
+    _gains: tuple[float, ...] = field(init=False, repr=False, compare=False)
+    _rows: tuple[tuple[float, ...], ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.k <= 0:
+            raise ValueError(f"k must be positive, got {self.k}")
+        if self.n < 1:
+            raise ValueError(f"n must be at least 1, got {self.n}")
+        if not 0 <= self.initial_flow < math.inf:
+            raise ValueError(f"initial_flow must be finite and non-negative, got {self.initial_flow}")
+        rate = 1.0 / self.k
+        # Over one step, store m passes a share e^(-1/k) (1/k)^d / d! of its water d stores down the cascade, and
+        # store j keeps k * P(j + 1, 1/k) of a unit inflow held constant over the step.
+        terms = tuple(math.exp(d * math.log(rate) - rate - math.lgamma(d + 1)) for d in range(self.n))
+        object.__setattr__(self, "_terms", terms)
+        object.__setattr__(self, "_rows", tuple(terms[j::-1] for j in range(self.n)))
+        object.__setattr__(self, "_gains", tuple(self.k * _lower_gamma(j + 1, rate) for j in range(self.n)))
+
+    @classmethod
+    def route_group(cls, models: Sequence[NashCascade], inflows: ArrayLike) -> NDArray[np.float64]:
+        return cls.route_table(cls.group_table(models), inflows)
+
+    @classmethod
+    def group_table(cls, models: Sequence[NashCascade]) -> tuple[tuple[NDArray[Any], ...], ...]:
+        # Cascades of different lengths have differently shaped states, so rows are batched per store count.
+        by_length: dict[int, list[int]] = {}
+        for row, model in enumerate(models):
+            by_length.setdefault(model.n, []).append(row)
+        return tuple(
+            _kernels.read_only(
+                np.array(rows, dtype=np.intp),
+                np.array([models[row]._terms for row in rows]),
+                np.array([models[row]._gains for row in rows]),
+                np.array([models[row].steady_state(models[row].initial_flow) for row in rows]),
+            )
+            for rows in by_length.values()
+        )
+
+    @classmethod
+    def route_table(cls, table: tuple[tuple[NDArray[Any], ...], ...], inflows: ArrayLike) -> NDArray[np.float64]:
+        inflows = np.asarray(inflows, dtype=np.float64)
+        outflows = np.empty_like(inflows)
+        for rows, terms, gains, state in table:
+            outflows[rows], _ = _kernels.cascade_rows(inflows[rows], terms, gains, state)
+        return outflows
+
+    def initial_state(self, reach: Reach) -> tuple[float, ...]:
+        return self.steady_state(self.initial_flow)
+
+    def steady_state(self, flow: float) -> tuple[float, ...]:
+        # Every store passes on what it receives, so each holds k * Q.
+        return (self.k * flow,) * self.n
+
+    def route(
+        self, reach: Reach, inflow: float, state: tuple[float, ...], t: Timestep
+    ) -> tuple[float, tuple[float, ...]]:
+        outflow, updated = _kernels.cascade_step(self._rows, self._gains, state, inflow)
+        return outflow, tuple(updated)
+
+    def route_series(
+        self, inflows: ArrayLike, state: Sequence[float] | NDArray[np.float64]
+    ) -> tuple[NDArray[np.float64], tuple[float, ...]]:
+        outflows, final_state = _kernels.cascade_rows(
+            np.asarray(inflows, dtype=np.float64),
+            np.array(self._terms),
+            np.array(self._gains),
+            np.asarray(state, dtype=np.float64).reshape(1, self.n),
+        )
+        return outflows[0], tuple(final_state[0].tolist())
+
+    def route_convolved(
+        self, inflows: ArrayLike, state: Sequence[float] | NDArray[np.float64], tol: float = 1e-12
+    ) -> tuple[NDArray[np.float64], tuple[float, ...]]:
+        from scipy.special import gammaincc, gammaln
+
+        inflows = np.asarray(inflows, dtype=np.float64)
+        state = np.asarray(state, dtype=np.float64)
+        n_steps = inflows.size
+        if n_steps == 0:
+            return np.empty(0, dtype=np.float64), tuple(state.tolist())
+        kernel = self.impulse_response(tol, max_length=n_steps)
+        window = kernel.size
+        outflows = _kernels.convolve(inflows, kernel)
+
+        # Water already in store m leaves the last store after n - m gamma-distributed reservoir passages.
+        elapsed = np.arange(window + 1)[:, None] / self.k
+        remaining = gammaincc(self.n - np.arange(self.n), elapsed)
+        outflows[:window] += (remaining[:-1] - remaining[1:]) @ state
+
+        # Final contents: the last `window` inflows, plus the initial water that is still on its way.
+        retained = gammaincc(np.arange(1, self.n + 1), elapsed)
+        final_state = inflows[::-1][:window] @ (self.k * (retained[:-1] - retained[1:]))
+        distance = np.subtract.outer(np.arange(self.n), np.arange(self.n))
+        horizon = n_steps / self.k
+        passed = np.exp(distance * math.log(horizon) - horizon - gammaln(np.maximum(distance, 0) + 1))
+        final_state += np.where(distance >= 0, passed, 0.0) @ state
+        return outflows, tuple(final_state.tolist())
+
+    def impulse_response(self, tol: float = 1e-12, max_length: int | None = None) -> NDArray[np.float64]:
+        if not 0 < tol < 1:
+            raise ValueError(f"tol must be in (0, 1), got {tol}")
+        if max_length is not None and max_length < 1:
+            raise ValueError(f"max_length must be at least 1, got {max_length}")
+        # A unit inflow over step 0 leaves during step j as H(j-1) - 2H(j) + H(j+1), with H(t) = E[(X - t)+] for
+        # the gamma-distributed travel time X. H also bounds the water still in the cascade, so the kernel is
+        # cut where it drops below tol.
+        length = self._truncation(tol)
+        if max_length is not None:
+            length = min(length, max_length)
+        excess = self._excess(np.arange(-1, length + 1, dtype=np.float64))
+        return excess[:-2] - 2.0 * excess[1:-1] + excess[2:]
+
+    def _excess(self, t: NDArray[np.float64]) -> NDArray[np.float64]:
+        from scipy.special import gammaincc
+
+        mean = self.n * self.k
+        scaled = np.maximum(t, 0.0) / self.k
+        after = mean * gammaincc(self.n + 1, scaled) - t * gammaincc(self.n, scaled)
+        return np.where(t < 0, mean - t, after)
+
+    def _truncation(self, tol: float) -> int:
+        from scipy.special import gammainccinv
+
+        t = math.ceil(self.k * float(gammainccinv(self.n, tol)))
+        step = max(1, math.ceil(self.k / 4))
+        while self._excess(np.array([float(t)]))[0] > tol:
+            t += step
+        return t + 1
+
+    def route_with_loss(
+        self, inflows: ArrayLike, state: Sequence[float] | NDArray[np.float64], loss: ConstantFraction
+    ) -> tuple[NDArray[np.float64], NDArray[np.float64], tuple[float, ...]]:
+        outflows, final_state = self.route_series(inflows, state)
+        losses = outflows * loss.fraction
+        return outflows - losses, losses, final_state
+
+    def initial_ensemble_state(self, n_members: int) -> NDArray[np.float64]:
+        return np.full((n_members, self.n), self.k * self.initial_flow)
+
+    def route_ensemble(
+        self, inflows: ArrayLike, state: NDArray[np.float64]
+    ) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        inflows = np.asarray(inflows, dtype=np.float64)
+        n_members = inflows.shape[0]
+        state = np.broadcast_to(np.asarray(state, dtype=np.float64), (n_members, self.n))
+        return _kernels.cascade_rows(inflows, np.array(self._terms), np.array(self._gains), state)
+
+    @property
+    def state_size(self) -> int:
+        return self.n
+
+    def pack_state(self, state: tuple[float, ...]) -> Sequence[float]:
+        return state
+
+    def unpack_state(self, values: Sequence[float]) -> tuple[float, ...]:
+        return tuple(map(float, values))
+
+    def storage(self, state: tuple[float, ...] | NDArray[np.float64]) -> float | NDArray[np.float64]:
+        if isinstance(state, np.ndarray):
+            return state.sum(axis=-1)
+        return math.fsum(state)
+
+
+def _lower_gamma(a: int, x: float) -> float:
+    # Regularized lower incomplete gamma P(a, x) for integer a, without cancellation at either end.
+    if x < a:
+        term = math.exp(a * math.log(x) - x - math.lgamma(a + 1))
+        total = term
+        p = a
+        while term > total * 1e-17:
+            p += 1
+            term *= x / p
+            total += term
+        return total
+    return 1.0 - math.fsum(math.exp(p * math.log(x) - x - math.lgamma(p + 1)) for p in range(a))
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections.abc import Callable, Iterable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from numpy.typing import ArrayLike, NDArray
+
+
+@dataclass(frozen=True)
+class NetworkReach:
+    id: str
+    model: Any
+    upstream: tuple[str, ...] = ()
+
+    def __post_init__(self) -> None:
+        if not hasattr(type(self.model), "route_group"):
+            raise TypeError(f"routing model of reach {self.id!r} does not support group routing: {self.model!r}")
+        object.__setattr__(self, "upstream", tuple(self.upstream))
+
+
+@dataclass(frozen=True)
+class NetworkWorkspace:
+    inflows: NDArray[np.float64]
+    outflows: NDArray[np.float64]
+
+    @property
+    def n_steps(self) -> int:
+        return self.inflows.shape[1]
+
+
+@dataclass(frozen=True)
+class _Group:
+    model_type: type
+    models: tuple[Any, ...]
+    # Built once from the models by group_table and only read afterwards, so threads share it.
+    table: Any
+    rows: NDArray[np.intp]
+    edge_targets: NDArray[np.intp]
+    edge_sources: NDArray[np.intp]
+
+    def route(self, inflows: NDArray[np.float64]) -> NDArray[np.float64]:
+        if self.table is None:
+            return self.model_type.route_group(self.models, inflows)
+        return self.model_type.route_table(self.table, inflows)
+
+
+@dataclass(frozen=True)
+class RoutingNetwork:
+    reaches: tuple[NetworkReach, ...]
+    _order: tuple[str, ...] = field(init=False, repr=False, compare=False)
+    _row_of: dict[str, int] = field(init=False, repr=False, compare=False)
+    _levels: tuple[tuple[_Group, ...], ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "reaches", tuple(self.reaches))
+        by_id: dict[str, NetworkReach] = {}
+        for reach in self.reaches:
+            if reach.id in by_id:
+                raise ValueError(f"duplicate reach id {reach.id!r}")
+            by_id[reach.id] = reach
+        for reach in self.reaches:
+            for upstream in reach.upstream:
+                if upstream not in by_id:
+                    raise ValueError(f"reach {reach.id!r} lists unknown upstream reach {upstream!r}")
+
+        depth = _topological_depths(by_id)
+        order = tuple(sorted(by_id, key=lambda reach_id: depth[reach_id]))
+        row_of = {reach_id: row for row, reach_id in enumerate(order)}
+
+        levels: list[tuple[_Group, ...]] = []
+        for level in range(max(depth.values(), default=-1) + 1):
+            by_type: dict[type, list[NetworkReach]] = {}
+            for reach_id in order:
+                if depth[reach_id] == level:
+                    by_type.setdefault(type(by_id[reach_id].model), []).append(by_id[reach_id])
+            groups = []
+            for model_type, members in by_type.items():
+                edges = [(target, row_of[upstream]) for target, m in enumerate(members) for upstream in m.upstream]
+                targets, sources = zip(*edges, strict=True) if edges else ((), ())
+                models = tuple(m.model for m in members)
+                # Model types without group tables are routed through route_group, which rebuilds them per call.
+                table = model_type.group_table(models) if hasattr(model_type, "group_table") else None
+                groups.append(
+                    _Group(
+                        model_type=model_type,
+                        models=models,
+                        table=table,
+                        rows=np.array([row_of[m.id] for m in members], dtype=np.intp),
+                        edge_targets=np.array(targets, dtype=np.intp),
+                        edge_sources=np.array(sources, dtype=np.intp),
+                    )
+                )
+            levels.append(tuple(groups))
+
+        object.__setattr__(self, "_order", order)
+        object.__setattr__(self, "_row_of", row_of)
+        object.__setattr__(self, "_levels", tuple(levels))
+
+    @property
+    def n_levels(self) -> int:
+        return len(self._levels)
+
+    @property
+    def n_groups(self) -> int:
+        return sum(len(groups) for groups in self._levels)
+
+    def workspace(self, n_steps: int) -> NetworkWorkspace:
+        shape = (len(self._order), n_steps)
+        return NetworkWorkspace(inflows=np.empty(shape), outflows=np.empty(shape))
+
+    def route(
+        self, lateral_inflows: Mapping[str, ArrayLike], workspace: NetworkWorkspace | None = None
+    ) -> dict[str, NDArray[np.float64]]:
+        lateral, n_steps = self._lateral(lateral_inflows)
+        if workspace is None:
+            workspace = self.workspace(n_steps)
+        elif workspace.inflows.shape != (len(self._order), n_steps):
+            raise ValueError(
+                f"workspace has shape {workspace.inflows.shape}, expected {(len(self._order), n_steps)} "
+                f"(reaches, steps)"
+            )
+        return self._route(lateral, workspace)
+
+    def evaluate[T](
+        self,
+        scenarios: Iterable[Mapping[str, ArrayLike]],
+        objective: Callable[[dict[str, NDArray[np.float64]]], T],
+        max_workers: int | None = None,
+    ) -> list[T]:
+        if max_workers is not None and max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1, got {max_workers}")
+        scenarios = list(scenarios)
+        local = threading.local()
+
+        def run(lateral_inflows: Mapping[str, ArrayLike]) -> T:
+            lateral, n_steps = self._lateral(lateral_inflows)
+            # One workspace per worker thread, reused by every scenario of the same length it evaluates.
+            workspace = getattr(local, "workspace", None)
+            if workspace is None or workspace.n_steps != n_steps:
+                workspace = local.workspace = self.workspace(n_steps)
+            return objective(self._route(lateral, workspace))
+
+        workers = min(max_workers or os.process_cpu_count() or 1, len(scenarios))
+        if workers <= 1:
+            return [run(lateral_inflows) for lateral_inflows in scenarios]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(run, scenarios))
+
+    def _lateral(self, lateral_inflows: Mapping[str, ArrayLike]) -> tuple[dict[str, NDArray[np.float64]], int]:
+        lateral = {reach_id: np.asarray(series, dtype=np.float64) for reach_id, series in lateral_inflows.items()}
+        if not lateral:
+            raise ValueError("lateral_inflows must contain at least one series")
+        lengths = {series.shape for series in lateral.values()}
+        if len(lengths) != 1 or len(next(iter(lengths))) != 1:
+            raise ValueError(f"lateral inflows must be 1-D series of equal length, got shapes {sorted(lengths)}")
+        if unknown := lateral.keys() - self._row_of.keys():
+            raise ValueError(f"lateral inflow given for unknown reach {sorted(unknown)[0]!r}")
+        return lateral, next(iter(lengths))[0]
+
+    def _route(
+        self, lateral: Mapping[str, NDArray[np.float64]], workspace: NetworkWorkspace
+    ) -> dict[str, NDArray[np.float64]]:
+        inflows, outflows = workspace.inflows, workspace.outflows
+        inflows.fill(0.0)
+        for reach_id, series in lateral.items():
+            inflows[self._row_of[reach_id]] = series
+        for groups in self._levels:
+            for group in groups:
+                group_inflows = inflows[group.rows]
+                np.add.at(group_inflows, group.edge_targets, outflows[group.edge_sources])
+                outflows[group.rows] = group.route(group_inflows)
+        return {reach_id: outflows[row] for reach_id, row in self._row_of.items()}
+
+
+def _topological_depths(by_id: Mapping[str, NetworkReach]) -> dict[str, int]:
+    depth: dict[str, int] = {}
+    pending = {reach_id: len(reach.upstream) for reach_id, reach in by_id.items()}
+    downstream: dict[str, list[str]] = {reach_id: [] for reach_id in by_id}
+    for reach_id, reach in by_id.items():
+        for upstream in reach.upstream:
+            downstream[upstream].append(reach_id)
+
+    ready = [reach_id for reach_id, count in pending.items() if count == 0]
+    for reach_id in ready:
+        depth[reach_id] = 0
+    while ready:
+        reach_id = ready.pop()
+        for child in downstream[reach_id]:
+            depth[child] = max(depth.get(child, 0), depth[reach_id] + 1)
+            pending[child] -= 1
+            if pending[child] == 0:
+                ready.append(child)
+
+    if len(depth) != len(by_id) or any(count > 0 for count in pending.values()):
+        cyclic = sorted(reach_id for reach_id, count in pending.items() if count > 0)
+        raise ValueError(f"reach network contains a cycle through {cyclic}")
+    return depth
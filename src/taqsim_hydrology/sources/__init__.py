@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from taqsim_hydrology._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from taqsim_hydrology.sources.cache import PrecomputeCache
+    from taqsim_hydrology.sources.handoff import ArraySeries, to_timeseries
+    from taqsim_hydrology.sources.precompute import (
+        DEFAULT_CHUNK_STEPS,
+        SUPPORTED_MODELS,
+        PrecomputeJob,
+        precompute,
+        precompute_many,
+        precompute_to_file,
+        run_chunks,
+        run_model,
+    )
+
+__all__ = [
+    "DEFAULT_CHUNK_STEPS",
+    "SUPPORTED_MODELS",
+    "ArraySeries",
+    "PrecomputeCache",
+    "PrecomputeJob",
+    "precompute",
+    "precompute_many",
+    "precompute_to_file",
+    "run_chunks",
+    "run_model",
+    "to_timeseries",
+]
+
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "DEFAULT_CHUNK_STEPS": "taqsim_hydrology.sources.precompute",
+        "SUPPORTED_MODELS": "taqsim_hydrology.sources.precompute",
+        "ArraySeries": "taqsim_hydrology.sources.handoff",
+        "PrecomputeCache": "taqsim_hydrology.sources.cache",
+        "PrecomputeJob": "taqsim_hydrology.sources.precompute",
+        "precompute": "taqsim_hydrology.sources.precompute",
+        "precompute_many": "taqsim_hydrology.sources.precompute",
+        "precompute_to_file": "taqsim_hydrology.sources.precompute",
+        "run_chunks": "taqsim_hydrology.sources.precompute",
+        "run_model": "taqsim_hydrology.sources.precompute",
+        "to_timeseries": "taqsim_hydrology.sources.handoff",
+    },
+)
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import hashlib
+import os
+import tempfile
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from functools import cache
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+    from taqsim_hydrology.sources.precompute import PrecomputeJob
+
+
+@dataclass
+class PrecomputeCache:
+    directory: Path
+    max_bytes: int = 2**30
+    memory_map: bool = False
+    hits: int = field(default=0, init=False)
+    misses: int = field(default=0, init=False)
+    evictions: int = field(default=0, init=False)
+    # Counter updates are read-modify-write, which threads can interleave without the GIL.
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.max_bytes <= 0:
+            raise ValueError(f"max_bytes must be positive, got {self.max_bytes}")
+        self.directory = Path(self.directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def key(self, job: PrecomputeJob) -> str:
+        hasher = hashlib.sha256()
+        _feed(hasher, ("pydrology", _pydrology_version()))
+        _feed(hasher, ("model", job.model))
+        _feed(hasher, ("forcing", job.forcing))
+        _feed(hasher, ("params", job.params))
+        return hasher.hexdigest()
+
+    def get(self, job: PrecomputeJob) -> NDArray[np.float64] | None:
+        path = self._path(self.key(job))
+        try:
+            streamflow = np.load(path, mmap_mode="r" if self.memory_map else None)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        # Touching the file on every hit turns mtime into the LRU clock. Another thread may have evicted it since the
+        # load, which leaves the loaded array valid.
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path)
+        with self._lock:
+            self.hits += 1
+        return streamflow
+
+    def put(self, job: PrecomputeJob, streamflow: NDArray[np.float64]) -> None:
+        streamflow = np.asarray(streamflow, dtype=np.float64)
+        if streamflow.nbytes > self.max_bytes:
+            return
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, streamflow)
+        os.replace(tmp, self._path(self.key(job)))
+        self._evict()
+
+    def size_bytes(self) -> int:
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def clear(self) -> None:
+        for entry in self._entries():
+            entry.unlink(missing_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.npy"
+
+    def _entries(self) -> list[Path]:
+        return list(self.directory.glob("*.npy"))
+
+    def _evict(self) -> None:
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+
+@cache
+def _pydrology_version() -> str:
+    try:
+        return version("pydrology")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def _feed(hasher: Any, value: Any) -> None:
+    # Type tags keep structurally different inputs (e.g. a list vs. an array of the same numbers) from colliding.
+    if isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value)
+        hasher.update(f"ndarray:{array.dtype.str}:{array.shape}".encode())
+        hasher.update(array.tobytes() if array.dtype != object else repr(array.tolist()).encode())
+    elif isinstance(value, Mapping):
+        hasher.update(f"mapping:{len(value)}".encode())
+        for name in sorted(value, key=str):
+            _feed(hasher, str(name))
+            _feed(hasher, value[name])
+    elif isinstance(value, list | tuple):
+        hasher.update(f"{type(value).__name__}:{len(value)}".encode())
+        for item in value:
+            _feed(hasher, item)
+    elif isinstance(value, str | bytes | int | float | bool | None):
+        hasher.update(f"{type(value).__name__}:{value!r}".encode())
+    elif dataclasses.is_dataclass(value) or hasattr(value, "__dict__"):
+        hasher.update(f"object:{type(value).__module__}.{type(value).__qualname__}".encode())
+        if dataclasses.is_dataclass(value):
+            _feed(hasher, {f.name: getattr(value, f.name) for f in dataclasses.fields(value)})
+        else:
+            _feed(hasher, vars(value))
+    else:
+        hasher.update(f"{type(value).__qualname__}:{value!r}".encode())
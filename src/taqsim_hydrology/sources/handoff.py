@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from collections.abc import Iterator, Sequence
+from typing import TYPE_CHECKING, Any, overload
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from numpy.typing import ArrayLike, NDArray
+    from taqsim.node.timeseries import TimeSeries
+
+
+class ArraySeries(Sequence[float]):
+    __slots__ = ("_array", "_view")
+    __hash__ = None  # type: ignore[assignment]
+
+    def __init__(self, values: ArrayLike) -> None:
+        array = np.asarray(values, dtype=np.float64)
+        if array.ndim != 1:
+            raise ValueError(f"values must be 1-D, got shape {array.shape}")
+        if not array.flags.c_contiguous:
+            array = np.ascontiguousarray(array)
+        if array.flags.writeable:
+            # A read-only view, not a copy: the caller's buffer is shared but cannot be written through this series.
+            array = array.view()
+            array.flags.writeable = False
+        self._array = array
+        # memoryview indexing returns plain Python floats without going through NumPy scalar boxing.
+        self._view = memoryview(array)
+
+    @property
+    def array(self) -> NDArray[np.float64]:
+        return self._array
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+    @overload
+    def __getitem__(self, index: int) -> float: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> ArraySeries: ...
+
+    def __getitem__(self, index: int | slice) -> float | ArraySeries:
+        if isinstance(index, slice):
+            return ArraySeries(self._array[index])
+        return self._view[index]
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self._view)
+
+    def __array__(self, dtype: Any = None, copy: bool | None = None) -> NDArray[np.float64]:
+        if copy:
+            return self._array.astype(dtype or np.float64, copy=True)
+        return self._array if dtype is None else self._array.astype(dtype, copy=False)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ArraySeries):
+            return bool(np.array_equal(self._array, other._array))
+        if isinstance(other, Sequence) and not isinstance(other, str | bytes):
+            return len(other) == len(self) and all(a == b for a, b in zip(self._view, other, strict=True))
+        return NotImplemented
+
+    def __reduce__(self) -> tuple[type[ArraySeries], tuple[NDArray[np.float64]]]:
+        return ArraySeries, (np.array(self._array),)
+
+    def __repr__(self) -> str:
+        return f"ArraySeries(len={len(self)})"
+
+
+def to_timeseries(streamflow: ArrayLike) -> TimeSeries:
+    from taqsim.node.timeseries import TimeSeries
+
+    series = ArraySeries(streamflow)
+    try:
+        return TimeSeries(values=series)
+    except (TypeError, ValueError):
+        # This taqsim build only accepts a real list, so materialise one.
+        return TimeSeries(values=series.array.tolist())
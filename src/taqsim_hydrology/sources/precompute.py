@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import math
+import os
+import tempfile
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from taqsim_hydrology.sources.handoff import to_timeseries
+
+if TYPE_CHECKING:
+    from multiprocessing.context import BaseContext
+
+    from numpy.typing import NDArray
+    from pydrology import ForcingData
+    from taqsim.node.timeseries import TimeSeries
+
+    from taqsim_hydrology.sources.cache import PrecomputeCache
+
+SUPPORTED_MODELS = ("gr6j", "gr2m", "hbv_light", "gr6j_cemaneige")
+DEFAULT_CHUNK_STEPS = 2**16
+
+
+@dataclass(frozen=True)
+class PrecomputeJob:
+    forcing: ForcingData
+    model: str
+    params: Any
+
+    def __post_init__(self) -> None:
+        if self.model not in SUPPORTED_MODELS:
+            raise ValueError(f"model must be one of {SUPPORTED_MODELS}, got {self.model!r}")
+
+
+def run_model(forcing: ForcingData, model: str, params: Any) -> NDArray[np.float64]:
+    from pydrology import get_model
+
+    output = get_model(model).run(params, forcing)
+    return np.asarray(output.streamflow, dtype=np.float64)
+
+
+def run_chunks(
+    forcing: ForcingData, model: str, params: Any, chunk_steps: int = DEFAULT_CHUNK_STEPS, initial_state: Any = None
+) -> Iterator[NDArray[np.float64]]:
+    PrecomputeJob(forcing=forcing, model=model, params=params)
+    if chunk_steps < 1:
+        raise ValueError(f"chunk_steps must be at least 1, got {chunk_steps}")
+    return _iter_chunks(forcing, model, params, chunk_steps, initial_state)
+
+
+def precompute_to_file(
+    forcing: ForcingData,
+    model: str,
+    params: Any,
+    path: str | os.PathLike[str],
+    chunk_steps: int = DEFAULT_CHUNK_STEPS,
+    initial_state: Any = None,
+) -> TimeSeries:
+    path = Path(path)
+    n_steps = len(forcing.time)
+    chunks = run_chunks(forcing, model, params, chunk_steps=chunk_steps, initial_state=initial_state)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            header = {"descr": np.lib.format.dtype_to_descr(np.dtype(np.float64)), "fortran_order": False}
+            np.lib.format.write_array_header_1_0(f, {**header, "shape": (n_steps,)})
+            # Plain writes rather than a writable memmap: written pages never count against this process's memory.
+            written = 0
+            for chunk in chunks:
+                f.write(np.ascontiguousarray(chunk, dtype="<f8").tobytes())
+                written += len(chunk)
+        if written != n_steps:
+            raise RuntimeError(f"pydrology model {model!r} returned {written} values for {n_steps} forcing steps")
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return to_timeseries(np.load(path, mmap_mode="r"))
+
+
+def precompute(forcing: ForcingData, model: str, params: Any, cache: PrecomputeCache | None = None) -> TimeSeries:
+    job = PrecomputeJob(forcing=forcing, model=model, params=params)
+    return precompute_many([job], max_workers=1, cache=cache)[0]
+
+
+def precompute_many(
+    jobs: Iterable[PrecomputeJob],
+    max_workers: int | None = None,
+    chunksize: int | None = None,
+    mp_context: BaseContext | None = None,
+    cache: PrecomputeCache | None = None,
+) -> list[TimeSeries]:
+    jobs = list(jobs)
+    if max_workers is not None and max_workers < 1:
+        raise ValueError(f"max_workers must be at least 1, got {max_workers}")
+    if chunksize is not None and chunksize < 1:
+        raise ValueError(f"chunksize must be at least 1, got {chunksize}")
+
+    streamflows = [cache.get(job) for job in jobs] if cache is not None else [None] * len(jobs)
+    pending = [i for i, streamflow in enumerate(streamflows) if streamflow is None]
+    computed = _run_jobs([jobs[i] for i in pending], max_workers, chunksize, mp_context)
+    for i, streamflow in zip(pending, computed, strict=True):
+        streamflows[i] = streamflow
+        if cache is not None:
+            cache.put(jobs[i], streamflow)
+    return [to_timeseries(streamflow) for streamflow in streamflows]
+
+
+def _run_jobs(
+    jobs: list[PrecomputeJob], max_workers: int | None, chunksize: int | None, mp_context: BaseContext | None
+) -> list[NDArray[np.float64]]:
+    workers = min(max_workers or os.process_cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        return [_run_job(job) for job in jobs]
+    # A few chunks per worker balances uneven catchment run times against per-task IPC overhead.
+    chunksize = chunksize or max(1, math.ceil(len(jobs) / (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as pool:
+        return list(pool.map(_run_job, jobs, chunksize=chunksize))
+
+
+def _run_job(job: PrecomputeJob) -> NDArray[np.float64]:
+    return run_model(job.forcing, job.model, job.params)
+
+
+def _slice_forcing(forcing: ForcingData, start: int, stop: int, n_steps: int) -> ForcingData:
+    # Slicing a memory-mapped array is a view, so only this chunk's pages are ever read from disk.
+    fields = {
+        name: value[start:stop] if isinstance(value, np.ndarray) and value.ndim and len(value) == n_steps else value
+        for name, value in vars(forcing).items()
+    }
+    return type(forcing)(**fields)
+
+
+def _iter_chunks(
+    forcing: ForcingData, model: str, params: Any, chunk_steps: int, initial_state: Any
+) -> Iterator[NDArray[np.float64]]:
+    from pydrology import get_model
+
+    runner = get_model(model)
+    n_steps = len(forcing.time)
+    state = initial_state
+    for start in range(0, n_steps, chunk_steps):
+        stop = min(start + chunk_steps, n_steps)
+        output = runner.run(params, _slice_forcing(forcing, start, stop, n_steps), initial_state=state)
+        if stop < n_steps:
+            state = getattr(output, "final_state", None)
+            if state is None:
+                raise RuntimeError(
+                    f"pydrology model {model!r} does not return its final state, so it cannot be chunked"
+                )
+        yield np.asarray(output.streamflow, dtype=np.float64)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import importlib
+import subprocess
+import sys
+
+import pytest
+
+import taqsim_hydrology
+
+PACKAGES = ("taqsim_hydrology", "taqsim_hydrology.losses", "taqsim_hydrology.routing", "taqsim_hydrology.sources")
+
+
+def _loaded_after(statement: str, modules: tuple[str, ...]) -> list[str]:
+    code = f"import sys; {statement}; print(','.join(m for m in {modules!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return [name for name in result.stdout.strip().split(",") if name]
+
+
+class TestLazyExports:
+    @pytest.mark.parametrize("package", PACKAGES)
+    def test_every_export_resolves(self, package):
+        module = importlib.import_module(package)
+        for name in module.__all__:
+            assert getattr(module, name) is not None
+
+    def test_export_is_the_defining_object(self):
+        from taqsim_hydrology.routing import Muskingum
+        from taqsim_hydrology.routing.muskingum import Muskingum as Defined
+
+        assert Muskingum is Defined
+
+    def test_subpackages_resolve_from_the_top_level(self):
+        assert taqsim_hydrology.routing is importlib.import_module("taqsim_hydrology.routing")
+
+    def test_unknown_name_raises_attribute_error(self):
+        with pytest.raises(AttributeError, match="has no attribute 'Nope'"):
+            taqsim_hydrology.routing.Nope  # noqa: B018
+
+    @pytest.mark.parametrize("package", PACKAGES)
+    def test_dir_lists_exports(self, package):
+        module = importlib.import_module(package)
+        assert set(module.__all__) <= set(dir(module))
+
+    def test_star_import_gives_all_exports(self):
+        namespace: dict[str, object] = {}
+        exec("from taqsim_hydrology.losses import *", namespace)
+        assert {"ConstantFraction", "Evaporation", "Seepage"} <= namespace.keys()
+
+
+class TestImportFootprint:
+    def test_package_import_loads_nothing_heavy(self):
+        assert _loaded_after("import taqsim_hydrology", ("numpy", "scipy", "numba", "taqsim", "pydrology")) == []
+
+    @pytest.mark.parametrize(
+        "statement",
+        [
+            "from taqsim_hydrology.routing import Lag",
+            "from taqsim_hydrology.routing import LinearReservoir, Muskingum, NashCascade, StateCodec",
+            "from taqsim_hydrology.sources import PrecomputeCache, precompute_to_file",
+        ],
+    )
+    def test_entry_points_defer_heavy_dependencies(self, statement):
+        assert _loaded_after(statement, ("scipy", "numba", "taqsim", "pydrology")) == []
+
+    def test_losses_defer_scipy(self):
+        assert _loaded_after("from taqsim_hydrology.losses import Seepage", ("scipy", "numba", "pydrology")) == []
+
+    def test_scipy_loads_on_first_use(self):
+        statement = (
+            "from taqsim_hydrology.routing import LinearReservoir; LinearReservoir(k=2.0).route_series([1.0], 0.0)"
+        )
+        assert _loaded_after(statement, ("scipy",)) == ["scipy"]
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from taqsim.common import INEFFICIENCY, SEEPAGE
+from taqsim.node.reach import Reach
+from taqsim.time import Frequency, Timestep
+
+from taqsim_hydrology.losses.constant_fraction import ConstantFraction
+
+
+def _ts(i: int) -> Timestep:
+    return Timestep(index=i, frequency=Frequency.MONTHLY)
+
+
+class TestConstantFractionValidation:
+    @pytest.mark.parametrize("fraction", [-0.1, 1.5])
+    def test_fraction_outside_unit_interval_raises(self, fraction: float) -> None:
+        with pytest.raises(ValueError, match="fraction must be in"):
+            ConstantFraction(fraction)
+
+
+class TestConstantFractionCalculate:
+    def test_loss_is_fraction_of_flow(self) -> None:
+        rule = ConstantFraction(0.05)
+        assert rule.calculate(Reach(id="r"), 200.0, _ts(0)) == {INEFFICIENCY: pytest.approx(10.0)}
+
+    def test_reason_is_configurable(self) -> None:
+        rule = ConstantFraction(0.1, reason=SEEPAGE)
+        assert rule.calculate(Reach(id="r"), 50.0, _ts(3)) == {SEEPAGE: pytest.approx(5.0)}
+
+
+class TestConstantFractionSeries:
+    def test_matches_per_step_calculate(self) -> None:
+        flows = np.random.default_rng(0).uniform(0.0, 500.0, size=240)
+        rule = ConstantFraction(0.07)
+
+        losses = rule.calculate_series(flows)
+
+        reach = Reach(id="r")
+        expected = [rule.calculate(reach, q, _ts(i))[INEFFICIENCY] for i, q in enumerate(flows.tolist())]
+        assert losses.tolist() == expected
+
+    def test_ensemble_flows(self) -> None:
+        losses = ConstantFraction(0.5).calculate_series([[2.0, 4.0], [6.0, 0.0]])
+        np.testing.assert_allclose(losses, [[1.0, 2.0], [3.0, 0.0]])
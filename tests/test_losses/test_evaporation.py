@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import pickle
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from taqsim.common import EVAPORATION
+from taqsim.time import Frequency, Timestep
+
+from taqsim_hydrology.losses.evaporation import Evaporation
+
+
+def _node(current_storage: float, temperature: list[float] | None = None) -> SimpleNamespace:
+    return SimpleNamespace(current_storage=current_storage, auxiliary_data={"temperature": temperature or []})
+
+
+def _ts(i: int) -> Timestep:
+    return Timestep(index=i, frequency=Frequency.MONTHLY)
+
+
+class TestEvaporationValidation:
+    def test_negative_coefficient_raises(self) -> None:
+        with pytest.raises(ValueError, match="coefficient must be non-negative"):
+            Evaporation([10.0], coefficient=-0.1)
+
+    def test_non_finite_temperature_raises(self) -> None:
+        with pytest.raises(ValueError, match="temperature must be finite"):
+            Evaporation([10.0, float("nan")], coefficient=0.01)
+
+    def test_two_dimensional_temperature_raises(self) -> None:
+        with pytest.raises(ValueError, match="temperature must be a 1-D series"):
+            Evaporation(np.zeros((2, 2)), coefficient=0.01)
+
+
+class TestEvaporationRates:
+    def test_rates_are_precomputed_for_whole_series(self) -> None:
+        rule = Evaporation([-5.0, 0.0, 10.0, 25.0], coefficient=0.002)
+        assert rule.rates.tolist() == pytest.approx([0.0, 0.0, 0.02, 0.05])
+
+    def test_base_temperature_shifts_onset(self) -> None:
+        rule = Evaporation([4.0, 5.0, 15.0], coefficient=0.01, base_temperature=5.0)
+        assert rule.rates.tolist() == pytest.approx([0.0, 0.0, 0.1])
+
+    def test_rates_are_capped_at_one(self) -> None:
+        assert Evaporation([500.0], coefficient=0.01).rates.tolist() == [1.0]
+
+    def test_rate_table_is_read_only(self) -> None:
+        rule = Evaporation([10.0], coefficient=0.01)
+        with pytest.raises(ValueError, match="read-only"):
+            rule.rates[0] = 0.5
+
+
+class TestEvaporationCalculate:
+    def test_loss_is_rate_times_current_storage(self) -> None:
+        rule = Evaporation([0.0, 10.0, 20.0], coefficient=0.001)
+        assert rule.calculate(_node(1000.0), _ts(2)) == {EVAPORATION: pytest.approx(20.0)}
+
+    def test_cold_step_has_no_loss(self) -> None:
+        rule = Evaporation([-3.0], coefficient=0.01)
+        assert rule.calculate(_node(1000.0), _ts(0)) == {EVAPORATION: 0.0}
+
+    def test_from_node_reads_auxiliary_temperature(self) -> None:
+        node = _node(500.0, temperature=[10.0, 30.0])
+        rule = Evaporation.from_node(node, coefficient=0.001)
+        assert rule.calculate(node, _ts(1)) == {EVAPORATION: pytest.approx(15.0)}
+
+
+class TestEvaporationSeries:
+    def test_matches_per_step_calculate(self) -> None:
+        temperature = np.random.default_rng(1).normal(12.0, 8.0, size=120)
+        storage = np.random.default_rng(2).uniform(0.0, 1e6, size=120)
+        rule = Evaporation(temperature, coefficient=0.0015)
+
+        losses = rule.calculate_series(storage)
+
+        expected = [rule.calculate(_node(s), _ts(i))[EVAPORATION] for i, s in enumerate(storage.tolist())]
+        assert losses.tolist() == expected
+
+    def test_start_offsets_into_temperature_series(self) -> None:
+        rule = Evaporation([0.0, 10.0, 20.0, 30.0], coefficient=0.01)
+        assert rule.calculate_series([100.0, 100.0], start=2).tolist() == pytest.approx([20.0, 30.0])
+
+    def test_trajectory_past_end_of_series_raises(self) -> None:
+        rule = Evaporation([10.0, 20.0], coefficient=0.01)
+        with pytest.raises(ValueError, match="exceeds the 2-step temperature series"):
+            rule.calculate_series([1.0, 1.0], start=1)
+
+    def test_ensemble_trajectories_broadcast(self) -> None:
+        rule = Evaporation([10.0, 20.0], coefficient=0.01)
+        losses = rule.calculate_series([[100.0, 100.0], [50.0, 0.0]])
+        np.testing.assert_allclose(losses, [[10.0, 20.0], [5.0, 0.0]])
+
+
+class TestEvaporationFrozen:
+    def test_hashable_and_picklable(self) -> None:
+        rule = Evaporation([10.0, 20.0], coefficient=0.01)
+        assert hash(rule) == hash(Evaporation(np.array([10.0, 20.0]), coefficient=0.01))
+        restored = pickle.loads(pickle.dumps(rule))
+        assert restored == rule
+        assert restored.rates.tolist() == rule.rates.tolist()
+        assert not restored.temperature.flags.writeable
+        assert not restored.rates.flags.writeable
+
+    def test_equality_follows_the_temperature_series(self) -> None:
+        rule = Evaporation([10.0, 20.0], coefficient=0.01)
+        assert rule != Evaporation([10.0, 21.0], coefficient=0.01)
+        assert rule != Evaporation([10.0, 20.0, 0.0], coefficient=0.01)
+        assert Evaporation([-0.0], coefficient=0.01) == Evaporation([0.0], coefficient=0.01)
+
+    def test_temperature_is_a_read_only_copy(self) -> None:
+        temperature = np.array([10.0, 20.0])
+        rule = Evaporation(temperature, coefficient=0.01)
+        temperature[0] = 99.0
+        assert rule.temperature.tolist() == [10.0, 20.0]
+        assert temperature.flags.writeable
+        with pytest.raises(ValueError, match="read-only"):
+            rule.temperature[0] = 0.0
+
+    def test_cannot_set_coefficient(self) -> None:
+        rule = Evaporation([10.0], coefficient=0.01)
+        with pytest.raises(AttributeError):
+            rule.coefficient = 0.5  # type: ignore[misc]
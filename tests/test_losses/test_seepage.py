@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import pickle
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from taqsim.common import SEEPAGE
+from taqsim.time import Frequency, Timestep
+
+from taqsim_hydrology.losses.seepage import Seepage
+
+
+def _node(current_storage: float) -> SimpleNamespace:
+    return SimpleNamespace(current_storage=current_storage, auxiliary_data={})
+
+
+def _ts(i: int) -> Timestep:
+    return Timestep(index=i, frequency=Frequency.MONTHLY)
+
+
+def _step_by_step(rule: Seepage, initial_storage: float, net_inflows: list[float]) -> tuple[list[float], list[float]]:
+    storage, losses = [], []
+    current = initial_storage
+    for i, q in enumerate(net_inflows):
+        loss = rule.calculate(_node(current), _ts(i))[SEEPAGE]
+        storage.append(current)
+        losses.append(loss)
+        current = current - loss + q
+    return [*storage, current], losses
+
+
+class TestSeepageValidation:
+    @pytest.mark.parametrize("rate", [-0.01, 1.01])
+    def test_rate_outside_unit_interval_raises(self, rate: float) -> None:
+        with pytest.raises(ValueError, match="rate must be in"):
+            Seepage(rate)
+
+
+class TestSeepageCalculate:
+    def test_loss_is_rate_times_current_storage(self) -> None:
+        assert Seepage(0.02).calculate(_node(1000.0), _ts(0)) == {SEEPAGE: pytest.approx(20.0)}
+
+    def test_series_matches_per_step_calculate(self) -> None:
+        storage = np.random.default_rng(3).uniform(0.0, 1e6, size=100)
+        rule = Seepage(0.003)
+        expected = [rule.calculate(_node(s), _ts(i))[SEEPAGE] for i, s in enumerate(storage.tolist())]
+        assert rule.calculate_series(storage).tolist() == expected
+
+
+class TestSeepageDecay:
+    def test_closed_form_matches_step_by_step(self) -> None:
+        rule = Seepage(0.01)
+        storage, losses = rule.decay(5e5, 600)
+        expected_storage, expected_losses = _step_by_step(rule, 5e5, [0.0] * 600)
+        np.testing.assert_allclose(storage, expected_storage[:-1], rtol=1e-12)
+        np.testing.assert_allclose(losses, expected_losses, rtol=1e-12)
+
+    def test_ensemble_of_initial_storages(self) -> None:
+        storage, losses = Seepage(0.5).decay([8.0, 4.0], 3)
+        np.testing.assert_allclose(storage, [[8.0, 4.0, 2.0], [4.0, 2.0, 1.0]])
+        np.testing.assert_allclose(losses, [[4.0, 2.0, 1.0], [2.0, 1.0, 0.5]])
+
+    def test_full_rate_drains_in_one_step(self) -> None:
+        storage, _ = Seepage(1.0).decay(10.0, 3)
+        assert storage.tolist() == [10.0, 0.0, 0.0]
+
+    def test_zero_rate_keeps_storage(self) -> None:
+        storage, losses = Seepage(0.0).decay(3.0, 4)
+        assert storage.tolist() == [3.0] * 4
+        assert losses.tolist() == [0.0] * 4
+
+    def test_underflowing_tail_is_zero(self) -> None:
+        storage, _ = Seepage(0.5).decay(1.0, 2_000)
+        assert storage[1021] == 0.5**1021
+        assert (storage[1100:] == 0.0).all()
+
+
+class TestSeepageTrajectory:
+    def test_matches_step_by_step_water_balance(self) -> None:
+        rule = Seepage(0.004)
+        inflows = np.random.default_rng(4).uniform(0.0, 300.0, size=365)
+        storage, losses = rule.trajectory(2e4, inflows)
+        expected_storage, expected_losses = _step_by_step(rule, 2e4, inflows.tolist())
+        np.testing.assert_allclose(storage, expected_storage, rtol=1e-12)
+        np.testing.assert_allclose(losses, expected_losses, rtol=1e-12)
+
+    def test_zero_inflow_equals_closed_form_decay(self) -> None:
+        rule = Seepage(0.02)
+        np.testing.assert_allclose(rule.trajectory(100.0, np.zeros(50))[0], rule.decay(100.0, 51)[0], rtol=1e-12)
+
+    def test_ensemble_members_are_independent(self) -> None:
+        rule = Seepage(0.1)
+        inflows = np.array([[5.0, 0.0, 1.0], [1.0, 2.0, 3.0]])
+        storage, _ = rule.trajectory([100.0, 50.0], inflows)
+        for row, initial in enumerate([100.0, 50.0]):
+            np.testing.assert_allclose(storage[row], _step_by_step(rule, initial, inflows[row].tolist())[0])
+
+    def test_single_and_empty_series(self) -> None:
+        rule = Seepage(0.1)
+        storage, losses = rule.trajectory(100.0, [7.0])
+        assert storage.tolist() == [100.0, 97.0]
+        assert losses.tolist() == [10.0]
+        storage, losses = rule.trajectory(100.0, [])
+        assert storage.tolist() == [100.0]
+        assert losses.shape == (0,)
+
+    def test_continues_from_final_storage(self) -> None:
+        rule = Seepage(0.03)
+        inflows = np.random.default_rng(7).uniform(0.0, 50.0, size=(2, 120))
+        storage, losses = rule.trajectory([400.0, 10.0], inflows)
+        head_storage, head_losses = rule.trajectory([400.0, 10.0], inflows[:, :70])
+        tail_storage, tail_losses = rule.trajectory(head_storage[:, -1], inflows[:, 70:])
+        assert storage.shape == (2, 121)
+        np.testing.assert_allclose(np.concatenate([head_storage, tail_storage[:, 1:]], axis=1), storage, rtol=1e-12)
+        np.testing.assert_allclose(np.concatenate([head_losses, tail_losses], axis=1), losses, rtol=1e-12)
+
+
+class TestSeepageFrozen:
+    def test_hashable_and_picklable(self) -> None:
+        rule = Seepage(0.01)
+        assert hash(rule) == hash(Seepage(0.01))
+        assert pickle.loads(pickle.dumps(rule)) == rule
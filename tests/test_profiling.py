@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+from taqsim.node.reach import Reach
+from taqsim.node.strategies import NoReachLoss
+from taqsim.time import Frequency, Timestep
+
+from taqsim_hydrology import profiling
+from taqsim_hydrology.losses import ConstantFraction, Seepage
+from taqsim_hydrology.routing import Lag, LinearReservoir, Muskingum, MuskingumState
+
+_T = Timestep(index=0, frequency=Frequency.DAILY)
+
+
+def _run(model, reach: Reach, inflows: list[float]) -> None:
+    state = model.initial_state(reach)
+    for inflow in inflows:
+        _, state = model.route(reach, inflow, state, _T)
+
+
+class TestDisabled:
+    def test_methods_are_the_plain_functions(self):
+        originals = {cls: cls.__dict__["route"] for cls in (Muskingum, LinearReservoir, Lag)}
+        with profiling.profile():
+            assert Muskingum.__dict__["route"] is not originals[Muskingum]
+        for cls, original in originals.items():
+            assert cls.__dict__["route"] is original
+        assert not profiling.is_enabled()
+
+    def test_exception_inside_block_restores_methods(self):
+        original = Seepage.__dict__["calculate"]
+        with pytest.raises(KeyError), profiling.profile():
+            raise KeyError("boom")
+        assert Seepage.__dict__["calculate"] is original
+        assert not profiling.is_enabled()
+
+    def test_nested_enable_raises(self):
+        with profiling.profile(), pytest.raises(RuntimeError, match="already enabled"):
+            profiling.enable()
+
+    def test_disable_without_enable_returns_none(self):
+        assert profiling.disable() is None
+
+
+class TestRecording:
+    def test_counts_calls_per_reach(self):
+        model = LinearReservoir(k=2.0)
+        upper = Reach(id="upper", routing_model=model, loss_rule=NoReachLoss())
+        lower = Reach(id="lower", routing_model=model, loss_rule=NoReachLoss())
+        with profiling.profile() as prof:
+            _run(model, upper, [1.0] * 30)
+            _run(model, lower, [1.0] * 10)
+
+        by_reach = {row["reach"]: row for row in prof.summary(by="reach")}
+        assert by_reach["upper"]["calls"] == 30
+        assert by_reach["lower"]["calls"] == 10
+        assert by_reach["upper"]["seconds"] > 0.0
+
+    def test_equal_models_are_kept_apart(self):
+        a, b = Lag(lag=2), Lag(lag=2)
+        reach = Reach(id="r", routing_model=a, loss_rule=NoReachLoss())
+        with profiling.profile() as prof:
+            _run(a, reach, [1.0] * 3)
+            _run(b, reach, [1.0] * 5)
+        assert sorted(row["calls"] for row in prof.rows()) == [3, 5]
+
+    def test_counts_muskingum_clamps(self):
+        model = Muskingum(k=2.0, x=0.5)
+        reach = Reach(id="r", routing_model=model, loss_rule=NoReachLoss())
+        with profiling.profile() as prof:
+            _run(model, reach, [100.0, 0.0, 0.0])
+        (row,) = prof.rows()
+        # c0 < 0 at x = 0.5, so the first pulse clamps; the following recession does not.
+        assert row["clamps"] == 1
+        assert row["calls"] == 3
+
+    def test_records_loss_rules_and_storage(self):
+        reach = Reach(id="r", routing_model=None, loss_rule=NoReachLoss())
+        node = SimpleNamespace(id="dam", current_storage=100.0)
+        with profiling.profile() as prof:
+            ConstantFraction(0.1).calculate(reach, 10.0, _T)
+            Seepage(0.01).calculate(node, _T)
+            Muskingum(k=1.0).storage(MuskingumState(0.0, 0.0))
+
+        by_type = {row["type"]: row for row in prof.summary(by="type")}
+        assert set(by_type) == {"ConstantFraction", "Seepage", "Muskingum"}
+        assert {row["reach"] for row in prof.rows()} == {"r", "dam", None}
+
+    def test_results_are_unchanged(self):
+        model = Muskingum(k=1.5, x=0.3)
+        reach = Reach(id="r", routing_model=model, loss_rule=NoReachLoss())
+        state = model.initial_state(reach)
+        plain = model.route(reach, 12.0, state, _T)
+        with profiling.profile():
+            assert model.route(reach, 12.0, state, _T) == plain
+
+    def test_keyword_arguments_are_forwarded(self):
+        model = Muskingum(k=2.0, x=0.5)
+        reach = Reach(id="r", routing_model=model, loss_rule=NoReachLoss())
+        state = model.initial_state(reach)
+        plain = model.route(reach, 100.0, state, _T)
+        node = SimpleNamespace(id="dam", current_storage=100.0)
+        with profiling.profile() as prof:
+            assert model.route(reach, 100.0, state, t=_T) == plain
+            assert model.route(reach=reach, inflow=100.0, state=state, t=_T) == plain
+            Seepage(0.01).calculate(node=node, t=_T)
+            ConstantFraction(0.1).calculate(reach, flow=10.0, t=_T)
+        by_type = {row["type"]: row for row in prof.summary(by="type")}
+        assert by_type["Muskingum"]["calls"] == 2
+        # Both calls route a pulse through c0 < 0, so the clamp probe sees the keywords too.
+        assert by_type["Muskingum"]["clamps"] == 2
+        assert {row["reach"] for row in prof.rows()} == {"r", "dam"}
+
+
+class TestSummary:
+    def _profile(self) -> profiling.Profile:
+        reach = Reach(id="r", routing_model=None, loss_rule=NoReachLoss())
+        with profiling.profile() as prof:
+            _run(Muskingum(k=2.0, x=0.2), reach, [1.0] * 4)
+            _run(LinearReservoir(k=2.0), reach, [1.0] * 6)
+        return prof
+
+    def test_shares_sum_to_one(self):
+        summary = self._profile().summary(by="type")
+        assert sum(group["share"] for group in summary) == pytest.approx(1.0)
+        assert [group["seconds"] for group in summary] == sorted((g["seconds"] for g in summary), reverse=True)
+
+    def test_unknown_grouping_raises(self):
+        with pytest.raises(ValueError, match="by must be one of"):
+            self._profile().summary(by="node")  # type: ignore[arg-type]
+
+    def test_table_has_header_and_one_line_per_group(self):
+        table = self._profile().table(by="model")
+        lines = table.splitlines()
+        assert lines[0].split() == ["type", "model", "calls", "seconds", "mean", "µs", "share", "clamps"]
+        assert len(lines) == 2 + 2
+        assert "Muskingum(k=2.0, x=0.2, initial_flow=0.0, substeps=1)" in table
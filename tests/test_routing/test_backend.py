@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from taqsim_hydrology.losses import ConstantFraction
+from taqsim_hydrology.routing import (
+    LinearReservoir,
+    Muskingum,
+    MuskingumState,
+    NashCascade,
+    available_backends,
+    get_backend,
+    set_backend,
+    use_backend,
+)
+
+requires_numba = pytest.mark.skipif("numba" not in available_backends(), reason="numba is not installed")
+
+
+def _inflows(*shape: int) -> np.ndarray:
+    # Sparse pulses so that high-x reaches trigger the zero clamp.
+    rng = np.random.default_rng(31)
+    return np.where(rng.random(shape) < 0.2, rng.gamma(0.5, 400.0, size=shape), 0.0)
+
+
+def _on_each_backend(run):
+    results = {}
+    for name in available_backends():
+        with use_backend(name):
+            results[name] = run()
+    return results
+
+
+class TestBackendSelection:
+    def test_numpy_is_always_available(self):
+        assert "numpy" in available_backends()
+
+    def test_default_prefers_numba_when_installed(self):
+        expected = "numba" if "numba" in available_backends() else "numpy"
+        assert get_backend() == expected
+
+    def test_unknown_backend_raises(self):
+        with pytest.raises(ValueError, match="backend must be one of"):
+            set_backend("cuda")  # type: ignore[arg-type]
+
+    def test_use_backend_restores_previous(self):
+        previous = get_backend()
+        with use_backend("numpy"):
+            assert get_backend() == "numpy"
+        assert get_backend() == previous
+
+
+@requires_numba
+class TestBackendParity:
+    @pytest.mark.parametrize(("k", "x"), [(1.0, 0.2), (2.0, 0.5), (0.3, 0.45), (10.0, 0.0)])
+    def test_muskingum_route_series(self, k: float, x: float):
+        m = Muskingum(k=k, x=x)
+        inflows = _inflows(5_000)
+        results = _on_each_backend(lambda: m.route_series(inflows, MuskingumState(3.0, 2.0)))
+        assert results["numba"][0].tolist() == results["numpy"][0].tolist()
+        assert results["numba"][1] == results["numpy"][1]
+
+    def test_muskingum_route_ensemble(self):
+        m = Muskingum(k=2.0, x=0.45)
+        inflows = _inflows(8, 1_000)
+        results = _on_each_backend(lambda: m.route_ensemble(inflows, m.initial_ensemble_state(8)))
+        assert results["numba"][0].tolist() == results["numpy"][0].tolist()
+        assert results["numba"][1].prev_outflow.tolist() == results["numpy"][1].prev_outflow.tolist()
+
+    def test_muskingum_sweep(self):
+        k, x = np.meshgrid(np.linspace(0.2, 6.0, 7), np.linspace(0.0, 0.5, 6), indexing="ij")
+        inflows = _inflows(1_000)
+        results = _on_each_backend(lambda: Muskingum.sweep(k, x, inflows))
+        assert results["numba"].tolist() == results["numpy"].tolist()
+
+    def test_linear_reservoir_sweep(self):
+        k = np.linspace(0.1, 30.0, 9)
+        inflows = _inflows(1_000)
+        results = _on_each_backend(lambda: LinearReservoir.sweep(k, inflows))
+        assert results["numba"].tolist() == results["numpy"].tolist()
+
+    def test_muskingum_route_with_loss(self):
+        m = Muskingum(k=2.0, x=0.5)
+        inflows = _inflows(5_000)
+        results = _on_each_backend(lambda: m.route_with_loss(inflows, MuskingumState(3.0, 2.0), ConstantFraction(0.1)))
+        assert results["numba"][0].tolist() == results["numpy"][0].tolist()
+        assert results["numba"][1].tolist() == results["numpy"][1].tolist()
+        assert results["numba"][2] == results["numpy"][2]
+
+    def test_linear_reservoir_route_with_loss(self):
+        r = LinearReservoir(k=4.0)
+        inflows = _inflows(5_000)
+        results = _on_each_backend(lambda: r.route_with_loss(inflows, 10.0, ConstantFraction(0.1)))
+        assert results["numba"][0].tolist() == results["numpy"][0].tolist()
+        assert results["numba"][1].tolist() == results["numpy"][1].tolist()
+        assert results["numba"][2] == results["numpy"][2]
+
+    @pytest.mark.parametrize(("k", "x", "substeps"), [(2.0, 0.5, 1), (0.4, 0.1, 2)])
+    def test_muskingum_route_sensitivity(self, k: float, x: float, substeps: int):
+        m = Muskingum(k=k, x=x, substeps=substeps)
+        inflows = _inflows(5_000)
+        results = _on_each_backend(lambda: m.route_sensitivity(inflows, MuskingumState(3.0, 2.0)))
+        assert results["numba"][0].tolist() == results["numpy"][0].tolist()
+        assert results["numba"][1].tolist() == results["numpy"][1].tolist()
+
+    @pytest.mark.parametrize(("k", "n"), [(0.3, 1), (2.0, 3), (12.0, 6)])
+    def test_nash_cascade_route_series(self, k: float, n: int):
+        m = NashCascade(k=k, n=n)
+        inflows = _inflows(2_000)
+        state = np.linspace(1.0, 5.0, n)
+        results = _on_each_backend(lambda: m.route_series(inflows, state))
+        assert results["numba"][0].tolist() == results["numpy"][0].tolist()
+        assert results["numba"][1] == results["numpy"][1]
+
+    def test_nash_cascade_route_ensemble(self):
+        m = NashCascade(k=2.0, n=4, initial_flow=3.0)
+        inflows = _inflows(8, 500)
+        results = _on_each_backend(lambda: m.route_ensemble(inflows, m.initial_ensemble_state(8)))
+        assert results["numba"][0].tolist() == results["numpy"][0].tolist()
+        assert results["numba"][1].tolist() == results["numpy"][1].tolist()
+
+    def test_nash_cascade_route_group(self):
+        models = [NashCascade(k=2.0, n=3), NashCascade(k=0.5, n=3, initial_flow=2.0), NashCascade(k=4.0, n=1)]
+        inflows = _inflows(3, 500)
+        results = _on_each_backend(lambda: NashCascade.route_group(models, inflows))
+        assert results["numba"].tolist() == results["numpy"].tolist()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from taqsim_hydrology.routing import Lag, LinearReservoir, Muskingum, calibrate, mse_gradient
+
+
+def _inflows(n_steps: int = 2_000) -> np.ndarray:
+    return np.random.default_rng(11).gamma(0.5, 40.0, size=n_steps)
+
+
+def _observed(model, inflows: np.ndarray) -> np.ndarray:
+    outflows, _ = model.route_series(inflows, model.initial_state(None))
+    return outflows
+
+
+class TestMseGradient:
+    def test_matches_finite_differences(self):
+        inflows = _inflows(500)
+        observed = _observed(Muskingum(k=4.0, x=0.3), inflows)
+        m = Muskingum(k=2.0, x=0.1)
+        _, gradient = mse_gradient(m, inflows, observed)
+        h = 1e-6
+        for column, name in enumerate(("k", "x")):
+            up, _ = mse_gradient(Muskingum(**{"k": 2.0, "x": 0.1, name: getattr(m, name) + h}), inflows, observed)
+            down, _ = mse_gradient(Muskingum(**{"k": 2.0, "x": 0.1, name: getattr(m, name) - h}), inflows, observed)
+            assert gradient[column] == pytest.approx((up - down) / (2 * h), rel=1e-5)
+
+    def test_missing_observations_are_skipped(self):
+        inflows = _inflows(100)
+        observed = _observed(LinearReservoir(k=3.0), inflows)
+        observed[::2] = np.nan
+        loss, gradient = mse_gradient(LinearReservoir(k=3.0), inflows, observed)
+        assert loss == pytest.approx(0.0, abs=1e-20)
+        assert gradient[0] == pytest.approx(0.0, abs=1e-9)
+
+    def test_shape_mismatch_raises(self):
+        with pytest.raises(ValueError, match="observed must have shape"):
+            mse_gradient(LinearReservoir(k=3.0), np.ones(10), np.ones(9))
+
+    def test_all_missing_raises(self):
+        with pytest.raises(ValueError, match="observed holds no values"):
+            mse_gradient(LinearReservoir(k=3.0), np.ones(3), np.full(3, np.nan))
+
+    def test_model_without_sensitivities_raises(self):
+        with pytest.raises(TypeError, match="does not support parameter sensitivities"):
+            mse_gradient(Lag(lag=2), np.ones(3), np.ones(3))
+
+
+class TestCalibrate:
+    @pytest.mark.parametrize(
+        ("true", "guess"),
+        [
+            (Muskingum(k=6.0, x=0.25), Muskingum(k=1.0, x=0.0)),
+            (Muskingum(k=30.0, x=0.1, initial_flow=3.0), Muskingum(k=2.0, x=0.4, initial_flow=3.0)),
+            (Muskingum(k=0.4, x=0.2, substeps=2), Muskingum(k=2.0, x=0.0, substeps=2)),
+            (LinearReservoir(k=12.0), LinearReservoir(k=1.0)),
+            (LinearReservoir(k=5.0, initial_flow=20.0), LinearReservoir(k=50.0, initial_flow=20.0)),
+        ],
+    )
+    def test_recovers_parameters_in_tens_of_evaluations(self, true, guess):
+        inflows = _inflows()
+        result = calibrate(guess, inflows, _observed(true, inflows))
+        assert result.converged
+        assert result.evaluations <= 40
+        for name in type(true).parameter_bounds:
+            assert getattr(result.model, name) == pytest.approx(getattr(true, name), rel=1e-4)
+
+    def test_bounds_are_respected(self):
+        inflows = _inflows()
+        result = calibrate(
+            Muskingum(k=2.0), inflows, _observed(Muskingum(k=4.0, x=0.4), inflows), bounds={"x": (0.0, 0.2)}
+        )
+        assert result.model.x == 0.2
+
+    def test_fixed_parameters_are_left_alone(self):
+        inflows = _inflows()
+        observed = _observed(Muskingum(k=4.0, x=0.3), inflows)
+        result = calibrate(Muskingum(k=1.0, x=0.3), inflows, observed, parameters=["k"])
+        assert result.model.x == 0.3
+        assert result.model.k == pytest.approx(4.0, rel=1e-4)
+        assert list(result.gradient) == ["k"]
+
+    def test_start_outside_bounds_is_clipped(self):
+        inflows = _inflows()
+        observed = _observed(LinearReservoir(k=3.0), inflows)
+        result = calibrate(LinearReservoir(k=100.0), inflows, observed, bounds={"k": (1.0, 10.0)})
+        assert result.model.k == pytest.approx(3.0, rel=1e-4)
+
+    def test_loose_bounds_raise(self):
+        with pytest.raises(ValueError, match="bounds for x must lie within"):
+            calibrate(Muskingum(k=2.0), np.ones(5), np.ones(5), bounds={"x": (0.0, 0.8)})
+
+    def test_unknown_parameter_raises(self):
+        with pytest.raises(ValueError, match="no calibratable parameters \\['x'\\]"):
+            calibrate(LinearReservoir(k=2.0), np.ones(5), np.ones(5), parameters=["x"])
+
+    def test_model_without_bounds_raises(self):
+        with pytest.raises(TypeError, match="does not support calibration"):
+            calibrate(Lag(lag=2), np.ones(5), np.ones(5))
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import json
+import pickle
+from collections import deque
+
+import numpy as np
+import pytest
+from taqsim.node.reach import Reach
+from taqsim.node.strategies import NoReachLoss
+from taqsim.time import Frequency, Timestep
+
+from taqsim_hydrology.routing import Lag, LagBuffer, LinearReservoir, Muskingum, MuskingumState, StateCodec
+from taqsim_hydrology.routing.network import NetworkReach, RoutingNetwork
+
+
+def _ts(i: int) -> Timestep:
+    return Timestep(index=i, frequency=Frequency.DAILY)
+
+
+def _reaches() -> list[Reach]:
+    models = {
+        "musk": Muskingum(k=2.0, x=0.2),
+        "res": LinearReservoir(k=4.0),
+        "lag": Lag(lag=3),
+        "ring": Lag(lag=4, ring_buffer=True),
+        "none": Lag(lag=0),
+    }
+    return [Reach(id=reach_id, routing_model=model, loss_rule=NoReachLoss()) for reach_id, model in models.items()]
+
+
+def _spun_up(reaches: list[Reach], n_steps: int = 50) -> dict[str, object]:
+    inflows = np.random.default_rng(5).gamma(0.5, 40.0, size=n_steps).tolist()
+    states = {}
+    for reach in reaches:
+        model = reach.routing_model
+        state = model.initial_state(reach)
+        for i, inflow in enumerate(inflows):
+            _, state = model.route(reach, inflow, state, _ts(i))
+        states[reach.id] = state
+    return states
+
+
+def _continue(reach: Reach, state: object, n_steps: int = 20) -> list[float]:
+    outflows = []
+    for i in range(n_steps):
+        outflow, state = reach.routing_model.route(reach, 10.0 + i, state, _ts(i))
+        outflows.append(outflow)
+    return outflows
+
+
+class TestStateCodecLayout:
+    def test_offsets_are_contiguous(self):
+        codec = StateCodec.from_reaches(_reaches())
+        assert codec.index == {"musk": (0, 2), "res": (2, 1), "lag": (3, 3), "ring": (6, 4), "none": (10, 0)}
+        assert codec.size == 10
+
+    def test_from_network_uses_reach_ids(self):
+        network = RoutingNetwork([NetworkReach("a", Muskingum(k=1.0)), NetworkReach("b", Lag(lag=2), ("a",))])
+        assert StateCodec.from_network(network).index == {"a": (0, 2), "b": (2, 2)}
+
+    def test_model_without_packing_raises(self):
+        with pytest.raises(TypeError, match="does not support state packing"):
+            StateCodec({"a": object()})
+
+
+class TestStateCodecFrozen:
+    def test_hashable_and_equal_by_ordered_models(self):
+        models = {"a": Muskingum(k=1.0), "b": Lag(lag=2)}
+        codec = StateCodec(models)
+        assert codec == StateCodec(dict(models)) and hash(codec) == hash(StateCodec(dict(models)))
+        assert codec != StateCodec({"b": Lag(lag=2), "a": Muskingum(k=1.0)})
+        assert {codec: "layout"}[StateCodec(dict(models))] == "layout"
+
+    def test_models_are_read_only_and_copied(self):
+        models = {"a": Muskingum(k=1.0)}
+        codec = StateCodec(models)
+        models["b"] = Lag(lag=2)
+        assert list(codec.models) == ["a"]
+        with pytest.raises(TypeError):
+            codec.models["b"] = Lag(lag=2)  # type: ignore[index]
+
+    def test_pickle_round_trip(self):
+        codec = StateCodec.from_reaches(_reaches())
+        restored = pickle.loads(pickle.dumps(codec))
+        assert restored == codec
+        assert restored.index == codec.index
+
+
+class TestStateCodecRoundTrip:
+    def test_unpacked_states_continue_identically(self):
+        reaches = _reaches()
+        states = _spun_up(reaches)
+        codec = StateCodec.from_reaches(reaches)
+
+        restored = codec.unpack(codec.pack(states))
+
+        for reach in reaches:
+            assert _continue(reach, restored[reach.id]) == _continue(reach, states[reach.id])
+
+    def test_unpacked_state_types_match_initial_state(self):
+        reaches = _reaches()
+        codec = StateCodec.from_reaches(reaches)
+        restored = codec.unpack(codec.pack(_spun_up(reaches)))
+        assert isinstance(restored["musk"], MuskingumState)
+        assert isinstance(restored["res"], float)
+        assert isinstance(restored["lag"], deque)
+        assert restored["lag"].maxlen == 3
+        assert isinstance(restored["ring"], LagBuffer)
+
+    def test_ring_buffer_packs_oldest_first(self):
+        codec = StateCodec({"ring": Lag(lag=3, ring_buffer=True)})
+        buffer = LagBuffer.zeros(3)
+        for value in (1.0, 2.0, 3.0, 4.0):
+            buffer.push(value)
+        assert codec.pack({"ring": buffer}).tolist() == [2.0, 3.0, 4.0]
+
+    def test_pack_into_existing_buffer(self):
+        codec = StateCodec({"res": LinearReservoir(k=2.0), "musk": Muskingum(k=1.0)})
+        out = np.zeros(3)
+        assert codec.pack({"res": 5.0, "musk": MuskingumState(1.0, 2.0)}, out=out) is out
+        assert out.tolist() == [5.0, 1.0, 2.0]
+
+    def test_missing_and_unknown_states_raise(self):
+        codec = StateCodec({"res": LinearReservoir(k=2.0)})
+        with pytest.raises(ValueError, match="no state given for reaches"):
+            codec.pack({})
+        with pytest.raises(ValueError, match="unknown reaches"):
+            codec.pack({"res": 1.0, "other": 2.0})
+
+    def test_wrong_buffer_shape_raises(self):
+        codec = StateCodec({"res": LinearReservoir(k=2.0)})
+        with pytest.raises(ValueError, match=r"buffer must have shape \(1,\)"):
+            codec.unpack(np.zeros(2))
+
+    def test_buffer_is_much_smaller_than_pickle(self):
+        reaches = [
+            Reach(id=f"r{i}", routing_model=Muskingum(k=1.0 + i % 3, x=0.1), loss_rule=NoReachLoss())
+            for i in range(1000)
+        ]
+        states = _spun_up(reaches, n_steps=3)
+        assert StateCodec.from_reaches(reaches).pack(states).nbytes < len(pickle.dumps(states))
+
+
+class TestStateCodecCheckpoint:
+    def test_save_and_memory_mapped_load(self, tmp_path):
+        reaches = _reaches()
+        states = _spun_up(reaches)
+        codec = StateCodec.from_reaches(reaches)
+
+        path = codec.save(tmp_path / "spinup.npy", states)
+        buffer = codec.load_buffer(path)
+        restored = codec.load(path)
+
+        assert isinstance(buffer, np.memmap)
+        assert not buffer.flags.writeable
+        for reach in reaches:
+            assert _continue(reach, restored[reach.id]) == _continue(reach, states[reach.id])
+
+    def test_restored_states_do_not_share_mutable_buffers(self, tmp_path):
+        codec = StateCodec({"lag": Lag(lag=2)})
+        path = codec.save(tmp_path / "c.npy", {"lag": deque([1.0, 2.0], maxlen=2)})
+        first, second = codec.load(path), codec.load(path)
+        first["lag"].append(9.0)
+        assert list(second["lag"]) == [1.0, 2.0]
+
+    def test_different_parameters_same_layout_loads(self, tmp_path):
+        path = StateCodec({"a": Muskingum(k=1.0, x=0.1)}).save(tmp_path / "c.npy", {"a": MuskingumState(3.0, 4.0)})
+        assert StateCodec({"a": Muskingum(k=5.0, x=0.4)}).load(path) == {"a": MuskingumState(3.0, 4.0)}
+
+    def test_layout_mismatch_raises(self, tmp_path):
+        path = StateCodec({"a": Lag(lag=2)}).save(tmp_path / "c.npy", {"a": deque([1.0, 2.0], maxlen=2)})
+        with pytest.raises(ValueError, match=r"does not match .* at reaches \['a'\]"):
+            StateCodec({"a": Lag(lag=3)}).load(path)
+
+    def test_layout_file_is_readable_json(self, tmp_path):
+        StateCodec({"a": LinearReservoir(k=1.0)}).save(tmp_path / "c.npy", {"a": 2.0})
+        layout = json.loads((tmp_path / "c.npy.layout.json").read_text())
+        assert layout["reaches"] == [{"id": "a", "type": "LinearReservoir", "offset": 0, "size": 1}]
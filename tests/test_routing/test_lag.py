@@ -1,11 +1,14 @@
+import math
 from collections import deque
 
+import numpy as np
 import pytest
 from taqsim.node.reach import Reach
 from taqsim.node.strategies import NoReachLoss
 from taqsim.time import Frequency, Timestep
 
-from taqsim_hydrology.routing.lag import Lag
+from taqsim_hydrology.losses.constant_fraction import ConstantFraction
+from taqsim_hydrology.routing.lag import Lag, LagBuffer
 
 
 def _make_reach(lag: Lag) -> Reach:
@@ -108,3 +111,237 @@ class TestLag:
         # First `lag` timesteps produce 0, then constant thereafter
         assert outflows[:lag_amount] == [0.0] * lag_amount
         assert all(o == pytest.approx(constant) for o in outflows[lag_amount:])
+
+
+class TestLagRouteSeries:
+    @pytest.mark.parametrize("lag_amount", [0, 1, 3, 12])
+    def test_matches_per_step_route_exactly(self, lag_amount: int) -> None:
+        lag = Lag(lag=lag_amount)
+        reach = _make_reach(lag)
+        inflows = np.random.default_rng(3).gamma(0.5, 40.0, size=50)
+
+        state = lag.initial_state(reach)
+        expected = _run_sequence(lag, inflows.tolist())
+        for i, inflow in enumerate(inflows.tolist()):
+            _, state = lag.route(reach, inflow, state, _ts(i))
+
+        outflows, final_state = lag.route_series(inflows, lag.initial_state(reach))
+
+        assert outflows.tolist() == expected
+        assert list(final_state) == list(state)
+        assert final_state.maxlen == lag_amount
+
+    def test_series_shorter_than_lag_keeps_buffered_inflows(self) -> None:
+        lag = Lag(lag=4)
+        state = lag.initial_state(_make_reach(lag))
+        outflows, state = lag.route_series([1.0, 2.0], state)
+        assert outflows.tolist() == [0.0, 0.0]
+        assert list(state) == [0.0, 0.0, 1.0, 2.0]
+
+    def test_split_series_continues_from_state(self) -> None:
+        lag = Lag(lag=3)
+        inflows = np.arange(1.0, 11.0)
+        head, state = lag.route_series(inflows[:4], lag.initial_state(_make_reach(lag)))
+        tail, state = lag.route_series(inflows[4:], state)
+        assert np.concatenate((head, tail)).tolist() == [0.0, 0.0, 0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0]
+        assert list(state) == [8.0, 9.0, 10.0]
+
+    def test_mass_conservation(self) -> None:
+        lag = Lag(lag=3)
+        inflows = np.array([100.0, 200.0, 300.0, 400.0, 500.0])
+        outflows, state = lag.route_series(inflows, lag.initial_state(_make_reach(lag)))
+        assert outflows.sum() + lag.storage(state) == pytest.approx(inflows.sum())
+
+
+class TestLagRouteConvolved:
+    @pytest.mark.parametrize("ring_buffer", [False, True])
+    def test_matches_route_series_exactly(self, ring_buffer: bool) -> None:
+        lag = Lag(lag=4, ring_buffer=ring_buffer)
+        inflows = np.arange(1.0, 21.0)
+        recursive, recursive_state = lag.route_series(inflows, lag.steady_state(3.0))
+        convolved, convolved_state = lag.route_convolved(inflows, lag.steady_state(3.0))
+        assert convolved.tolist() == recursive.tolist()
+        assert list(convolved_state) == list(recursive_state)
+
+    @pytest.mark.parametrize("lag_amount", [0, 1, 5])
+    def test_impulse_response_is_a_unit_tap_at_the_lag(self, lag_amount: int) -> None:
+        kernel = Lag(lag=lag_amount).impulse_response()
+        assert kernel.tolist() == [0.0] * lag_amount + [1.0]
+
+    def test_impulse_response_max_length_keeps_the_leading_taps(self) -> None:
+        assert Lag(lag=5).impulse_response(max_length=3).tolist() == [0.0, 0.0, 0.0]
+        with pytest.raises(ValueError, match="max_length must be at least 1, got 0"):
+            Lag(lag=5).impulse_response(max_length=0)
+
+    def test_invalid_tolerance_raises(self) -> None:
+        with pytest.raises(ValueError, match="tol must be in"):
+            Lag(lag=2).route_convolved([1.0], Lag(lag=2).initial_state(None), tol=0.0)
+
+
+class TestLagRouteWithLoss:
+    @pytest.mark.parametrize("ring_buffer", [False, True])
+    @pytest.mark.parametrize("n", [0, 1, 4])
+    def test_matches_per_step_route_and_loss_exactly(self, n: int, ring_buffer: bool) -> None:
+        lag = Lag(lag=n, ring_buffer=ring_buffer)
+        loss = ConstantFraction(0.3)
+        inflows = np.random.default_rng(9).uniform(0.0, 100.0, size=60)
+
+        routed = _run_sequence(lag, inflows.tolist())
+        expected_loss = [sum(loss.calculate(_make_reach(lag), q, _ts(i)).values()) for i, q in enumerate(routed)]
+        expected_net = [q - lost for q, lost in zip(routed, expected_loss, strict=True)]
+
+        net, losses, state = lag.route_with_loss(inflows, lag.initial_state(_make_reach(lag)), loss)
+
+        assert net.tolist() == expected_net
+        assert losses.tolist() == expected_loss
+        assert list(state) == inflows[len(inflows) - n :].tolist()
+
+
+class TestLagRouteEnsemble:
+    def test_initial_ensemble_state_shape(self) -> None:
+        state = Lag(lag=3).initial_ensemble_state(5)
+        assert state.shape == (5, 3)
+        assert not state.any()
+
+    @pytest.mark.parametrize("lag_amount", [0, 1, 4])
+    def test_each_member_matches_route_series(self, lag_amount: int) -> None:
+        lag = Lag(lag=lag_amount)
+        inflows = np.random.default_rng(9).gamma(0.5, 40.0, size=(4, 30))
+
+        outflows, state = lag.route_ensemble(inflows, lag.initial_ensemble_state(4))
+
+        assert outflows.shape == (4, 30)
+        for member in range(4):
+            expected, member_state = lag.route_series(inflows[member], lag.initial_state(_make_reach(lag)))
+            assert outflows[member].tolist() == expected.tolist()
+            assert state[member].tolist() == list(member_state)
+
+    def test_storage_is_per_member(self) -> None:
+        lag = Lag(lag=2)
+        inflows = np.array([[1.0, 2.0, 3.0], [10.0, 20.0, 30.0]])
+        outflows, state = lag.route_ensemble(inflows, lag.initial_ensemble_state(2))
+        assert outflows.tolist() == [[0.0, 0.0, 1.0], [0.0, 0.0, 10.0]]
+        assert lag.storage(state).tolist() == [5.0, 50.0]
+
+
+class TestLagSweep:
+    def test_each_lag_matches_route_series(self) -> None:
+        lags = np.array([0, 1, 3, 7])
+        inflows = np.random.default_rng(19).gamma(0.5, 40.0, size=20)
+
+        outflows = Lag.sweep(lags, inflows)
+
+        assert outflows.shape == (4, 20)
+        for i, lag_amount in enumerate(lags.tolist()):
+            lag = Lag(lag=lag_amount)
+            expected, _ = lag.route_series(inflows, lag.initial_state(_make_reach(lag)))
+            assert outflows[i].tolist() == expected.tolist()
+
+    def test_lag_longer_than_series_outputs_zeros(self) -> None:
+        assert Lag.sweep([5], [1.0, 2.0]).tolist() == [[0.0, 0.0]]
+
+    def test_negative_lag_raises(self) -> None:
+        with pytest.raises(ValueError, match="lag must be non-negative, got -2"):
+            Lag.sweep([1, -2], [1.0, 2.0])
+
+    def test_non_integer_lag_raises(self) -> None:
+        with pytest.raises(TypeError, match="lag must be an integer array"):
+            Lag.sweep([1.5], [1.0, 2.0])
+
+
+class TestLagRingBuffer:
+    def test_initial_state_is_zeroed_buffer(self) -> None:
+        lag = Lag(lag=4, ring_buffer=True)
+        state = lag.initial_state(_make_reach(lag))
+        assert isinstance(state, LagBuffer)
+        assert len(state) == 4
+        assert list(state) == [0.0, 0.0, 0.0, 0.0]
+        assert lag.storage(state) == 0.0
+
+    @pytest.mark.parametrize(("lag_amount", "flow"), [(0, 2.0), (5, 0.0), (7, 0.1), (240, 1e-3), (3, 1e9)])
+    def test_steady_state_matches_buffer_built_from_values(self, lag_amount: int, flow: float) -> None:
+        lag = Lag(lag=lag_amount, ring_buffer=True)
+        state = lag.steady_state(flow)
+        expected = LagBuffer.from_values([flow] * lag_amount)
+        assert list(state) == list(expected)
+        assert lag.storage(state) == lag.storage(expected) == math.fsum([flow] * lag_amount)
+
+    @pytest.mark.parametrize("lag_amount", [0, 1, 3, 12])
+    def test_matches_deque_path(self, lag_amount: int) -> None:
+        inflows = np.random.default_rng(23).gamma(0.5, 40.0, size=100).tolist()
+        assert _run_sequence(Lag(lag=lag_amount, ring_buffer=True), inflows) == _run_sequence(
+            Lag(lag=lag_amount), inflows
+        )
+
+    def test_state_iterates_oldest_first(self) -> None:
+        lag = Lag(lag=3, ring_buffer=True)
+        reach = _make_reach(lag)
+        state = lag.initial_state(reach)
+        for i, inflow in enumerate([1.0, 2.0, 3.0, 4.0]):
+            _, state = lag.route(reach, inflow, state, _ts(i))
+        assert list(state) == [2.0, 3.0, 4.0]
+        assert lag.storage(state) == pytest.approx(9.0)
+
+    def test_running_total_is_reanchored_every_revolution(self) -> None:
+        lag = Lag(lag=240, ring_buffer=True)
+        reach = _make_reach(lag)
+        state = lag.initial_state(reach)
+        rng = np.random.default_rng(29)
+        # Mix of large floods and tiny baseflows maximises cancellation in a naive running sum.
+        inflows = np.where(rng.random(100_000) < 0.01, 1e9, rng.random(100_000) * 1e-3).tolist()
+        # Within a revolution the plain running total drifts by at most one rounding per step.
+        drift = 2 * 240 * np.finfo(np.float64).eps * 1e9
+        for i, inflow in enumerate(inflows):
+            _, state = lag.route(reach, inflow, state, _ts(i))
+            if (i + 1) % 240 == 0:
+                assert lag.storage(state) == math.fsum(state)
+            elif i % 997 == 0:
+                assert lag.storage(state) == pytest.approx(math.fsum(state), rel=0, abs=drift)
+        assert lag.storage(state) == pytest.approx(math.fsum(inflows[-240:]), rel=0, abs=drift)
+
+    def test_mass_conservation(self) -> None:
+        lag = Lag(lag=3, ring_buffer=True)
+        reach = _make_reach(lag)
+        state = lag.initial_state(reach)
+        inflows = [100.0, 200.0, 300.0, 400.0, 500.0]
+        total_outflow = 0.0
+        for i, inflow in enumerate(inflows):
+            outflow, state = lag.route(reach, inflow, state, _ts(i))
+            total_outflow += outflow
+        assert total_outflow + lag.storage(state) == pytest.approx(sum(inflows))
+
+    def test_route_series_continues_ring_buffer(self) -> None:
+        lag = Lag(lag=3, ring_buffer=True)
+        reach = _make_reach(lag)
+        state = lag.initial_state(reach)
+        _, state = lag.route(reach, 1.0, state, _ts(0))
+        outflows, state = lag.route_series([2.0, 3.0, 4.0, 5.0], state)
+        assert isinstance(state, LagBuffer)
+        assert outflows.tolist() == [0.0, 0.0, 1.0, 2.0]
+        assert list(state) == [3.0, 4.0, 5.0]
+        assert lag.storage(state) == pytest.approx(12.0)
+        outflow, state = lag.route(reach, 6.0, state, _ts(5))
+        assert outflow == 3.0
+
+
+class TestLagSteadyState:
+    def test_negative_initial_flow_raises(self) -> None:
+        with pytest.raises(ValueError, match="initial_flow must be finite and non-negative"):
+            Lag(lag=2, initial_flow=-1.0)
+
+    @pytest.mark.parametrize("ring_buffer", [False, True])
+    def test_buffer_is_filled_with_initial_flow(self, ring_buffer: bool) -> None:
+        lag = Lag(lag=3, ring_buffer=ring_buffer, initial_flow=7.0)
+        state = lag.initial_state(_make_reach(lag))
+        assert list(state) == [7.0, 7.0, 7.0]
+        assert lag.storage(state) == 21.0
+        assert _run_sequence(lag, [1.0, 2.0, 3.0, 4.0]) == [7.0, 7.0, 7.0, 1.0]
+
+    def test_zero_lag_steady_state_is_empty(self) -> None:
+        assert list(Lag(lag=0, initial_flow=5.0).steady_state(5.0)) == []
+
+    def test_ensemble_and_group_start_from_initial_flow(self) -> None:
+        lag = Lag(lag=2, initial_flow=4.0)
+        assert lag.initial_ensemble_state(2).tolist() == [[4.0, 4.0], [4.0, 4.0]]
+        grouped = Lag.route_group([lag, Lag(lag=1)], np.array([[1.0, 2.0, 3.0], [1.0, 2.0, 3.0]]))
+        assert grouped.tolist() == [[4.0, 4.0, 1.0], [0.0, 1.0, 2.0]]
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 import math
+import pickle
 
+import numpy as np
 import pytest
 from taqsim.node.reach import Reach
 from taqsim.node.strategies import NoReachLoss
 from taqsim.time import Frequency, Timestep
 
+from taqsim_hydrology.losses.constant_fraction import ConstantFraction
 from taqsim_hydrology.routing.linear_reservoir import LinearReservoir
 
 
@@ -119,6 +122,18 @@ class TestLinearReservoir:
         with pytest.raises(AttributeError):
             model.k = 5.0  # type: ignore[misc]
 
+    def test_hashable_and_equal_by_k(self) -> None:
+        assert LinearReservoir(k=2.0) == LinearReservoir(k=2.0)
+        assert hash(LinearReservoir(k=2.0)) == hash(LinearReservoir(k=2.0))
+        assert repr(LinearReservoir(k=2.0)) == "LinearReservoir(k=2.0, initial_flow=0.0)"
+
+    def test_pickle_round_trip(self) -> None:
+        model = LinearReservoir(k=2.0)
+        restored = pickle.loads(pickle.dumps(model))
+        reach = _make_reach(k=2.0)
+        assert restored == model
+        assert restored.route(reach, 10.0, 5.0, _ts(0)) == model.route(reach, 10.0, 5.0, _ts(0))
+
     def test_zero_inflow_with_existing_storage(self) -> None:
         k = 2.0
         model = LinearReservoir(k=k)
@@ -133,3 +148,223 @@ class TestLinearReservoir:
         assert outflow > 0.0
         assert new_state < state
         assert outflow + new_state == pytest.approx(state, rel=1e-10)
+
+
+class TestLinearReservoirRouteSeries:
+    @pytest.mark.parametrize("k", [0.1, 1.0, 3.0, 25.0])
+    def test_matches_per_step_route_exactly(self, k: float) -> None:
+        model = LinearReservoir(k=k)
+        reach = _make_reach(k=k)
+        inflows = np.random.default_rng(7).gamma(0.5, 40.0, size=500)
+
+        state = model.initial_state(reach)
+        expected: list[float] = []
+        for i, inflow in enumerate(inflows.tolist()):
+            outflow, state = model.route(reach, inflow, state, _ts(i))
+            expected.append(outflow)
+
+        outflows, final_state = model.route_series(inflows, model.initial_state(reach))
+
+        assert outflows.tolist() == expected
+        assert final_state == state
+
+    def test_starts_from_carried_storage(self) -> None:
+        model = LinearReservoir(k=2.0)
+        outflows, final_state = model.route_series(np.zeros(3), 100.0)
+        assert outflows.sum() + final_state == pytest.approx(100.0, rel=1e-12)
+        assert outflows[0] == pytest.approx(100.0 * (1 - math.exp(-0.5)), rel=1e-12)
+
+    def test_mass_conservation(self) -> None:
+        model = LinearReservoir(k=3.0)
+        inflows = np.array([100.0] * 5 + [0.0] * 50)
+        outflows, final_state = model.route_series(inflows, 0.0)
+        assert outflows.sum() + final_state == pytest.approx(inflows.sum(), rel=1e-10)
+
+    def test_empty_series_returns_state_unchanged(self) -> None:
+        model = LinearReservoir(k=2.0)
+        outflows, final_state = model.route_series([], 12.5)
+        assert outflows.shape == (0,)
+        assert final_state == 12.5
+
+
+class TestLinearReservoirRouteConvolved:
+    @pytest.mark.parametrize("k", [0.05, 1.0, 5.0, 200.0])
+    def test_matches_recursive_routing(self, k: float) -> None:
+        lr = LinearReservoir(k=k)
+        inflows = np.random.default_rng(7).gamma(0.5, 40.0, size=3_000)
+        recursive, recursive_state = lr.route_series(inflows, 25.0)
+        convolved, convolved_state = lr.route_convolved(inflows, 25.0)
+        scale = inflows.max()
+        np.testing.assert_allclose(convolved, recursive, rtol=0, atol=1e-9 * scale)
+        assert convolved_state == pytest.approx(recursive_state, abs=1e-9 * scale * k)
+
+    def test_series_shorter_than_kernel(self) -> None:
+        lr = LinearReservoir(k=50.0)
+        inflows = np.linspace(0.0, 10.0, lr.impulse_response().size // 4)
+        recursive, recursive_state = lr.route_series(inflows, 100.0)
+        convolved, convolved_state = lr.route_convolved(inflows, 100.0)
+        np.testing.assert_allclose(convolved, recursive, rtol=0, atol=1e-9)
+        assert convolved_state == pytest.approx(recursive_state, abs=1e-9)
+
+    def test_slow_reservoir_only_builds_the_taps_it_applies(self) -> None:
+        # The full kernel for k = 1e6 would hold ~3e7 taps; only the first 100 reach a 100-step series.
+        lr = LinearReservoir(k=1e6)
+        recursive, recursive_state = lr.route_series(np.ones(100), 0.0)
+        convolved, convolved_state = lr.route_convolved(np.ones(100), 0.0)
+        np.testing.assert_allclose(convolved, recursive, rtol=0, atol=1e-12)
+        assert convolved_state == pytest.approx(recursive_state, rel=1e-12)
+
+    def test_empty_series_returns_state_unchanged(self) -> None:
+        outflows, state = LinearReservoir(k=2.0).route_convolved(np.array([]), 7.0)
+        assert outflows.size == 0
+        assert state == 7.0
+
+
+class TestLinearReservoirImpulseResponse:
+    @pytest.mark.parametrize("k", [0.1, 3.0, 40.0])
+    def test_is_the_routed_unit_pulse(self, k: float) -> None:
+        lr = LinearReservoir(k=k)
+        kernel = lr.impulse_response()
+        pulse = np.zeros(kernel.size)
+        pulse[0] = 1.0
+        routed, _ = lr.route_series(pulse, 0.0)
+        np.testing.assert_allclose(kernel, routed, rtol=0, atol=1e-15)
+
+    @pytest.mark.parametrize("tol", [1e-4, 1e-8, 1e-12])
+    def test_truncated_mass_is_within_tolerance(self, tol: float) -> None:
+        kernel = LinearReservoir(k=4.0).impulse_response(tol)
+        assert 1.0 - tol <= kernel.sum() <= 1.0 + 1e-12
+
+    @pytest.mark.parametrize("tol", [0.0, 1.0, -1e-3])
+    def test_invalid_tolerance_raises(self, tol: float) -> None:
+        with pytest.raises(ValueError, match="tol must be in"):
+            LinearReservoir(k=2.0).impulse_response(tol)
+
+    def test_max_length_keeps_the_leading_taps(self) -> None:
+        lr = LinearReservoir(k=4.0)
+        full = lr.impulse_response()
+        assert lr.impulse_response(max_length=5).tolist() == full[:5].tolist()
+        assert lr.impulse_response(max_length=10 * full.size).tolist() == full.tolist()
+
+    def test_max_length_below_one_raises(self) -> None:
+        with pytest.raises(ValueError, match="max_length must be at least 1, got 0"):
+            LinearReservoir(k=2.0).impulse_response(max_length=0)
+
+
+class TestLinearReservoirRouteSensitivity:
+    @pytest.mark.parametrize("k", [0.2, 3.0, 40.0])
+    def test_matches_finite_differences(self, k: float) -> None:
+        lr = LinearReservoir(k=k, initial_flow=7.0)
+        inflows = np.random.default_rng(1).gamma(0.5, 40.0, size=300)
+        outflows, sensitivities = lr.route_sensitivity(inflows)
+        h = 1e-6 * k
+        up, _ = LinearReservoir(k=k + h, initial_flow=7.0).route_sensitivity(inflows)
+        down, _ = LinearReservoir(k=k - h, initial_flow=7.0).route_sensitivity(inflows)
+        expected, _ = lr.route_series(inflows, lr.initial_state(None))
+        np.testing.assert_allclose(outflows, expected, rtol=0, atol=1e-12 * inflows.max())
+        np.testing.assert_allclose(sensitivities[0], (up - down) / (2 * h), rtol=0, atol=1e-6)
+
+    def test_explicit_state_is_held_fixed(self) -> None:
+        inflows = np.random.default_rng(2).gamma(0.5, 40.0, size=50)
+        _, sensitivities = LinearReservoir(k=2.0, initial_flow=4.0).route_sensitivity(inflows, 8.0)
+        up, _ = LinearReservoir(k=2.0 + 1e-6).route_series(inflows, 8.0)
+        down, _ = LinearReservoir(k=2.0 - 1e-6).route_series(inflows, 8.0)
+        np.testing.assert_allclose(sensitivities[0], (up - down) / 2e-6, rtol=0, atol=1e-6)
+
+    def test_empty_series(self) -> None:
+        outflows, sensitivities = LinearReservoir(k=2.0).route_sensitivity([])
+        assert outflows.shape == (0,)
+        assert sensitivities.shape == (1, 0)
+
+
+class TestLinearReservoirRouteWithLoss:
+    @pytest.mark.parametrize("k", [0.5, 3.0, 40.0])
+    def test_matches_per_step_route_and_loss_exactly(self, k: float) -> None:
+        model = LinearReservoir(k=k)
+        loss = ConstantFraction(0.12)
+        reach = Reach(id="r", routing_model=model, loss_rule=loss)
+        inflows = np.random.default_rng(8).gamma(0.5, 40.0, size=400)
+
+        state = 25.0
+        expected_net: list[float] = []
+        expected_loss: list[float] = []
+        for i, inflow in enumerate(inflows.tolist()):
+            outflow, state = model.route(reach, inflow, state, _ts(i))
+            lost = sum(loss.calculate(reach, outflow, _ts(i)).values())
+            expected_net.append(outflow - lost)
+            expected_loss.append(lost)
+
+        net, losses, final_state = model.route_with_loss(inflows, 25.0, loss)
+
+        assert net.tolist() == expected_net
+        assert losses.tolist() == expected_loss
+        assert final_state == state
+
+    def test_empty_series_returns_state_unchanged(self) -> None:
+        net, losses, state = LinearReservoir(k=2.0).route_with_loss([], 7.0, ConstantFraction(0.1))
+        assert net.shape == losses.shape == (0,)
+        assert state == 7.0
+
+
+class TestLinearReservoirRouteEnsemble:
+    def test_initial_ensemble_state_is_zero_per_member(self) -> None:
+        assert LinearReservoir(k=2.0).initial_ensemble_state(3).tolist() == [0.0, 0.0, 0.0]
+
+    @pytest.mark.parametrize("k", [0.1, 2.0, 25.0])
+    def test_each_member_matches_route_series(self, k: float) -> None:
+        model = LinearReservoir(k=k)
+        inflows = np.random.default_rng(5).gamma(0.5, 40.0, size=(5, 200))
+        initial = np.array([0.0, 10.0, 50.0, 0.0, 3.0])
+
+        outflows, state = model.route_ensemble(inflows, initial)
+
+        assert outflows.shape == (5, 200)
+        for member in range(5):
+            expected, member_state = model.route_series(inflows[member], float(initial[member]))
+            assert outflows[member].tolist() == expected.tolist()
+            assert state[member] == member_state
+
+    def test_mass_conservation_per_member(self) -> None:
+        model = LinearReservoir(k=3.0)
+        inflows = np.vstack([np.full(60, 10.0), np.r_[np.full(5, 100.0), np.zeros(55)]])
+        outflows, state = model.route_ensemble(inflows, model.initial_ensemble_state(2))
+        assert (outflows.sum(axis=1) + model.storage(state)).tolist() == pytest.approx(inflows.sum(axis=1).tolist())
+
+
+class TestLinearReservoirSweep:
+    def test_each_k_matches_route_series(self) -> None:
+        k = np.array([0.1, 1.0, 3.0, 25.0])
+        inflows = np.random.default_rng(17).gamma(0.5, 40.0, size=150)
+
+        outflows = LinearReservoir.sweep(k, inflows)
+
+        assert outflows.shape == (4, 150)
+        for i in range(4):
+            expected, _ = LinearReservoir(k=k[i]).route_series(inflows, 0.0)
+            assert outflows[i].tolist() == expected.tolist()
+
+    def test_invalid_k_raises(self) -> None:
+        with pytest.raises(ValueError, match="k must be positive, got 0.0"):
+            LinearReservoir.sweep([1.0, 0.0], [1.0, 2.0])
+
+
+class TestLinearReservoirSteadyState:
+    def test_negative_initial_flow_raises(self) -> None:
+        with pytest.raises(ValueError, match="initial_flow must be finite and non-negative"):
+            LinearReservoir(k=1.0, initial_flow=-0.5)
+
+    def test_steady_storage_is_k_times_flow(self) -> None:
+        model = LinearReservoir(k=6.0, initial_flow=5.0)
+        assert model.initial_state(_make_reach(6.0)) == 30.0
+
+    @pytest.mark.parametrize("k", [0.5, 3.0, 40.0])
+    def test_steady_state_is_a_fixed_point(self, k: float) -> None:
+        model = LinearReservoir(k=k)
+        outflows, storage = model.route_series(np.full(100, 12.0), model.steady_state(12.0))
+        np.testing.assert_allclose(outflows, 12.0, rtol=1e-12)
+        assert storage == pytest.approx(k * 12.0, rel=1e-12)
+
+    def test_ensemble_and_group_start_from_initial_flow(self) -> None:
+        model = LinearReservoir(k=4.0, initial_flow=3.0)
+        assert model.initial_ensemble_state(2).tolist() == [12.0, 12.0]
+        np.testing.assert_allclose(LinearReservoir.route_group([model], np.full((1, 20), 3.0)), 3.0, rtol=1e-12)
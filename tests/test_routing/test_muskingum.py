@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import dataclasses
+import pickle
+
+import numpy as np
 import pytest
 from taqsim.node.reach import Reach
 from taqsim.node.strategies import NoReachLoss
 from taqsim.time import Frequency, Timestep
 
-from taqsim_hydrology.routing.muskingum import Muskingum, MuskingumState
+from taqsim_hydrology.losses.constant_fraction import ConstantFraction
+from taqsim_hydrology.routing.muskingum import Muskingum, MuskingumEnsembleState, MuskingumState, _coefficients
 
 
 def _make_reach(k: float = 1.0, x: float = 0.0) -> Reach:
@@ -59,6 +64,28 @@ class TestMuskingumFrozen:
         with pytest.raises(AttributeError):
             m.x = 0.4  # type: ignore[misc]
 
+    def test_equal_instances_hash_equal(self):
+        assert Muskingum(k=2.0, x=0.3) == Muskingum(k=2.0, x=0.3)
+        assert hash(Muskingum(k=2.0, x=0.3)) == hash(Muskingum(k=2.0, x=0.3))
+
+    def test_pickle_round_trip_keeps_coefficients(self):
+        m = Muskingum(k=2.0, x=0.3)
+        restored = pickle.loads(pickle.dumps(m))
+        reach = Reach(id="r", routing_model=restored, loss_rule=NoReachLoss())
+        state = MuskingumState(40.0, 30.0)
+        assert restored == m
+        assert restored.route(reach, 100.0, state, _ts()) == m.route(reach, 100.0, state, _ts())
+
+    def test_replace_recomputes_coefficients(self):
+        m = dataclasses.replace(Muskingum(k=2.0, x=0.5), k=1.0)
+        reach = Reach(id="r", routing_model=m, loss_rule=NoReachLoss())
+        # k=1, x=0.5 is pure translation: c0=0, c1=1, c2=0
+        outflow, _ = m.route(reach, 0.0, MuskingumState(100.0, 0.0), _ts())
+        assert outflow == pytest.approx(100.0)
+
+    def test_repr_hides_cached_coefficients(self):
+        assert repr(Muskingum(k=2.0, x=0.3)) == "Muskingum(k=2.0, x=0.3, initial_flow=0.0, substeps=1)"
+
 
 class TestMuskingumInitialState:
     def test_returns_zero_state(self):
@@ -255,3 +282,354 @@ class TestMuskingumStorage:
 
         # Storage should be positive after receiving inflow
         assert m.storage(state) > 0.0
+
+
+class TestMuskingumRouteSeries:
+    @pytest.mark.parametrize(("k", "x"), [(1.0, 0.2), (0.3, 0.0), (2.0, 0.5), (5.0, 0.35)])
+    def test_matches_per_step_route_exactly(self, k: float, x: float):
+        m = Muskingum(k=k, x=x)
+        reach = Reach(id="r", routing_model=m, loss_rule=NoReachLoss())
+        inflows = np.random.default_rng(42).gamma(0.5, 40.0, size=500)
+
+        state = m.initial_state(reach)
+        expected: list[float] = []
+        for i, inflow in enumerate(inflows.tolist()):
+            outflow, state = m.route(reach, inflow, state, _ts(i))
+            expected.append(outflow)
+
+        outflows, final_state = m.route_series(inflows, m.initial_state(reach))
+
+        assert outflows.tolist() == expected
+        assert final_state == state
+
+    def test_clamp_is_applied(self):
+        m = Muskingum(k=2.0, x=0.5)
+        outflows, _ = m.route_series([100.0, 0.0, 0.0], MuskingumState(0.0, 0.0))
+        assert outflows[0] == 0.0
+        assert (outflows >= 0.0).all()
+
+    def test_split_series_continues_from_state(self):
+        m = Muskingum(k=1.5, x=0.25)
+        inflows = np.linspace(0.0, 300.0, 40)
+
+        whole, whole_state = m.route_series(inflows, MuskingumState(0.0, 0.0))
+        head, state = m.route_series(inflows[:15], MuskingumState(0.0, 0.0))
+        tail, state = m.route_series(inflows[15:], state)
+
+        assert np.concatenate((head, tail)).tolist() == whole.tolist()
+        assert state == whole_state
+
+    def test_empty_series_returns_state_unchanged(self):
+        m = Muskingum(k=1.0, x=0.2)
+        state = MuskingumState(10.0, 5.0)
+        outflows, new_state = m.route_series([], state)
+        assert outflows.shape == (0,)
+        assert new_state == state
+
+
+class TestMuskingumRouteConvolved:
+    @pytest.mark.parametrize(("k", "x", "substeps"), [(1.0, 0.2, 1), (0.3, 0.0, 2), (5.0, 0.35, 1), (40.0, 0.1, 1)])
+    def test_matches_recursive_routing(self, k: float, x: float, substeps: int):
+        m = Muskingum(k=k, x=x, substeps=substeps)
+        inflows = np.random.default_rng(42).gamma(0.5, 40.0, size=2_000)
+        state = MuskingumState(30.0, 20.0)
+        recursive, recursive_state = m.route_series(inflows, state)
+        convolved, convolved_state = m.route_convolved(inflows, state)
+        scale = inflows.max()
+        np.testing.assert_allclose(convolved, recursive, rtol=0, atol=1e-9 * scale)
+        assert convolved_state.prev_inflow == recursive_state.prev_inflow
+        assert convolved_state.prev_outflow == pytest.approx(recursive_state.prev_outflow, abs=1e-9 * scale)
+
+    def test_falls_back_to_recursion_when_clamp_triggers(self):
+        m = Muskingum(k=2.0, x=0.5)
+        inflows = np.array([100.0, 0.0, 0.0, 50.0, 10.0])
+        recursive, recursive_state = m.route_series(inflows, MuskingumState(0.0, 0.0))
+        convolved, convolved_state = m.route_convolved(inflows, MuskingumState(0.0, 0.0))
+        assert convolved.tolist() == recursive.tolist()
+        assert convolved_state == recursive_state
+
+    def test_slow_reach_only_builds_the_taps_it_applies(self):
+        m = Muskingum(k=1e6, x=0.0)
+        recursive, _ = m.route_series(np.ones(100), MuskingumState(0.0, 0.0))
+        convolved, _ = m.route_convolved(np.ones(100), MuskingumState(0.0, 0.0))
+        np.testing.assert_allclose(convolved, recursive, rtol=0, atol=1e-12)
+
+    def test_empty_series_returns_state_unchanged(self):
+        state = MuskingumState(10.0, 5.0)
+        outflows, new_state = Muskingum(k=1.0, x=0.2).route_convolved([], state)
+        assert outflows.shape == (0,)
+        assert new_state == state
+
+
+class TestMuskingumImpulseResponse:
+    @pytest.mark.parametrize(("k", "x"), [(1.0, 0.2), (0.3, 0.0), (10.0, 0.04)])
+    def test_is_the_routed_unit_pulse(self, k: float, x: float):
+        m = Muskingum(k=k, x=x, substeps=Muskingum.stable_substeps(k, x))
+        kernel = m.impulse_response()
+        pulse = np.zeros(kernel.size)
+        pulse[0] = 1.0
+        routed, _ = m.route_series(pulse, MuskingumState(0.0, 0.0))
+        np.testing.assert_allclose(kernel, routed, rtol=0, atol=1e-15)
+
+    @pytest.mark.parametrize("tol", [1e-4, 1e-8, 1e-12])
+    def test_truncated_mass_is_within_tolerance(self, tol: float):
+        kernel = Muskingum(k=6.0, x=0.2).impulse_response(tol)
+        assert kernel.sum() == pytest.approx(1.0, abs=tol)
+
+    @pytest.mark.parametrize("tol", [0.0, 1.0, -1e-3])
+    def test_invalid_tolerance_raises(self, tol: float):
+        with pytest.raises(ValueError, match="tol must be in"):
+            Muskingum(k=1.0).impulse_response(tol)
+
+    @pytest.mark.parametrize("max_length", [1, 2, 7])
+    def test_max_length_keeps_the_leading_taps(self, max_length: int):
+        m = Muskingum(k=6.0, x=0.2)
+        assert m.impulse_response(max_length=max_length).tolist() == m.impulse_response()[:max_length].tolist()
+
+    def test_max_length_below_one_raises(self):
+        with pytest.raises(ValueError, match="max_length must be at least 1, got 0"):
+            Muskingum(k=1.0).impulse_response(max_length=0)
+
+
+def _finite_difference(m: Muskingum, name: str, inflows: np.ndarray, h: float = 1e-6) -> np.ndarray:
+    up, _ = dataclasses.replace(m, **{name: getattr(m, name) + h}).route_sensitivity(inflows)
+    down, _ = dataclasses.replace(m, **{name: getattr(m, name) - h}).route_sensitivity(inflows)
+    return (up - down) / (2 * h)
+
+
+class TestMuskingumRouteSensitivity:
+    def test_outflows_match_route_series_exactly(self):
+        m = Muskingum(k=2.0, x=0.5, initial_flow=4.0)
+        inflows = np.random.default_rng(3).gamma(0.5, 40.0, size=500)
+        outflows, _ = m.route_sensitivity(inflows)
+        expected, _ = m.route_series(inflows, m.initial_state(None))
+        assert outflows.tolist() == expected.tolist()
+
+    @pytest.mark.parametrize(("k", "x", "substeps"), [(2.0, 0.2, 1), (1.5, 0.45, 1), (0.3, 0.1, 3)])
+    def test_matches_finite_differences(self, k: float, x: float, substeps: int):
+        m = Muskingum(k=k, x=x, initial_flow=5.0, substeps=substeps)
+        inflows = np.random.default_rng(1).gamma(0.5, 40.0, size=300)
+        _, sensitivities = m.route_sensitivity(inflows)
+        assert sensitivities.shape == (2, 300)
+        for row, name in enumerate(("k", "x")):
+            np.testing.assert_allclose(sensitivities[row], _finite_difference(m, name, inflows), rtol=0, atol=1e-6)
+
+    def test_clamped_steps_have_zero_sensitivity(self):
+        m = Muskingum(k=2.0, x=0.5)
+        outflows, sensitivities = m.route_sensitivity([100.0, 0.0, 0.0], MuskingumState(0.0, 0.0))
+        assert outflows[0] == 0.0
+        assert sensitivities[:, 0].tolist() == [0.0, 0.0]
+
+    def test_parameter_bounds_build_valid_models(self):
+        (k_low, _), (x_low, x_high) = Muskingum.parameter_bounds["k"], Muskingum.parameter_bounds["x"]
+        Muskingum(k=k_low, x=x_low)
+        Muskingum(k=k_low, x=x_high)
+
+
+class TestMuskingumRouteWithLoss:
+    @pytest.mark.parametrize(("k", "x"), [(1.0, 0.2), (2.0, 0.5), (5.0, 0.35)])
+    def test_matches_per_step_route_and_loss_exactly(self, k: float, x: float):
+        m = Muskingum(k=k, x=x)
+        loss = ConstantFraction(0.08)
+        reach = Reach(id="r", routing_model=m, loss_rule=loss)
+        inflows = np.random.default_rng(7).gamma(0.5, 40.0, size=500)
+
+        state = m.initial_state(reach)
+        expected_net: list[float] = []
+        expected_loss: list[float] = []
+        for i, inflow in enumerate(inflows.tolist()):
+            outflow, state = m.route(reach, inflow, state, _ts(i))
+            lost = sum(loss.calculate(reach, outflow, _ts(i)).values())
+            expected_net.append(outflow - lost)
+            expected_loss.append(lost)
+
+        net, losses, final_state = m.route_with_loss(inflows, m.initial_state(reach), loss)
+
+        assert net.tolist() == expected_net
+        assert losses.tolist() == expected_loss
+        assert final_state == state
+
+    def test_state_carries_pre_loss_outflow(self):
+        m = Muskingum(k=1.5, x=0.25)
+        inflows = np.linspace(0.0, 300.0, 40)
+        _, _, with_loss = m.route_with_loss(inflows, MuskingumState(0.0, 0.0), ConstantFraction(0.5))
+        _, without_loss = m.route_series(inflows, MuskingumState(0.0, 0.0))
+        assert with_loss == without_loss
+
+
+class TestMuskingumRouteEnsemble:
+    def test_initial_ensemble_state_is_zero_per_member(self):
+        state = Muskingum(k=1.0, x=0.2).initial_ensemble_state(4)
+        assert isinstance(state, MuskingumEnsembleState)
+        assert state.prev_inflow.tolist() == [0.0] * 4
+        assert state.prev_outflow.tolist() == [0.0] * 4
+
+    @pytest.mark.parametrize(("k", "x"), [(1.0, 0.2), (2.0, 0.5), (0.3, 0.1)])
+    def test_each_member_matches_route_series(self, k: float, x: float):
+        m = Muskingum(k=k, x=x)
+        inflows = np.random.default_rng(11).gamma(0.5, 40.0, size=(6, 120))
+
+        outflows, state = m.route_ensemble(inflows, m.initial_ensemble_state(6))
+
+        assert outflows.shape == (6, 120)
+        for member in range(6):
+            expected, member_state = m.route_series(inflows[member], MuskingumState(0.0, 0.0))
+            assert outflows[member].tolist() == expected.tolist()
+            assert state.prev_inflow[member] == member_state.prev_inflow
+            assert state.prev_outflow[member] == member_state.prev_outflow
+
+    def test_members_start_from_their_own_state(self):
+        m = Muskingum(k=1.0, x=0.0)
+        state = MuskingumEnsembleState(prev_inflow=np.array([0.0, 100.0]), prev_outflow=np.array([0.0, 50.0]))
+        outflows, _ = m.route_ensemble(np.zeros((2, 3)), state)
+        assert outflows[0].tolist() == [0.0, 0.0, 0.0]
+        assert outflows[1, 0] > 0.0
+
+    def test_storage_is_per_member(self):
+        m = Muskingum(k=2.0, x=0.3)
+        state = MuskingumEnsembleState(prev_inflow=np.array([100.0, 0.0]), prev_outflow=np.array([80.0, 0.0]))
+        assert m.storage(state).tolist() == pytest.approx([172.0, 0.0])
+
+
+class TestMuskingumSweep:
+    def test_each_parameter_pair_matches_route_series(self):
+        k = np.array([0.3, 1.0, 2.0, 5.0])
+        x = np.array([0.0, 0.2, 0.5, 0.35])
+        inflows = np.random.default_rng(13).gamma(0.5, 40.0, size=150)
+
+        outflows = Muskingum.sweep(k, x, inflows)
+
+        assert outflows.shape == (4, 150)
+        for i in range(4):
+            expected, _ = Muskingum(k=k[i], x=x[i]).route_series(inflows, MuskingumState(0.0, 0.0))
+            assert outflows[i].tolist() == expected.tolist()
+
+    def test_grid_keeps_broadcast_shape(self):
+        k = np.array([0.5, 1.0, 2.0])[:, None]
+        x = np.array([0.0, 0.1, 0.2, 0.3])[None, :]
+        inflows = np.linspace(0.0, 100.0, 20)
+
+        outflows = Muskingum.sweep(k, x, inflows)
+
+        assert outflows.shape == (3, 4, 20)
+        expected, _ = Muskingum(k=2.0, x=0.1).route_series(inflows, MuskingumState(0.0, 0.0))
+        assert outflows[2, 1].tolist() == expected.tolist()
+
+    def test_invalid_k_raises(self):
+        with pytest.raises(ValueError, match="k must be positive, got -1.0"):
+            Muskingum.sweep([1.0, -1.0], [0.1, 0.1], [1.0, 2.0])
+
+    def test_invalid_x_raises(self):
+        with pytest.raises(ValueError, match=r"x must be in \[0, 0\.5\], got 0.6"):
+            Muskingum.sweep([1.0, 2.0], [0.6, 0.1], [1.0, 2.0])
+
+
+class TestMuskingumSteadyState:
+    def test_negative_or_infinite_initial_flow_raises(self):
+        for flow in (-1.0, float("inf"), float("nan")):
+            with pytest.raises(ValueError, match="initial_flow must be finite and non-negative"):
+                Muskingum(k=1.0, initial_flow=flow)
+
+    def test_initial_state_uses_initial_flow(self):
+        assert Muskingum(k=2.0, x=0.2, initial_flow=40.0).initial_state(_make_reach()) == MuskingumState(40.0, 40.0)
+
+    @pytest.mark.parametrize(("k", "x"), [(1.0, 0.2), (0.3, 0.0), (5.0, 0.45)])
+    def test_steady_state_is_a_fixed_point(self, k: float, x: float):
+        m = Muskingum(k=k, x=x)
+        outflows, state = m.route_series(np.full(50, 25.0), m.steady_state(25.0))
+        np.testing.assert_allclose(outflows, 25.0, rtol=1e-12)
+        assert state.prev_outflow == pytest.approx(25.0, rel=1e-12)
+
+    def test_steady_storage_is_k_times_flow(self):
+        m = Muskingum(k=3.0, x=0.3)
+        assert m.storage(m.steady_state(10.0)) == pytest.approx(30.0)
+
+    def test_ensemble_and_group_start_from_initial_flow(self):
+        m = Muskingum(k=2.0, x=0.2, initial_flow=8.0)
+        state = m.initial_ensemble_state(3)
+        assert state.prev_inflow.tolist() == state.prev_outflow.tolist() == [8.0] * 3
+        grouped = Muskingum.route_group([m], np.full((1, 10), 8.0))
+        np.testing.assert_allclose(grouped, 8.0, rtol=1e-12)
+
+
+def _substepped_by_hand(k: float, x: float, n: int, inflows: list[float]) -> list[float]:
+    c0, c1, c2 = _coefficients(k * n, x)
+    prev_inflow, prev_outflow, outflows = 0.0, 0.0, []
+    for inflow in inflows:
+        outflow = prev_outflow
+        for j in range(n):
+            start = prev_inflow + (inflow - prev_inflow) * j / n
+            end = prev_inflow + (inflow - prev_inflow) * (j + 1) / n
+            outflow = c0 * end + c1 * start + c2 * outflow
+        prev_inflow, prev_outflow = inflow, outflow
+        outflows.append(outflow)
+    return outflows
+
+
+class TestMuskingumSubsteps:
+    def test_substeps_below_one_raises(self):
+        with pytest.raises(ValueError, match="substeps must be at least 1"):
+            Muskingum(k=1.0, substeps=0)
+
+    @pytest.mark.parametrize("substeps", [2.5, 2.0, "2"])
+    def test_non_integer_substeps_raise(self, substeps):
+        with pytest.raises(ValueError, match="substeps must be an integer"):
+            Muskingum(k=1.0, substeps=substeps)
+
+    def test_numpy_integer_substeps_are_accepted(self):
+        assert Muskingum(k=0.2, substeps=np.int64(3)) == Muskingum(k=0.2, substeps=3)
+
+    def test_single_substep_keeps_original_coefficients(self):
+        m = Muskingum(k=0.7, x=0.3, substeps=1)
+        assert (m._c0, m._c1, m._c2) == _coefficients(0.7, 0.3)
+
+    @pytest.mark.parametrize(("k", "x"), [(1.0, 0.0), (0.5, 0.0), (0.1, 0.2), (0.03, 0.0), (0.2, 0.45)])
+    def test_stable_substeps_make_coefficients_non_negative(self, k: float, x: float):
+        n = Muskingum.stable_substeps(k, x)
+        sub_c0, _, sub_c2 = _coefficients(k * n, x)
+        assert sub_c2 >= 0.0
+        assert sub_c0 >= 0.0
+        if n > 1:
+            assert _coefficients(k * (n - 1), x)[2] < 0.0
+
+    def test_stable_substeps_is_one_for_slow_reaches(self):
+        assert Muskingum.stable_substeps(3.0, 0.2) == 1
+
+    @pytest.mark.parametrize(("k", "x", "n"), [(0.3, 0.45, 4), (0.4, 0.45, 3)])
+    def test_stable_substeps_raises_when_no_count_fits(self, k: float, x: float, n: int):
+        # n is the first count with a non-negative c2, and c0 is already negative there (about -0.034 for k = 0.3).
+        assert _coefficients(k * (n - 1), x)[2] < 0.0
+        assert _coefficients(k * n, x)[0] < 0.0
+        with pytest.raises(ValueError, match="no substep count keeps c0 and c2 non-negative"):
+            Muskingum.stable_substeps(k, x)
+
+    def test_for_frequency_raises_when_no_substep_count_fits(self):
+        with pytest.raises(ValueError, match="no substep count"):
+            Muskingum.for_frequency(0.3, Frequency.DAILY, x=0.45)
+
+    @pytest.mark.parametrize(("k", "x", "n"), [(0.1, 0.2, 7), (0.25, 0.0, 3), (0.05, 0.4, 20)])
+    def test_matches_explicit_substep_loop(self, k: float, x: float, n: int):
+        inflows = np.random.default_rng(11).gamma(0.5, 40.0, size=200).tolist()
+        outflows, _ = Muskingum(k=k, x=x, substeps=n).route_series(inflows, MuskingumState(0.0, 0.0))
+        np.testing.assert_allclose(outflows, _substepped_by_hand(k, x, n, inflows), rtol=1e-10, atol=1e-9)
+
+    def test_substepping_removes_oscillation_and_conserves_mass(self):
+        k, x = 0.1, 0.2
+        inflows = np.zeros(60)
+        inflows[:5] = 100.0
+        m = Muskingum(k=k, x=x, substeps=Muskingum.stable_substeps(k, x))
+        outflows, state = m.route_series(inflows, MuskingumState(0.0, 0.0))
+        assert (np.diff(outflows[5:]) <= 1e-12).all()
+        assert outflows.sum() + m.storage(state) == pytest.approx(inflows.sum(), rel=1e-9)
+        assert _coefficients(k, x)[2] < 0.0
+
+    def test_steady_state_still_a_fixed_point(self):
+        m = Muskingum(k=0.05, x=0.1, substeps=Muskingum.stable_substeps(0.05, 0.1))
+        outflows, _ = m.route_series(np.full(20, 30.0), m.steady_state(30.0))
+        np.testing.assert_allclose(outflows, 30.0, rtol=1e-12)
+
+    def test_for_frequency_converts_days_and_picks_substeps(self):
+        m = Muskingum.for_frequency(2.0, Frequency.MONTHLY, x=0.2)
+        assert m.k == pytest.approx(2.0 / (365.25 / 12))
+        assert m.substeps == Muskingum.stable_substeps(m.k, 0.2)
+        assert Muskingum.for_frequency(3.0, Frequency.DAILY).substeps == 1
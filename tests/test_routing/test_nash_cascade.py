@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import pickle
+
+import numpy as np
+import pytest
+from taqsim.node.reach import Reach
+from taqsim.node.strategies import NoReachLoss
+from taqsim.time import Frequency, Timestep
+
+from taqsim_hydrology.losses.constant_fraction import ConstantFraction
+from taqsim_hydrology.routing.codec import StateCodec
+from taqsim_hydrology.routing.linear_reservoir import LinearReservoir
+from taqsim_hydrology.routing.nash_cascade import NashCascade
+
+
+def _make_reach(model: NashCascade) -> Reach:
+    return Reach(id="test-reach", routing_model=model, loss_rule=NoReachLoss())
+
+
+def _ts(i: int) -> Timestep:
+    return Timestep(index=i, frequency=Frequency.DAILY)
+
+
+def _inflows(n_steps: int, seed: int = 5) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.where(rng.random(n_steps) < 0.3, rng.gamma(0.5, 40.0, size=n_steps), 0.0)
+
+
+def _route_by_step(
+    model: NashCascade, inflows: np.ndarray, state: tuple[float, ...]
+) -> tuple[list[float], tuple[float, ...]]:
+    reach = _make_reach(model)
+    outflows = []
+    for i, inflow in enumerate(inflows.tolist()):
+        outflow, state = model.route(reach, inflow, state, _ts(i))
+        outflows.append(outflow)
+    return outflows, state
+
+
+def _chained_reservoirs(k: float, n: int, inflows: np.ndarray) -> np.ndarray:
+    # Continuous-time reference: n linear reservoirs integrated on a fine grid with inflow held over each step.
+    fine = 200
+    dt = 1.0 / fine
+    stores = np.zeros(n)
+    outflows = np.empty(inflows.size)
+
+    def rates(s: np.ndarray, inflow: float) -> np.ndarray:
+        upstream = np.concatenate(([inflow], s[:-1] / k))
+        return upstream - s / k
+
+    for i, inflow in enumerate(inflows.tolist()):
+        before = stores.sum()
+        for _ in range(fine):
+            k1 = rates(stores, inflow)
+            k2 = rates(stores + 0.5 * dt * k1, inflow)
+            k3 = rates(stores + 0.5 * dt * k2, inflow)
+            k4 = rates(stores + dt * k3, inflow)
+            stores = stores + dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+        outflows[i] = before + inflow - stores.sum()
+    return outflows
+
+
+class TestNashCascade:
+    def test_k_non_positive_raises(self) -> None:
+        with pytest.raises(ValueError, match="k must be positive"):
+            NashCascade(k=0.0, n=2)
+
+    def test_n_below_one_raises(self) -> None:
+        with pytest.raises(ValueError, match="n must be at least 1, got 0"):
+            NashCascade(k=2.0, n=0)
+
+    def test_negative_initial_flow_raises(self) -> None:
+        with pytest.raises(ValueError, match="initial_flow must be finite and non-negative"):
+            NashCascade(k=2.0, n=2, initial_flow=-1.0)
+
+    def test_state_is_a_tuple_of_floats_per_store(self) -> None:
+        model = NashCascade(k=2.0, n=4, initial_flow=1.0)
+        state = model.initial_state(_make_reach(model))
+        assert state == (2.0, 2.0, 2.0, 2.0)
+        _, state = model.route(_make_reach(model), 3.0, state, _ts(0))
+        assert type(state) is tuple
+        assert all(type(value) is float for value in state)
+
+    def test_single_store_matches_linear_reservoir(self) -> None:
+        inflows = _inflows(500)
+        cascade, _ = NashCascade(k=2.5, n=1).route_series(inflows, np.zeros(1))
+        reservoir, _ = LinearReservoir(k=2.5).route_series(inflows, 0.0)
+        np.testing.assert_allclose(cascade, reservoir, rtol=1e-12, atol=1e-12)
+
+    @pytest.mark.parametrize(("k", "n"), [(0.5, 2), (2.0, 3), (4.0, 5)])
+    def test_matches_continuous_reservoir_chain(self, k: float, n: int) -> None:
+        inflows = _inflows(60)
+        outflows, _ = NashCascade(k=k, n=n).route_series(inflows, np.zeros(n))
+        np.testing.assert_allclose(outflows, _chained_reservoirs(k, n, inflows), rtol=1e-9, atol=1e-9)
+
+    def test_mass_conservation(self) -> None:
+        model = NashCascade(k=3.0, n=4)
+        inflows = _inflows(300)
+        state = (5.0, 0.0, 2.0, 1.0)
+        outflows, final = _route_by_step(model, inflows, state)
+        assert sum(state) + inflows.sum() == pytest.approx(sum(outflows) + model.storage(final), rel=1e-12)
+
+    def test_more_stores_delay_the_peak(self) -> None:
+        pulse = np.zeros(60)
+        pulse[0] = 100.0
+        peaks = [int(np.argmax(NashCascade(k=2.0, n=n).route_series(pulse, np.zeros(n))[0])) for n in (1, 3, 6)]
+        assert peaks[0] < peaks[1] < peaks[2]
+
+    def test_storage_sums_stores(self) -> None:
+        model = NashCascade(k=2.0, n=3)
+        assert model.storage((1.0, 2.0, 3.5)) == 6.5
+        assert model.storage(np.array([[1.0, 2.0, 3.0], [0.0, 0.0, 1.0]])).tolist() == [6.0, 1.0]
+
+    def test_hashable_and_equal_by_parameters(self) -> None:
+        assert NashCascade(k=2.0, n=3) == NashCascade(k=2.0, n=3)
+        assert hash(NashCascade(k=2.0, n=3)) == hash(NashCascade(k=2.0, n=3))
+        assert NashCascade(k=2.0, n=3) != NashCascade(k=2.0, n=4)
+
+    def test_repr(self) -> None:
+        assert repr(NashCascade(k=2.0, n=3)) == "NashCascade(k=2.0, n=3, initial_flow=0.0)"
+
+    def test_pickle_round_trip(self) -> None:
+        model = NashCascade(k=2.0, n=3, initial_flow=1.5)
+        restored = pickle.loads(pickle.dumps(model))
+        assert restored == model
+        assert restored.route_series(_inflows(50), restored.initial_state(None))[0].tolist() == (
+            model.route_series(_inflows(50), model.initial_state(None))[0].tolist()
+        )
+
+
+class TestNashCascadeRouteSeries:
+    @pytest.mark.parametrize(("k", "n"), [(0.2, 1), (1.0, 2), (3.0, 4), (20.0, 8)])
+    def test_matches_per_step_route_exactly(self, k: float, n: int) -> None:
+        model = NashCascade(k=k, n=n)
+        inflows = _inflows(400)
+        state = tuple(np.linspace(0.5, 4.0, n).tolist())
+        expected, expected_state = _route_by_step(model, inflows, state)
+        outflows, final = model.route_series(inflows, state)
+        assert outflows.tolist() == expected
+        assert final == expected_state
+
+    def test_continues_across_calls(self) -> None:
+        model = NashCascade(k=2.0, n=3)
+        inflows = _inflows(200)
+        whole, whole_state = model.route_series(inflows, model.initial_state(None))
+        first, state = model.route_series(inflows[:77], model.initial_state(None))
+        second, state = model.route_series(inflows[77:], state)
+        assert np.concatenate([first, second]).tolist() == whole.tolist()
+        assert state == whole_state
+
+    def test_array_state_is_accepted(self) -> None:
+        model = NashCascade(k=2.0, n=3)
+        inflows = _inflows(50)
+        outflows, state = model.route_series(inflows, np.array([1.0, 2.0, 3.0]))
+        assert outflows.tolist() == model.route_series(inflows, (1.0, 2.0, 3.0))[0].tolist()
+        assert type(state) is tuple
+
+    def test_empty_series_returns_state_unchanged(self) -> None:
+        outflows, state = NashCascade(k=2.0, n=2).route_series(np.array([]), (1.0, 2.0))
+        assert outflows.size == 0
+        assert state == (1.0, 2.0)
+
+
+class TestNashCascadeRouteConvolved:
+    @pytest.mark.parametrize(("k", "n"), [(0.05, 2), (1.0, 1), (2.0, 3), (30.0, 4), (1.0, 25)])
+    def test_matches_recursive_routing(self, k: float, n: int) -> None:
+        model = NashCascade(k=k, n=n)
+        inflows = _inflows(3_000)
+        state = np.linspace(10.0, 1.0, n)
+        recursive, recursive_state = model.route_series(inflows, state)
+        convolved, convolved_state = model.route_convolved(inflows, state)
+        scale = inflows.max()
+        np.testing.assert_allclose(convolved, recursive, rtol=0, atol=1e-9 * scale)
+        np.testing.assert_allclose(convolved_state, recursive_state, rtol=0, atol=1e-9 * scale * k)
+
+    def test_series_longer_and_shorter_than_kernel(self) -> None:
+        model = NashCascade(k=5.0, n=3)
+        kernel_size = model.impulse_response().size
+        for n_steps in (kernel_size // 3, kernel_size * 4):
+            inflows = _inflows(n_steps)
+            recursive, _ = model.route_series(inflows, np.zeros(3))
+            convolved, _ = model.route_convolved(inflows, np.zeros(3))
+            np.testing.assert_allclose(convolved, recursive, rtol=0, atol=1e-9 * inflows.max())
+
+    def test_slow_cascade_only_builds_the_taps_it_applies(self) -> None:
+        model = NashCascade(k=1e6, n=3)
+        state = (5.0, 3.0, 1.0)
+        recursive, recursive_state = model.route_series(np.ones(100), state)
+        convolved, convolved_state = model.route_convolved(np.ones(100), state)
+        np.testing.assert_allclose(convolved, recursive, rtol=0, atol=1e-12)
+        np.testing.assert_allclose(convolved_state, recursive_state, rtol=1e-9)
+
+    def test_empty_series_returns_state_unchanged(self) -> None:
+        outflows, final = NashCascade(k=2.0, n=2).route_convolved(np.array([]), np.array([1.0, 2.0]))
+        assert outflows.size == 0
+        assert final == (1.0, 2.0)
+
+
+class TestNashCascadeImpulseResponse:
+    @pytest.mark.parametrize(("k", "n"), [(0.5, 1), (3.0, 3), (50.0, 2)])
+    def test_is_the_routed_unit_pulse(self, k: float, n: int) -> None:
+        model = NashCascade(k=k, n=n)
+        kernel = model.impulse_response()
+        pulse = np.zeros(kernel.size)
+        pulse[0] = 1.0
+        routed, _ = model.route_series(pulse, np.zeros(n))
+        np.testing.assert_allclose(kernel, routed, rtol=0, atol=1e-12)
+
+    @pytest.mark.parametrize("tol", [1e-4, 1e-8, 1e-12])
+    def test_truncated_mass_is_within_tolerance(self, tol: float) -> None:
+        kernel = NashCascade(k=4.0, n=3).impulse_response(tol)
+        assert 1.0 - tol <= kernel.sum() <= 1.0 + 1e-12
+
+    def test_looser_tolerance_gives_shorter_kernel(self) -> None:
+        model = NashCascade(k=4.0, n=3)
+        assert model.impulse_response(1e-4).size < model.impulse_response(1e-12).size
+
+    @pytest.mark.parametrize("tol", [0.0, 1.0, -1e-3])
+    def test_invalid_tolerance_raises(self, tol: float) -> None:
+        with pytest.raises(ValueError, match="tol must be in"):
+            NashCascade(k=2.0, n=2).impulse_response(tol)
+
+    def test_max_length_keeps_the_leading_taps(self) -> None:
+        model = NashCascade(k=4.0, n=3)
+        full = model.impulse_response()
+        np.testing.assert_array_equal(model.impulse_response(max_length=6), full[:6])
+        np.testing.assert_array_equal(model.impulse_response(max_length=10 * full.size), full)
+
+    def test_max_length_below_one_raises(self) -> None:
+        with pytest.raises(ValueError, match="max_length must be at least 1, got 0"):
+            NashCascade(k=2.0, n=2).impulse_response(max_length=0)
+
+
+class TestNashCascadeBatch:
+    def test_route_with_loss_matches_route_then_loss(self) -> None:
+        model = NashCascade(k=2.0, n=3)
+        loss = ConstantFraction(0.1)
+        inflows = _inflows(200)
+        expected, expected_state = _route_by_step(model, inflows, (1.0, 1.0, 1.0))
+        net, losses, state = model.route_with_loss(inflows, (1.0, 1.0, 1.0), loss)
+        assert losses.tolist() == [q * 0.1 for q in expected]
+        assert net.tolist() == [q - q * 0.1 for q in expected]
+        assert state == expected_state
+
+    def test_each_ensemble_member_matches_route_series(self) -> None:
+        model = NashCascade(k=2.0, n=3, initial_flow=2.0)
+        inflows = np.stack([_inflows(150, seed) for seed in range(4)])
+        outflows, state = model.route_ensemble(inflows, model.initial_ensemble_state(4))
+        for member in range(4):
+            expected, expected_state = model.route_series(inflows[member], model.steady_state(2.0))
+            assert outflows[member].tolist() == expected.tolist()
+            assert tuple(state[member].tolist()) == expected_state
+
+    def test_route_group_starts_each_model_from_its_initial_flow(self) -> None:
+        models = [NashCascade(k=2.0, n=2, initial_flow=1.0), NashCascade(k=5.0, n=4)]
+        inflows = np.stack([_inflows(100, 1), _inflows(100, 2)])
+        grouped = NashCascade.route_group(models, inflows)
+        for row, model in enumerate(models):
+            assert grouped[row].tolist() == model.route_series(inflows[row], model.initial_state(None))[0].tolist()
+
+    def test_route_group_batches_cascades_of_equal_length(self) -> None:
+        models = [
+            NashCascade(k=2.0, n=3),
+            NashCascade(k=0.7, n=1, initial_flow=3.0),
+            NashCascade(k=5.0, n=3, initial_flow=1.0),
+            NashCascade(k=1.5, n=1),
+            NashCascade(k=9.0, n=3, initial_flow=0.5),
+        ]
+        inflows = np.stack([_inflows(120, seed) for seed in range(len(models))])
+        table = NashCascade.group_table(models)
+        assert [rows.tolist() for rows, *_ in table] == [[0, 2, 4], [1, 3]]
+        grouped = NashCascade.route_table(table, inflows)
+        for row, model in enumerate(models):
+            assert grouped[row].tolist() == model.route_series(inflows[row], model.initial_state(None))[0].tolist()
+
+
+class TestNashCascadeSteadyState:
+    def test_every_store_holds_k_times_flow(self) -> None:
+        assert NashCascade(k=2.5, n=3).steady_state(4.0) == (10.0, 10.0, 10.0)
+
+    @pytest.mark.parametrize(("k", "n"), [(0.5, 1), (3.0, 4), (40.0, 6)])
+    def test_steady_state_is_a_fixed_point(self, k: float, n: int) -> None:
+        model = NashCascade(k=k, n=n, initial_flow=7.0)
+        state = model.initial_state(None)
+        outflow, new_state = model.route(None, 7.0, state, _ts(0))
+        assert outflow == pytest.approx(7.0, rel=1e-12)
+        np.testing.assert_allclose(new_state, state, rtol=1e-12)
+
+
+class TestNashCascadeCodec:
+    def test_round_trip_through_state_codec(self) -> None:
+        codec = StateCodec({"a": NashCascade(k=2.0, n=3), "b": LinearReservoir(k=1.0)})
+        states = {"a": (1.0, 2.0, 3.0), "b": 4.0}
+        buffer = codec.pack(states)
+        assert buffer.tolist() == [1.0, 2.0, 3.0, 4.0]
+        restored = codec.unpack(buffer)
+        assert restored["a"] == (1.0, 2.0, 3.0)
+        assert restored["b"] == 4.0
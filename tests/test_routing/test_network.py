@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import threading
+
+import numpy as np
+import pytest
+
+from taqsim_hydrology.routing import Lag, LinearReservoir, Muskingum, MuskingumState, NashCascade
+from taqsim_hydrology.routing.network import NetworkReach, NetworkWorkspace, RoutingNetwork
+
+
+def _series(seed: int, n_steps: int = 200) -> np.ndarray:
+    return np.random.default_rng(seed).gamma(0.5, 40.0, size=n_steps)
+
+
+def _route_alone(model, inflows: np.ndarray) -> np.ndarray:
+    if isinstance(model, Muskingum):
+        return model.route_series(inflows, MuskingumState(0.0, 0.0))[0]
+    if isinstance(model, LinearReservoir):
+        return model.route_series(inflows, 0.0)[0]
+    return Lag.sweep([model.lag], inflows)[0]
+
+
+def _tree() -> RoutingNetwork:
+    #  a   b   c
+    #   \ /    |
+    #    d     e
+    #     \   /
+    #       f
+    return RoutingNetwork(
+        reaches=(
+            NetworkReach("a", Muskingum(k=1.0, x=0.2)),
+            NetworkReach("b", Muskingum(k=3.0, x=0.4)),
+            NetworkReach("c", LinearReservoir(k=2.0)),
+            NetworkReach("d", Muskingum(k=0.5, x=0.1), upstream=("a", "b")),
+            NetworkReach("e", Lag(lag=3), upstream=("c",)),
+            NetworkReach("f", LinearReservoir(k=4.0), upstream=("d", "e")),
+        )
+    )
+
+
+class TestRouteGroup:
+    def test_muskingum_rows_match_individual_models(self):
+        models = [Muskingum(k=1.0, x=0.2), Muskingum(k=3.0, x=0.5)]
+        inflows = np.vstack([_series(1), _series(2)])
+        outflows = Muskingum.route_group(models, inflows)
+        for row, model in enumerate(models):
+            assert outflows[row].tolist() == _route_alone(model, inflows[row]).tolist()
+
+    def test_linear_reservoir_rows_match_individual_models(self):
+        models = [LinearReservoir(k=0.5), LinearReservoir(k=8.0)]
+        inflows = np.vstack([_series(3), _series(4)])
+        outflows = LinearReservoir.route_group(models, inflows)
+        for row, model in enumerate(models):
+            assert outflows[row].tolist() == _route_alone(model, inflows[row]).tolist()
+
+    def test_lag_rows_match_individual_models(self):
+        models = [Lag(lag=0), Lag(lag=5)]
+        inflows = np.vstack([_series(5), _series(6)])
+        outflows = Lag.route_group(models, inflows)
+        for row, model in enumerate(models):
+            assert outflows[row].tolist() == _route_alone(model, inflows[row]).tolist()
+
+
+class TestGroupTables:
+    @pytest.mark.parametrize(
+        "models",
+        [
+            [Muskingum(k=1.0, x=0.2, initial_flow=3.0), Muskingum(k=3.0, x=0.5)],
+            [LinearReservoir(k=0.5), LinearReservoir(k=8.0, initial_flow=2.0)],
+            [Lag(lag=0), Lag(lag=5, initial_flow=1.0)],
+            [NashCascade(k=2.0, n=3), NashCascade(k=0.5, n=1, initial_flow=4.0)],
+        ],
+    )
+    def test_route_table_matches_route_group(self, models):
+        model_type = type(models[0])
+        inflows = np.vstack([_series(7), _series(8)])
+        table = model_type.group_table(models)
+        expected = model_type.route_group(models, inflows)
+        assert model_type.route_table(table, inflows).tolist() == expected.tolist()
+        # Routing must leave the shared table untouched, so a second run gives the same result.
+        assert model_type.route_table(table, inflows).tolist() == expected.tolist()
+
+    @pytest.mark.parametrize(
+        "models",
+        [[Muskingum(k=1.0)], [LinearReservoir(k=2.0)], [Lag(lag=2)]],
+    )
+    def test_tables_are_read_only(self, models):
+        for array in type(models[0]).group_table(models):
+            with pytest.raises(ValueError, match="read-only"):
+                array[0] = 1.0
+
+
+class TestRoutingNetwork:
+    def test_matches_reach_by_reach_routing(self):
+        network = _tree()
+        lateral = {"a": _series(10), "b": _series(11), "c": _series(12), "f": _series(13)}
+
+        outflows = network.route(lateral)
+
+        expected = {
+            "a": _route_alone(Muskingum(k=1.0, x=0.2), lateral["a"]),
+            "b": _route_alone(Muskingum(k=3.0, x=0.4), lateral["b"]),
+            "c": _route_alone(LinearReservoir(k=2.0), lateral["c"]),
+        }
+        expected["d"] = _route_alone(Muskingum(k=0.5, x=0.1), expected["a"] + expected["b"])
+        expected["e"] = _route_alone(Lag(lag=3), expected["c"])
+        expected["f"] = _route_alone(LinearReservoir(k=4.0), lateral["f"] + expected["d"] + expected["e"])
+        for reach_id, series in expected.items():
+            np.testing.assert_allclose(outflows[reach_id], series, rtol=1e-12, atol=1e-12)
+
+    def test_same_type_reaches_at_same_depth_are_stacked(self):
+        network = _tree()
+        assert network.n_levels == 3
+        # level 0: Muskingum(a, b) + LinearReservoir(c); level 1: Muskingum(d) + Lag(e); level 2: LinearReservoir(f)
+        assert network.n_groups == 5
+
+    def test_reaches_without_lateral_inflow_start_dry(self):
+        network = RoutingNetwork(reaches=(NetworkReach("a", Lag(lag=1)), NetworkReach("b", Lag(lag=1))))
+        outflows = network.route({"a": [1.0, 2.0, 3.0]})
+        assert outflows["b"].tolist() == [0.0, 0.0, 0.0]
+
+    def test_mass_is_conserved_through_lag_chain(self):
+        network = RoutingNetwork(
+            reaches=(
+                NetworkReach("up", Lag(lag=2)),
+                NetworkReach("down", Lag(lag=3), upstream=("up",)),
+            )
+        )
+        inflows = np.r_[_series(20, 50), np.zeros(10)]
+        outflows = network.route({"up": inflows})
+        assert outflows["down"].sum() == pytest.approx(inflows.sum())
+
+    def test_cycle_raises(self):
+        with pytest.raises(ValueError, match="cycle"):
+            RoutingNetwork(
+                reaches=(
+                    NetworkReach("a", Lag(lag=1), upstream=("b",)),
+                    NetworkReach("b", Lag(lag=1), upstream=("a",)),
+                )
+            )
+
+    def test_unknown_upstream_raises(self):
+        with pytest.raises(ValueError, match="unknown upstream reach 'z'"):
+            RoutingNetwork(reaches=(NetworkReach("a", Lag(lag=1), upstream=("z",)),))
+
+    def test_duplicate_id_raises(self):
+        with pytest.raises(ValueError, match="duplicate reach id 'a'"):
+            RoutingNetwork(reaches=(NetworkReach("a", Lag(lag=1)), NetworkReach("a", Lag(lag=2))))
+
+    def test_model_without_group_routing_raises(self):
+        with pytest.raises(TypeError, match="does not support group routing"):
+            NetworkReach("a", object())
+
+    def test_unknown_lateral_reach_raises(self):
+        with pytest.raises(ValueError, match="unknown reach 'z'"):
+            _tree().route({"z": [1.0]})
+
+    def test_mismatched_lateral_lengths_raise(self):
+        with pytest.raises(ValueError, match="equal length"):
+            _tree().route({"a": [1.0, 2.0], "b": [1.0]})
+
+
+def _scenarios(n_scenarios: int, n_steps: int = 200) -> list[dict[str, np.ndarray]]:
+    base = {"a": _series(10, n_steps), "b": _series(11, n_steps), "c": _series(12, n_steps)}
+    return [{reach_id: series * (1.0 + 0.1 * i) for reach_id, series in base.items()} for i in range(n_scenarios)]
+
+
+def _outlet_volume(outflows: dict[str, np.ndarray]) -> float:
+    return float(outflows["f"].sum())
+
+
+class TestWorkspace:
+    def test_route_into_workspace_matches_plain_route(self):
+        network = _tree()
+        lateral = _scenarios(1)[0]
+        workspace = network.workspace(200)
+        assert isinstance(workspace, NetworkWorkspace)
+        routed = network.route(lateral, workspace)
+        for reach_id, series in network.route(lateral).items():
+            assert routed[reach_id].tolist() == series.tolist()
+            assert np.shares_memory(routed[reach_id], workspace.outflows)
+
+    def test_reused_workspace_forgets_the_previous_scenario(self):
+        network = _tree()
+        workspace = network.workspace(200)
+        network.route({"a": _series(1), "c": _series(2)}, workspace)
+        routed = network.route({"b": _series(3)}, workspace)
+        assert routed["c"].tolist() == [0.0] * 200
+        assert routed["f"].tolist() == network.route({"b": _series(3)})["f"].tolist()
+
+    def test_mismatched_workspace_raises(self):
+        network = _tree()
+        with pytest.raises(ValueError, match="workspace has shape"):
+            network.route({"a": _series(1)}, network.workspace(100))
+
+
+class TestEvaluate:
+    @pytest.mark.parametrize("max_workers", [1, 4])
+    def test_matches_serial_routing_in_scenario_order(self, max_workers: int):
+        network = _tree()
+        scenarios = _scenarios(12)
+        expected = [_outlet_volume(network.route(lateral)) for lateral in scenarios]
+        assert network.evaluate(scenarios, _outlet_volume, max_workers=max_workers) == expected
+
+    def test_each_worker_reuses_one_workspace(self):
+        network = _tree()
+        buffers: dict[int, set[int]] = {}
+        lock = threading.Lock()
+
+        def record(outflows: dict[str, np.ndarray]) -> None:
+            with lock:
+                buffers.setdefault(threading.get_ident(), set()).add(id(outflows["f"].base))
+
+        network.evaluate(_scenarios(16), record, max_workers=3)
+        assert all(len(ids) == 1 for ids in buffers.values())
+
+    def test_scenarios_of_different_lengths(self):
+        network = _tree()
+        scenarios = [*_scenarios(2, n_steps=100), *_scenarios(2, n_steps=300)]
+        expected = [_outlet_volume(network.route(lateral)) for lateral in scenarios]
+        assert network.evaluate(scenarios, _outlet_volume, max_workers=2) == expected
+
+    def test_invalid_max_workers_raises(self):
+        with pytest.raises(ValueError, match="max_workers must be at least 1"):
+            _tree().evaluate(_scenarios(2), _outlet_volume, max_workers=0)
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import importlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from pydrology import ForcingData, get_model
+
+from taqsim_hydrology.sources.cache import PrecomputeCache
+from taqsim_hydrology.sources.precompute import PrecomputeJob, precompute, precompute_many
+
+# The package re-exports the precompute() function under the submodule's name, so fetch the module explicitly.
+precompute_module = importlib.import_module("taqsim_hydrology.sources.precompute")
+
+
+def _forcing(n_days: int = 365, seed: int = 0) -> ForcingData:
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2000-01-01")
+    return ForcingData(
+        time=start + np.arange(n_days).astype("timedelta64[D]"),
+        precip=rng.gamma(0.6, 6.0, size=n_days),
+        pet=np.full(n_days, 2.0),
+    )
+
+
+def _job(seed: int = 0, x1: float = 350.0) -> PrecomputeJob:
+    params = get_model("gr6j").Parameters(x1=x1, x2=0.0, x3=90.0, x4=1.7, x5=0.0, x6=5.0)
+    return PrecomputeJob(forcing=_forcing(seed=seed), model="gr6j", params=params)
+
+
+@pytest.fixture
+def counted_runs(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    calls: list[str] = []
+    run_model = precompute_module.run_model
+
+    def counting(forcing, model, params):
+        calls.append(model)
+        return run_model(forcing, model, params)
+
+    monkeypatch.setattr(precompute_module, "run_model", counting)
+    return calls
+
+
+class TestPrecomputeCacheKey:
+    def test_identical_inputs_share_a_key(self, tmp_path):
+        cache = PrecomputeCache(tmp_path)
+        assert cache.key(_job()) == cache.key(_job())
+
+    def test_forcing_change_changes_key(self, tmp_path):
+        cache = PrecomputeCache(tmp_path)
+        assert cache.key(_job(seed=0)) != cache.key(_job(seed=1))
+
+    def test_params_change_changes_key(self, tmp_path):
+        cache = PrecomputeCache(tmp_path)
+        assert cache.key(_job(x1=350.0)) != cache.key(_job(x1=351.0))
+
+    def test_model_change_changes_key(self, tmp_path):
+        cache = PrecomputeCache(tmp_path)
+        job = _job()
+        other = PrecomputeJob(forcing=job.forcing, model="hbv_light", params=job.params)
+        assert cache.key(job) != cache.key(other)
+
+
+class TestPrecomputeCache:
+    def test_non_positive_max_bytes_raises(self, tmp_path):
+        with pytest.raises(ValueError, match="max_bytes must be positive"):
+            PrecomputeCache(tmp_path, max_bytes=0)
+
+    def test_get_counts_misses_and_hits(self, tmp_path):
+        cache = PrecomputeCache(tmp_path)
+        job = _job()
+        assert cache.get(job) is None
+        cache.put(job, np.arange(5.0))
+        assert cache.get(job).tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_counters_are_exact_under_concurrent_gets(self, tmp_path):
+        cache = PrecomputeCache(tmp_path)
+        hit, miss = _job(seed=0), _job(seed=1)
+        cache.put(hit, np.arange(10.0))
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(cache.get, [hit, miss] * 200))
+        assert (cache.hits, cache.misses) == (200, 200)
+
+    def test_entries_are_npy_files_keyed_by_hash(self, tmp_path):
+        cache = PrecomputeCache(tmp_path)
+        job = _job()
+        cache.put(job, np.arange(3.0))
+        assert [p.name for p in tmp_path.iterdir()] == [f"{cache.key(job)}.npy"]
+
+    def test_least_recently_used_entry_is_evicted(self, tmp_path):
+        cache = PrecomputeCache(tmp_path, max_bytes=3 * (128 + 8 * 100))
+        jobs = [_job(seed=i) for i in range(3)]
+        for age, job in enumerate(jobs):
+            cache.put(job, np.zeros(100))
+            os.utime(cache._path(cache.key(job)), ns=(age, age))
+        cache.get(jobs[0])  # refresh the oldest entry
+
+        cache.put(_job(seed=3), np.zeros(100))
+
+        assert cache.evictions == 1
+        assert cache.get(jobs[1]) is None
+        assert cache.get(jobs[0]) is not None
+        assert cache.size_bytes() <= cache.max_bytes
+
+    def test_entry_larger_than_cap_is_not_stored(self, tmp_path):
+        cache = PrecomputeCache(tmp_path, max_bytes=64)
+        cache.put(_job(), np.zeros(100))
+        assert cache.size_bytes() == 0
+
+    def test_clear_removes_entries(self, tmp_path):
+        cache = PrecomputeCache(tmp_path)
+        cache.put(_job(), np.zeros(3))
+        cache.clear()
+        assert cache.size_bytes() == 0
+
+    def test_memory_mapped_hits_do_not_load_the_file(self, tmp_path):
+        cache = PrecomputeCache(tmp_path, memory_map=True)
+        job = _job()
+        cache.put(job, np.arange(5.0))
+        hit = cache.get(job)
+        assert isinstance(hit, np.memmap)
+        assert hit.tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+class TestPrecomputeWithCache:
+    def test_second_run_skips_simulation(self, tmp_path, counted_runs):
+        cache = PrecomputeCache(tmp_path)
+        jobs = [_job(seed=i) for i in range(3)]
+
+        first = precompute_many(jobs, max_workers=1, cache=cache)
+        second = precompute_many(jobs, max_workers=1, cache=cache)
+
+        assert len(counted_runs) == 3
+        assert [s.values for s in second] == [s.values for s in first]
+        assert (cache.hits, cache.misses) == (3, 3)
+
+    def test_only_changed_jobs_are_rerun(self, tmp_path, counted_runs):
+        cache = PrecomputeCache(tmp_path)
+        precompute_many([_job(seed=0), _job(seed=1)], max_workers=1, cache=cache)
+        precompute_many([_job(seed=0), _job(seed=1, x1=500.0)], max_workers=1, cache=cache)
+        assert len(counted_runs) == 3
+
+    def test_single_precompute_uses_cache(self, tmp_path, counted_runs):
+        cache = PrecomputeCache(tmp_path)
+        job = _job()
+        first = precompute(job.forcing, job.model, job.params, cache=cache)
+        second = precompute(job.forcing, job.model, job.params, cache=cache)
+        assert first.values == second.values
+        assert len(counted_runs) == 1
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import importlib
+import pickle
+from dataclasses import dataclass
+
+import numpy as np
+import pytest
+from taqsim.node.timeseries import TimeSeries
+
+from taqsim_hydrology.sources.handoff import ArraySeries, to_timeseries
+
+timeseries_module = importlib.import_module("taqsim.node.timeseries")
+
+
+class TestArraySeries:
+    def test_shares_memory_with_source_array(self):
+        streamflow = np.linspace(0.0, 10.0, 11)
+        series = ArraySeries(streamflow)
+        assert np.shares_memory(np.asarray(series), streamflow)
+
+    def test_is_read_only(self):
+        series = ArraySeries(np.arange(3.0))
+        with pytest.raises(ValueError, match="read-only"):
+            np.asarray(series)[0] = 1.0
+
+    def test_source_array_stays_writeable(self):
+        streamflow = np.arange(3.0)
+        ArraySeries(streamflow)
+        streamflow[0] = 5.0
+        assert streamflow[0] == 5.0
+
+    def test_behaves_like_a_sequence_of_floats(self):
+        series = ArraySeries([1.0, 2.0, 3.0])
+        assert len(series) == 3
+        assert series[1] == 2.0
+        assert type(series[1]) is float
+        assert series[-1] == 3.0
+        assert list(series) == [1.0, 2.0, 3.0]
+        assert sum(series) == 6.0
+        assert series == [1.0, 2.0, 3.0]
+
+    def test_slice_is_a_view(self):
+        streamflow = np.arange(10.0)
+        tail = ArraySeries(streamflow)[5:]
+        assert isinstance(tail, ArraySeries)
+        assert tail == [5.0, 6.0, 7.0, 8.0, 9.0]
+        assert np.shares_memory(np.asarray(tail), streamflow)
+
+    def test_index_out_of_range_raises(self):
+        with pytest.raises(IndexError):
+            ArraySeries([1.0])[3]
+
+    def test_non_contiguous_input_is_compacted(self):
+        series = ArraySeries(np.arange(10.0)[::2])
+        assert series == [0.0, 2.0, 4.0, 6.0, 8.0]
+        assert np.asarray(series).flags.c_contiguous
+
+    def test_two_dimensional_input_raises(self):
+        with pytest.raises(ValueError, match="values must be 1-D"):
+            ArraySeries(np.zeros((2, 2)))
+
+    def test_pickle_round_trip(self):
+        series = ArraySeries(np.arange(4.0))
+        assert pickle.loads(pickle.dumps(series)) == series
+
+    def test_wraps_memory_mapped_file_without_loading_it(self, tmp_path):
+        path = tmp_path / "flow.npy"
+        np.save(path, np.arange(1000.0))
+        mapped = np.load(path, mmap_mode="r")
+        series = ArraySeries(mapped)
+        assert np.shares_memory(np.asarray(series), mapped)
+        assert series[999] == 999.0
+
+
+class TestToTimeseries:
+    def test_keeps_streamflow_as_array_view(self):
+        streamflow = np.linspace(0.0, 5.0, 6)
+        series = to_timeseries(streamflow)
+        assert isinstance(series, TimeSeries)
+        assert isinstance(series.values, ArraySeries)
+        assert np.shares_memory(np.asarray(series.values), streamflow)
+
+    def test_falls_back_to_list_when_timeseries_requires_one(self, monkeypatch):
+        @dataclass(frozen=True)
+        class ListOnlyTimeSeries:
+            values: list[float]
+
+            def __post_init__(self) -> None:
+                if not isinstance(self.values, list):
+                    raise TypeError("values must be a list")
+
+        monkeypatch.setattr(timeseries_module, "TimeSeries", ListOnlyTimeSeries)
+        series = to_timeseries(np.array([1.0, 2.0]))
+        assert series.values == [1.0, 2.0]
+        assert type(series.values) is list
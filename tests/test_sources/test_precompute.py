@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import numpy as np
+import pydrology
+import pytest
+from pydrology import ForcingData, get_model
+from taqsim.node.timeseries import TimeSeries
+
+from taqsim_hydrology.sources.precompute import (
+    PrecomputeJob,
+    precompute,
+    precompute_many,
+    precompute_to_file,
+    run_chunks,
+    run_model,
+)
+
+
+def _forcing(n_days: int = 730, seed: int = 0) -> ForcingData:
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2000-01-01")
+    return ForcingData(
+        time=start + np.arange(n_days).astype("timedelta64[D]"),
+        precip=rng.gamma(0.6, 6.0, size=n_days),
+        pet=2.0 + 1.5 * np.sin(np.arange(n_days) * 2 * np.pi / 365.25),
+    )
+
+
+def _gr6j_params(x1: float = 350.0):
+    return get_model("gr6j").Parameters(x1=x1, x2=0.0, x3=90.0, x4=1.7, x5=0.0, x6=5.0)
+
+
+def _jobs(n: int) -> list[PrecomputeJob]:
+    return [
+        PrecomputeJob(forcing=_forcing(seed=i), model="gr6j", params=_gr6j_params(x1=200.0 + 50.0 * i))
+        for i in range(n)
+    ]
+
+
+class TestPrecomputeJob:
+    def test_unknown_model_raises(self):
+        with pytest.raises(ValueError, match="model must be one of"):
+            PrecomputeJob(forcing=_forcing(), model="sacramento", params=None)
+
+
+class TestPrecompute:
+    def test_returns_timeseries_matching_model_output(self):
+        forcing = _forcing()
+        params = _gr6j_params()
+
+        series = precompute(forcing, "gr6j", params)
+
+        assert isinstance(series, TimeSeries)
+        assert series.values == run_model(forcing, "gr6j", params).tolist()
+        assert len(series.values) == 730
+
+
+class TestPrecomputeMany:
+    def test_inline_run_matches_single_precompute(self):
+        jobs = _jobs(3)
+        results = precompute_many(jobs, max_workers=1)
+        assert [r.values for r in results] == [precompute(j.forcing, j.model, j.params).values for j in jobs]
+
+    def test_process_pool_preserves_job_order(self):
+        jobs = _jobs(5)
+        pooled = precompute_many(jobs, max_workers=2, chunksize=2)
+        inline = precompute_many(jobs, max_workers=1)
+        assert [r.values for r in pooled] == [r.values for r in inline]
+
+    def test_empty_jobs_return_empty_list(self):
+        assert precompute_many([]) == []
+
+    def test_invalid_max_workers_raises(self):
+        with pytest.raises(ValueError, match="max_workers must be at least 1"):
+            precompute_many(_jobs(1), max_workers=0)
+
+    def test_invalid_chunksize_raises(self):
+        with pytest.raises(ValueError, match="chunksize must be at least 1"):
+            precompute_many(_jobs(1), chunksize=0)
+
+
+def _memmapped_forcing(tmp_path, forcing: ForcingData) -> ForcingData:
+    arrays = {}
+    for name in ("time", "precip", "pet"):
+        np.save(tmp_path / f"{name}.npy", getattr(forcing, name))
+        arrays[name] = np.load(tmp_path / f"{name}.npy", mmap_mode="r")
+    return ForcingData(**arrays)
+
+
+class TestRunChunks:
+    @pytest.mark.parametrize("chunk_steps", [1, 100, 365, 729, 730, 5000])
+    def test_chunks_concatenate_to_full_run(self, chunk_steps):
+        forcing = _forcing()
+        params = _gr6j_params()
+
+        chunks = list(run_chunks(forcing, "gr6j", params, chunk_steps=chunk_steps))
+
+        assert [len(chunk) for chunk in chunks[:-1]] == [chunk_steps] * (len(chunks) - 1)
+        np.testing.assert_allclose(np.concatenate(chunks), run_model(forcing, "gr6j", params), rtol=1e-12)
+
+    def test_reads_memory_mapped_forcing(self, tmp_path):
+        forcing = _forcing()
+        params = _gr6j_params()
+
+        chunks = list(run_chunks(_memmapped_forcing(tmp_path, forcing), "gr6j", params, chunk_steps=200))
+
+        np.testing.assert_allclose(np.concatenate(chunks), run_model(forcing, "gr6j", params), rtol=1e-12)
+
+    def test_invalid_arguments_raise_before_iteration(self):
+        with pytest.raises(ValueError, match="chunk_steps must be at least 1"):
+            run_chunks(_forcing(), "gr6j", _gr6j_params(), chunk_steps=0)
+        with pytest.raises(ValueError, match="model must be one of"):
+            run_chunks(_forcing(), "sacramento", None)
+
+    def test_model_without_final_state_raises(self, monkeypatch):
+        class Stateless:
+            def run(self, params, forcing, initial_state=None):
+                return type("Output", (), {"streamflow": np.zeros(len(forcing.time))})()
+
+        monkeypatch.setattr(pydrology, "get_model", lambda name: Stateless())
+
+        chunks = run_chunks(_forcing(), "gr6j", _gr6j_params(), chunk_steps=365)
+        with pytest.raises(RuntimeError, match="does not return its final state"):
+            list(chunks)
+
+    def test_single_chunk_needs_no_final_state(self, monkeypatch):
+        class Stateless:
+            def run(self, params, forcing, initial_state=None):
+                return type("Output", (), {"streamflow": np.ones(len(forcing.time))})()
+
+        monkeypatch.setattr(pydrology, "get_model", lambda name: Stateless())
+
+        chunks = list(run_chunks(_forcing(), "gr6j", _gr6j_params(), chunk_steps=730))
+        assert len(chunks) == 1
+
+
+class TestPrecomputeToFile:
+    def test_writes_memory_mapped_streamflow(self, tmp_path):
+        forcing = _memmapped_forcing(tmp_path, _forcing())
+        params = _gr6j_params()
+
+        series = precompute_to_file(forcing, "gr6j", params, tmp_path / "out" / "flow.npy", chunk_steps=300)
+
+        stored = np.load(tmp_path / "out" / "flow.npy", mmap_mode="r")
+        assert isinstance(series, TimeSeries)
+        np.testing.assert_allclose(stored, run_model(forcing, "gr6j", params), rtol=1e-12)
+        assert list(series.values) == stored.tolist()
+
+    def test_leaves_no_temporary_files(self, tmp_path):
+        precompute_to_file(_forcing(), "gr6j", _gr6j_params(), tmp_path / "flow.npy", chunk_steps=100)
+        assert [path.name for path in tmp_path.iterdir()] == ["flow.npy"]
+
+    def test_failed_run_keeps_previous_file(self, tmp_path, monkeypatch):
+        path = tmp_path / "flow.npy"
+        precompute_to_file(_forcing(), "gr6j", _gr6j_params(), path)
+        before = np.load(path)
+
+        class Short:
+            def run(self, params, forcing, initial_state=None):
+                return type("Output", (), {"streamflow": np.zeros(3), "final_state": 0.0})()
+
+        monkeypatch.setattr(pydrology, "get_model", lambda name: Short())
+        with pytest.raises(RuntimeError, match="returned 3 values for 730 forcing steps"):
+            precompute_to_file(_forcing(), "gr6j", _gr6j_params(), path, chunk_steps=1000)
+
+        np.testing.assert_array_equal(np.load(path), before)
+        assert [p.name for p in tmp_path.iterdir()] == ["flow.npy"]